@@ -0,0 +1,238 @@
+"""
+benchmark.py
+
+Pruebas de rendimiento de los dos subsistemas con datos sintéticos:
+- Terreno (movimiento_tierras): pares de superficies fractales de varios
+  tamaños; se mide cada etapa del modelo de corte/relleno (diferencias,
+  clasificación, volúmenes) y cada motor (listas, vectorizado, por bloques
+  desde .npy, paralelo, índice de ventanas)
+- Hidráulica (mi_modelado): listas aleatorias de tramos y redes malladas;
+  se mide compute_tramo, compute_tramos_array (Colebrook punto fijo/Newton,
+  Swamee-Jain), compute_tramos, grade_line y solve_network
+- Cada medición guarda el mejor tiempo de varias repeticiones, el
+  rendimiento (elementos/s) y el pico de memoria asignada (tracemalloc, solo
+  del proceso principal; el JSON incluye además el RSS máximo de los
+  procesos hijos)
+- Resultados en JSON; --comparar marca las etapas más lentas que una
+  corrida anterior y termina con código 1 si hay regresiones
+
+Ejecutar:
+    python benchmarks/benchmark.py [--suite terreno|hidraulica|todo]
+        [--tamanos 256,1024,2048] [--tramos 1000,100000] [--redes 10,30,60]
+        [--repeticiones 3] [--procesos 4] [--salida benchmark.json]
+        [--comparar anterior.json] [--umbral 0.25]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+for carpeta in ('compartido', 'movimiento_tierras', 'mi_modelado'):
+    sys.path.insert(0, os.path.join(RAIZ, carpeta))
+
+# celdas máximas para la versión con listas (lenta por diseño)
+MAX_CELDAS_LISTAS = 250_000
+# tramos máximos para el ciclo escalar de compute_tramo
+MAX_TRAMOS_ESCALAR = 20_000
+
+
+def measure(fn, repeat):
+    # mejor tiempo de 'repeat' ejecuciones y pico de memoria de la primera
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    t = time.perf_counter()
+    fn()
+    times = [time.perf_counter() - t]
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    for _ in range(repeat - 1):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return min(times), times, peak
+
+
+def record(results, suite, stage, size, items, fn, repeat):
+    best, times, peak = measure(fn, repeat)
+    rec = {'suite': suite, 'stage': stage, 'size': size, 'items': items,
+           'best_s': best, 'times_s': times, 'items_per_s': items/best if best > 0 else None,
+           'peak_bytes': peak}
+    results.append(rec)
+    print(f"{suite:<10} {stage:<28} {size:>12} {best*1000:10.2f} ms {peak/2**20:9.1f} MiB", flush=True)
+    return rec
+
+
+def bench_terrain(sizes, repeat, processes, results):
+    from generar_terreno import generar_par_terreno
+    from motor_corte_relleno import (diferencias_arreglo, clasificar_arreglo, volumenes_arreglo,
+                                     corte_relleno_vectorizado)
+    from procesamiento_bloques import corte_relleno_por_bloques
+    from procesamiento_paralelo import corte_relleno_paralelo
+    from indice_volumenes import construir_indice
+    from calcular_diferencias import calcular_diferencias
+    from clasificar_corte_relleno import clasificar_corte_relleno
+    from calcular_volumenes import calcular_volumenes
+
+    for n in sizes:
+        cells = n*n
+        size = f"{n}x{n}"
+        datos = {}
+
+        def generar():
+            datos['actual'], datos['diseno'] = generar_par_terreno(n, n, semilla=n)
+        record(results, 'terreno', 'generar_par_terreno', size, cells, generar, 1)
+        a, d = datos['actual'], datos['diseno']
+        dif = diferencias_arreglo(a, d)
+
+        record(results, 'terreno', 'diferencias', size, cells, lambda: diferencias_arreglo(a, d), repeat)
+        record(results, 'terreno', 'clasificacion', size, cells, lambda: clasificar_arreglo(dif, 0.001), repeat)
+        record(results, 'terreno', 'volumenes', size, cells, lambda: volumenes_arreglo(dif, 25.0), repeat)
+        record(results, 'terreno', 'motor_vectorizado', size, cells,
+               lambda: corte_relleno_vectorizado(a, d, 25.0, 0.001), repeat)
+        record(results, 'terreno', 'indice_ventanas', size, cells,
+               lambda: construir_indice(dif, 25.0, 0.001), repeat)
+
+        if cells <= MAX_CELDAS_LISTAS:
+            la, ld = a.tolist(), d.tolist()
+
+            def listas():
+                dl = calcular_diferencias(la, ld)
+                clasificar_corte_relleno(dl, 0.001)
+                calcular_volumenes(dl, 25.0)
+            record(results, 'terreno', 'motor_listas', size, cells, listas, repeat)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            ra, rd = os.path.join(tmp, 'actual.npy'), os.path.join(tmp, 'diseno.npy')
+            np.save(ra, a)
+            np.save(rd, d)
+            record(results, 'terreno', 'bloques_npy', size, cells,
+                   lambda: corte_relleno_por_bloques(ra, rd, 25.0, 0.001), repeat)
+            record(results, 'terreno', f'paralelo_npy_{processes}p', size, cells,
+                   lambda: corte_relleno_paralelo(ra, rd, 25.0, 0.001, procesos=processes), repeat)
+        datos = a = d = dif = None
+
+
+def bench_hydraulics(tramo_counts, network_sizes, repeat, results):
+    import flujo_tuberias as ft
+    from generadores import random_tramos, random_network, random_profile
+    from gradiente_hidraulico import grade_line
+    from red_tuberias import solve_network
+
+    ft.disable_friction_cache()
+    for n in tramo_counts:
+        tramos = random_tramos(n, seed=n)
+        L, Dmm, Qls, mats = zip(*tramos)
+        L = np.array(L)
+        D = np.array(Dmm)/1000.0
+        Q = np.array(Qls)/1000.0
+        e = np.array([ft.rug_map[m] for m in mats])
+
+        if n <= MAX_TRAMOS_ESCALAR:
+            record(results, 'hidraulica', 'compute_tramo_escalar', n, n,
+                   lambda: [ft.compute_tramo(*x) for x in zip(L, D, Q, e)], repeat)
+        record(results, 'hidraulica', 'compute_tramos_array', n, n,
+               lambda: ft.compute_tramos_array(L, D, Q, e), repeat)
+        record(results, 'hidraulica', 'compute_tramos_array_swamee', n, n,
+               lambda: ft.compute_tramos_array(L, D, Q, e, method='swamee'), repeat)
+        Re = 1000.0*(Q/(np.pi*D**2/4.0))*D/1e-3
+        record(results, 'hidraulica', 'colebrook_newton', n, n,
+               lambda: ft.colebrook_array(Re, e, D, method='newton'), repeat)
+        record(results, 'hidraulica', 'compute_tramos', n, n, lambda: ft.compute_tramos(tramos), repeat)
+
+        res, _ = ft.compute_tramos(tramos)
+        stations = 10*n
+        profile = random_profile(stations, seed=n)
+        record(results, 'hidraulica', 'grade_line', stations, stations,
+               lambda: grade_line(profile, res, head_start=profile[0] + 1000.0), repeat)
+
+    for m in network_sizes:
+        nodes, pipes, reservoirs = random_network(m, m, seed=m)
+        record(results, 'hidraulica', 'solve_network', f"{m}x{m}", len(pipes),
+               lambda: solve_network(nodes, pipes, reservoirs), repeat)
+
+
+def metadata():
+    meta = {
+        'fecha': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'procesador': platform.processor() or platform.machine(),
+        'nucleos': os.cpu_count(),
+    }
+    try:
+        import resource
+        # pico de memoria residente del proceso (KiB en Linux)
+        meta['max_rss_kib'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        meta['max_rss_hijos_kib'] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    except ImportError:
+        pass
+    return meta
+
+
+def compare(results, baseline_path, threshold):
+    # devuelve las etapas cuyo mejor tiempo creció más que 'threshold' (fracción)
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        base = {(r['suite'], r['stage'], str(r['size'])): r for r in json.load(f)['results']}
+    regressions = []
+    for r in results:
+        old = base.get((r['suite'], r['stage'], str(r['size'])))
+        if old is None or old['best_s'] <= 0:
+            continue
+        ratio = r['best_s']/old['best_s']
+        flag = 'REGRESIÓN' if ratio > 1.0 + threshold else ''
+        print(f"{r['suite']:<10} {r['stage']:<28} {r['size']:>12} x{ratio:6.2f} {flag}")
+        if flag:
+            regressions.append({**r, 'baseline_s': old['best_s'], 'ratio': ratio})
+    return regressions
+
+
+def parse_list(text, cast=int):
+    return [cast(x) for x in text.split(',') if x.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pruebas de rendimiento con datos sintéticos.')
+    parser.add_argument('--suite', choices=['terreno', 'hidraulica', 'todo'], default='todo')
+    parser.add_argument('--tamanos', default='256,1024,2048', help='lados de las rejillas cuadradas')
+    parser.add_argument('--tramos', default='1000,100000', help='número de tramos')
+    parser.add_argument('--redes', default='10,30,60', help='lados de las redes malladas')
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1,
+                        help='procesos para el motor paralelo')
+    parser.add_argument('--salida', default='benchmark.json', help='archivo JSON de resultados')
+    parser.add_argument('--comparar', help='JSON de una corrida anterior')
+    parser.add_argument('--umbral', type=float, default=0.25,
+                        help='aumento de tiempo tolerado al comparar (0.25 = 25 %%)')
+    args = parser.parse_args(argv)
+    if args.repeticiones <= 0:
+        parser.error('--repeticiones debe ser positivo')
+
+    results = []
+    if args.suite in ('terreno', 'todo'):
+        bench_terrain(parse_list(args.tamanos), args.repeticiones, args.procesos, results)
+    if args.suite in ('hidraulica', 'todo'):
+        bench_hydraulics(parse_list(args.tramos), parse_list(args.redes), args.repeticiones, results)
+
+    report = {'meta': metadata(), 'config': vars(args), 'results': results}
+    regressions = []
+    if args.comparar:
+        regressions = compare(results, args.comparar, args.umbral)
+        report['regressions'] = regressions
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f'Resultados: {args.salida}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
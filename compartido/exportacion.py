@@ -0,0 +1,150 @@
+"""
+exportacion.py
+
+Escritura por bloques de resultados grandes, compartida por
+movimiento_tierras y mi_modelado. Ningún escritor arma el archivo completo
+en memoria: se formatea y escribe un bloque de filas a la vez.
+
+Formatos:
+  - CSV por columnas (arreglos 1D de la misma longitud)
+  - CSV de matriz (una fila de la rejilla por línea)
+  - ESRI ASCII grid (.asc), legible por rejillas_io.leer_asc; NaN -> NODATA
+  - Binario .npy (np.lib.format.open_memmap), copiado por bloques de filas:
+    sirve también para arreglos mapeados en memoria más grandes que la RAM
+
+Los escritores de matrices aceptan 'transformar(bloque, inicio)', que se
+aplica a cada bloque de filas antes de escribirlo (p. ej. clasificar delta h
+sin armar la rejilla completa de códigos).
+"""
+
+import os
+
+import numpy as np
+
+# valores formateados (o copiados, en binario) por bloque de escritura
+VALORES_BLOQUE = 1 << 18
+NODATA = -9999.0
+
+
+def _abrir(destino):
+    # acepta una ruta o un archivo de texto ya abierto (no se cierra)
+    if isinstance(destino, (str, os.PathLike)):
+        return open(destino, 'w', newline='', encoding='utf-8'), True
+    return destino, False
+
+
+# -----------------------------
+# CSV
+# -----------------------------
+
+def escribir_columnas_csv(destino, encabezado, columnas, formatos, valores_bloque=VALORES_BLOQUE, sep=','):
+    """
+    Escribe columnas 1D (arreglos o listas) como CSV. 'formatos' es una
+    cadena de formato % por columna (p. ej. '%.4f', '%d'). Cada bloque de
+    filas se formatea con una sola operación % sobre listas nativas.
+    Devuelve el número de filas escritas.
+    """
+    columnas = [np.asarray(c) for c in columnas]
+    if len(columnas) != len(formatos):
+        raise ValueError('Se requiere un formato por columna.')
+    n = len(columnas[0]) if columnas else 0
+    if any(len(c) != n for c in columnas):
+        raise ValueError('Todas las columnas deben tener la misma longitud.')
+    linea = sep.join(formatos) + '\n'
+    filas_bloque = _filas_por_bloque(len(columnas), valores_bloque)
+    f, propio = _abrir(destino)
+    try:
+        if encabezado:
+            f.write(sep.join(encabezado) + '\n')
+        for inicio in range(0, n, filas_bloque):
+            bloque = zip(*(c[inicio:inicio + filas_bloque].tolist() for c in columnas))
+            f.write(''.join([linea % fila for fila in bloque]))
+    finally:
+        if propio:
+            f.close()
+    return n
+
+
+def _filas_texto(f, matriz, fmt, sep, valores_bloque, nodata=None, transformar=None):
+    filas, cols = matriz.shape
+    filas_bloque = _filas_por_bloque(cols, valores_bloque)
+    linea = sep.join([fmt] * cols) + '\n'
+    for inicio in range(0, filas, filas_bloque):
+        bloque = np.asarray(matriz[inicio:inicio + filas_bloque])
+        if transformar is not None:
+            bloque = np.asarray(transformar(bloque, inicio))
+        if nodata is not None and bloque.dtype.kind == 'f':
+            bloque = np.where(np.isnan(bloque), nodata, bloque)
+        f.write((linea * bloque.shape[0]) % tuple(bloque.ravel().tolist()))
+
+
+def _filas_por_bloque(cols, valores_bloque):
+    return max(1, valores_bloque // max(cols, 1))
+
+
+def escribir_matriz_csv(destino, matriz, fmt='%.4f', valores_bloque=VALORES_BLOQUE, sep=',',
+                        transformar=None):
+    """
+    Escribe una matriz 2D (arreglo, memmap o RejillaElevaciones) con una
+    fila por línea, por bloques de filas.
+    """
+    matriz = np.asarray(matriz)
+    if matriz.ndim != 2:
+        raise ValueError('La matriz debe ser bidimensional.')
+    f, propio = _abrir(destino)
+    try:
+        _filas_texto(f, matriz, fmt, sep, valores_bloque, transformar=transformar)
+    finally:
+        if propio:
+            f.close()
+
+
+# -----------------------------
+# ESRI ASCII grid
+# -----------------------------
+
+def escribir_asc(destino, matriz, tam_celda=1.0, xll=0.0, yll=0.0, nodata=NODATA, fmt=None,
+                 valores_bloque=VALORES_BLOQUE, transformar=None):
+    """
+    Escribe un ESRI ASCII grid. Los NaN se escriben como 'nodata'. Sin 'fmt'
+    se usa '%d' para enteros (p. ej. códigos de clasificación) y '%.4f' para
+    reales (según el tipo de 'matriz'; con 'transformar' conviene darlo).
+    """
+    matriz = np.asarray(matriz)
+    if matriz.ndim != 2:
+        raise ValueError('La matriz debe ser bidimensional.')
+    if fmt is None:
+        fmt = '%d' if matriz.dtype.kind in 'iub' else '%.4f'
+    filas, cols = matriz.shape
+    f, propio = _abrir(destino)
+    try:
+        f.write(f"ncols {cols}\nnrows {filas}\nxllcorner {float(xll)!r}\nyllcorner {float(yll)!r}\n"
+                f"cellsize {float(tam_celda)!r}\nNODATA_value {nodata:g}\n")
+        _filas_texto(f, matriz, fmt, ' ', valores_bloque, nodata, transformar)
+    finally:
+        if propio:
+            f.close()
+
+
+# -----------------------------
+# Binario
+# -----------------------------
+
+def escribir_npy(ruta, matriz, dtype=None, valores_bloque=16 * VALORES_BLOQUE, transformar=None):
+    """
+    Copia un arreglo (también mapeado en memoria) a un .npy por bloques de
+    filas, opcionalmente convirtiendo el tipo (p. ej. float32 o int8).
+    """
+    matriz = np.asarray(matriz)
+    salida = np.lib.format.open_memmap(ruta, mode='w+', dtype=dtype or matriz.dtype,
+                                       shape=matriz.shape)
+    if matriz.ndim == 0 or matriz.shape[0] == 0:
+        salida[...] = matriz
+    else:
+        paso = _filas_por_bloque(int(np.prod(matriz.shape[1:])), valores_bloque)
+        for inicio in range(0, matriz.shape[0], paso):
+            bloque = matriz[inicio:inicio + paso]
+            if transformar is not None:
+                bloque = transformar(np.asarray(bloque), inicio)
+            salida[inicio:inicio + paso] = bloque
+    salida.flush()
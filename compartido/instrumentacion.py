@@ -0,0 +1,167 @@
+"""
+instrumentacion.py
+
+Medición ligera por etapas, compartida por movimiento_tierras y mi_modelado.
+Desactivada por defecto: mientras lo esté, etapa() devuelve un contexto nulo
+y contar() solo revisa una bandera, así que el costo en el código medido es
+despreciable.
+
+Activación:
+  - variable de entorno MODELADO_INSTRUMENTAR: '1' (solo recolectar) o una
+    ruta de archivo (además se escribe un registro JSON por línea)
+  - activar(ruta=None) desde el código o la opción de línea de comandos
+
+Registros (dicts):
+  - tipo 'etapa': sistema, etapa, segundos y, si la etapa los informa,
+    celdas, celdas_por_s, bytes y campos extra
+  - tipo 'contadores' / 'cache': emitidos con emitir() (p. ej. al terminar
+    una corrida con los contadores acumulados)
+
+Los contadores de procesos trabajadores (pools) no se propagan al proceso
+principal.
+"""
+
+import json
+import os
+import time
+
+VARIABLE_ENTORNO = 'MODELADO_INSTRUMENTAR'
+
+_estado = {'activo': False, 'archivo': None}
+_registros = []
+_contadores = {}
+
+
+class _EtapaNula:
+    # contexto compartido mientras la instrumentación está desactivada
+    __slots__ = ()
+
+    def __enter__(self):
+        return {}
+
+    def __exit__(self, *exc):
+        return False
+
+
+_ETAPA_NULA = _EtapaNula()
+
+
+class _Etapa:
+    __slots__ = ('registro', 't0')
+
+    def __init__(self, sistema, nombre, celdas, nbytes, extra):
+        self.registro = {'tipo': 'etapa', 'sistema': sistema, 'etapa': nombre}
+        if celdas is not None:
+            self.registro['celdas'] = int(celdas)
+        if nbytes is not None:
+            self.registro['bytes'] = int(nbytes)
+        self.registro.update(extra)
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        # la etapa puede completar 'celdas', 'bytes' u otros campos al avanzar
+        return self.registro
+
+    def __exit__(self, tipo_exc, exc, tb):
+        reg = self.registro
+        reg['segundos'] = time.perf_counter() - self.t0
+        if reg.get('celdas') and reg['segundos'] > 0:
+            reg['celdas_por_s'] = reg['celdas'] / reg['segundos']
+        if tipo_exc is not None:
+            reg['error'] = tipo_exc.__name__
+        emitir(reg)
+        return False
+
+
+def activar(ruta=None):
+    """
+    Activa la instrumentación; con 'ruta' cada registro se agrega además
+    como una línea JSON a ese archivo.
+    """
+    desactivar()
+    _estado['activo'] = True
+    if ruta:
+        _estado['archivo'] = open(ruta, 'a', encoding='utf-8')
+
+
+def desactivar():
+    _estado['activo'] = False
+    if _estado['archivo'] is not None:
+        _estado['archivo'].close()
+        _estado['archivo'] = None
+
+
+def activo():
+    return _estado['activo']
+
+
+def etapa(sistema, nombre, celdas=None, nbytes=None, **extra):
+    """
+    Contexto que mide el tiempo de pared de una etapa:
+        with etapa('terreno', 'diferencias', celdas=n) as reg:
+            ...
+            reg['bytes'] = resultado.nbytes
+    """
+    if not _estado['activo']:
+        return _ETAPA_NULA
+    return _Etapa(sistema, nombre, celdas, nbytes, extra)
+
+
+def contar(nombre, n=1):
+    if _estado['activo']:
+        _contadores[nombre] = _contadores.get(nombre, 0) + n
+
+
+def emitir(registro):
+    if not _estado['activo']:
+        return
+    _registros.append(registro)
+    if _estado['archivo'] is not None:
+        _estado['archivo'].write(json.dumps(registro, default=float) + '\n')
+        _estado['archivo'].flush()
+
+
+def emitir_contadores(sistema):
+    # registro con los contadores acumulados hasta ahora
+    if _estado['activo'] and _contadores:
+        emitir({'tipo': 'contadores', 'sistema': sistema, **_contadores})
+
+
+def registros():
+    return list(_registros)
+
+
+def contadores():
+    return dict(_contadores)
+
+
+def limpiar():
+    _registros.clear()
+    _contadores.clear()
+
+
+def resumen(regs=None):
+    # tabla de texto con las etapas medidas y los contadores
+    regs = _registros if regs is None else regs
+    lineas = []
+    for r in regs:
+        if r.get('tipo') == 'etapa':
+            linea = f"{r['sistema']:<10} {r['etapa']:<26} {r['segundos']*1000:10.3f} ms"
+            if 'celdas_por_s' in r:
+                linea += f"  {r['celdas_por_s']:.3e} celdas/s"
+            if 'bytes' in r:
+                linea += f"  {r['bytes']/2**20:.1f} MiB"
+            lineas.append(linea)
+        else:
+            datos = ', '.join(f"{k}={v}" for k, v in r.items() if k not in ('tipo', 'sistema'))
+            lineas.append(f"{r.get('sistema', ''):<10} [{r.get('tipo')}] {datos}")
+    return '\n'.join(lineas)
+
+
+def _desde_entorno():
+    valor = os.environ.get(VARIABLE_ENTORNO, '').strip()
+    if valor and valor.lower() not in ('0', 'no', 'false'):
+        activar(None if valor.lower() in ('1', 'si', 'sí', 'true') else valor)
+
+
+_desde_entorno()
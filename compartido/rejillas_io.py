@@ -0,0 +1,302 @@
+"""
+rejillas_io.py
+
+Lectura rápida de rejillas de elevación, compartida por movimiento_tierras y
+mi_modelado. Todos los lectores devuelven (arreglo, info):
+  - arreglo: np.ndarray 2D contiguo (NODATA -> NaN)
+  - info: dict con 'filas', 'columnas', 'tam_celda', 'xll', 'yll', 'nodata'
+
+Formatos:
+  - ESRI ASCII grid (.asc): encabezado + valores, parseo en bloque (np.loadtxt)
+  - XYZ en rejilla (.xyz): columnas x y z (espacio o coma), una fila por punto
+  - Binario .npy (opcionalmente mapeado en memoria) o binario crudo
+  - Texto de matriz (filas -> líneas, separador espacio o coma)
+
+inspeccionar_rejilla() obtiene dimensiones y tamaño de celda sin cargar datos.
+"""
+
+import os
+
+import numpy as np
+
+_CLAVES_ASC = ('ncols', 'nrows', 'xllcorner', 'yllcorner', 'xllcenter', 'yllcenter',
+               'cellsize', 'nodata_value')
+# tolerancia de las coordenadas XYZ, como fracción del tamaño de celda
+_TOL_XYZ = 1e-3
+
+
+def _info(filas, columnas, tam_celda=1.0, xll=0.0, yll=0.0, nodata=None):
+    return {'filas': int(filas), 'columnas': int(columnas), 'tam_celda': float(tam_celda),
+            'xll': float(xll), 'yll': float(yll), 'nodata': nodata}
+
+
+def _formato(ruta):
+    ext = os.path.splitext(str(ruta))[1].lower()
+    if ext == '.asc':
+        return 'asc'
+    if ext == '.xyz':
+        return 'xyz'
+    if ext == '.npy':
+        return 'npy'
+    if ext in ('.bin', '.raw', '.flt'):
+        return 'binario'
+    raise ValueError(f"Formato de rejilla no reconocido: '{ext}'")
+
+
+def _parsear_numeros(texto):
+    """
+    Parseo en bloque de números separados por espacios (bytes o str): una
+    sola conversión de la lista de palabras a float64. Un valor no numérico
+    es un error (no se trunca el archivo en silencio).
+    """
+    palabras = texto.split()
+    try:
+        return np.array(palabras, dtype=np.float64)
+    except ValueError:
+        for i, p in enumerate(palabras):
+            try:
+                float(p)
+            except ValueError:
+                if isinstance(p, bytes):
+                    p = p.decode('utf-8', 'replace')
+                raise ValueError(f"Valor no numérico '{p}' (número {i + 1} de los datos).") from None
+        raise
+
+
+# -----------------------------
+# ESRI ASCII grid
+# -----------------------------
+
+def _leer_encabezado_asc(f):
+    """
+    Lee las líneas de encabezado de un archivo abierto en modo binario y deja
+    el cursor al inicio de los datos. Devuelve el dict de claves en minúsculas.
+    """
+    enc = {}
+    while True:
+        pos = f.tell()
+        ln = f.readline()
+        partes = ln.split()
+        if not partes:
+            if not ln:
+                break
+            continue
+        clave = partes[0].decode('ascii', 'replace').lower()
+        if clave not in _CLAVES_ASC:
+            f.seek(pos)
+            break
+        if len(partes) < 2:
+            raise ValueError(f"Encabezado ASC sin valor para '{clave}'.")
+        enc[clave] = float(partes[1])
+    for req in ('ncols', 'nrows', 'cellsize'):
+        if req not in enc:
+            raise ValueError(f"Encabezado ASC incompleto: falta '{req}'.")
+    return enc
+
+
+def _info_asc(enc):
+    tam = enc['cellsize']
+    xll = enc.get('xllcorner', enc.get('xllcenter', 0.0) - tam / 2.0)
+    yll = enc.get('yllcorner', enc.get('yllcenter', 0.0) - tam / 2.0)
+    return _info(enc['nrows'], enc['ncols'], tam, xll, yll, enc.get('nodata_value'))
+
+
+def leer_asc(ruta, dtype=np.float64):
+    """
+    Lee un ESRI ASCII grid. Los valores NODATA se devuelven como NaN.
+    """
+    with open(ruta, 'rb') as f:
+        info = _info_asc(_leer_encabezado_asc(f))
+        n = info['filas'] * info['columnas']
+        inicio = f.tell()
+        try:
+            # caso habitual: una fila de la rejilla por línea
+            datos = np.loadtxt(f, dtype=np.float64, ndmin=2).ravel()
+        except ValueError:
+            datos = None
+        if datos is None or datos.size != n:
+            # valores repartidos libremente entre líneas
+            f.seek(inicio)
+            datos = _parsear_numeros(f.read())
+    if datos.size != n:
+        raise ValueError(f"El ASC declara {n} celdas y se leyeron {datos.size}.")
+    arr = datos.reshape(info['filas'], info['columnas'])
+    if info['nodata'] is not None:
+        arr[arr == info['nodata']] = np.nan
+    return np.ascontiguousarray(arr, dtype=dtype), info
+
+
+# -----------------------------
+# XYZ en rejilla
+# -----------------------------
+
+def _leer_puntos_xyz(ruta):
+    with open(ruta, 'rb') as f:
+        texto = f.read().replace(b',', b' ').replace(b';', b' ')
+    # encabezado opcional (p. ej. "x y z")
+    primera = texto.lstrip().split(None, 1)[:1]
+    if primera and not primera[0][:1] in b'0123456789+-.':
+        texto = texto.lstrip().split(b'\n', 1)[1] if b'\n' in texto.lstrip() else b''
+    valores = _parsear_numeros(texto)
+    if valores.size % 3:
+        raise ValueError("El archivo XYZ debe tener tres columnas (x y z).")
+    return valores.reshape(-1, 3)
+
+
+def _tam_eje(v):
+    # separación típica entre coordenadas distintas, ignorando el ruido de
+    # redondeo; se ajusta con la extensión total para no acumular error
+    vs = np.unique(v)
+    if vs.size < 2:
+        return None
+    d = np.diff(vs)
+    d = d[d > _TOL_XYZ * d.max()]
+    tam = float(np.median(d))
+    pasos = round((vs[-1] - vs[0]) / tam)
+    return float(vs[-1] - vs[0]) / pasos
+
+
+def _indices_eje(v, tam, eje):
+    # índice de columna (o fila) de cada punto, redondeando a la rejilla
+    k = np.rint((v - v.min()) / tam)
+    centro = v - k * tam
+    if np.ptp(centro) > _TOL_XYZ * tam * 2:
+        raise ValueError(f"Los puntos XYZ no forman una rejilla regular en {eje}.")
+    return k.astype(np.intp), float(centro.mean())
+
+
+def _ejes_xyz(x, y):
+    tx, ty = _tam_eje(x), _tam_eje(y)
+    if tx is not None and ty is not None and not np.isclose(tx, ty, rtol=_TOL_XYZ):
+        raise ValueError("Los puntos XYZ no forman una rejilla regular (dx != dy).")
+    tam = tx or ty or 1.0
+    ix, x0 = _indices_eje(x, tam, 'x')
+    iy, y0 = _indices_eje(y, tam, 'y')
+    info = _info(iy.max() + 1, ix.max() + 1, tam, x0 - tam / 2.0, y0 - tam / 2.0)
+    return info, ix, iy
+
+
+def leer_xyz(ruta, dtype=np.float64):
+    """
+    Lee puntos x y z de una rejilla regular (en cualquier orden) y los coloca
+    en una matriz con la fila 0 al norte. Las celdas sin punto quedan en NaN.
+    """
+    puntos = _leer_puntos_xyz(ruta)
+    info, ix, iy = _ejes_xyz(puntos[:, 0], puntos[:, 1])
+    arr = np.full((info['filas'], info['columnas']), np.nan, dtype=dtype)
+    arr[info['filas'] - 1 - iy, ix] = puntos[:, 2]
+    return arr, info
+
+
+# -----------------------------
+# Binario
+# -----------------------------
+
+def leer_binario(ruta, forma=None, dtype=np.float64, mmap=False, tam_celda=1.0):
+    """
+    Lee un .npy (forma y dtype del encabezado) o un binario crudo en orden C
+    (requiere 'forma'). Con mmap=True el arreglo queda mapeado en memoria.
+    """
+    if str(ruta).lower().endswith('.npy'):
+        arr = np.load(ruta, mmap_mode='r' if mmap else None)
+    else:
+        if forma is None:
+            raise ValueError("Para un binario crudo se requiere forma=(filas, columnas).")
+        if mmap:
+            arr = np.memmap(ruta, dtype=dtype, mode='r', shape=tuple(forma))
+        else:
+            arr = np.fromfile(ruta, dtype=dtype).reshape(forma)
+    if arr.ndim != 2:
+        raise ValueError("La rejilla debe ser bidimensional.")
+    return arr, _info(arr.shape[0], arr.shape[1], tam_celda)
+
+
+# -----------------------------
+# Texto de matriz
+# -----------------------------
+
+def _diagnostica_texto(lineas):
+    ncols = None
+    for idx, ln in enumerate(lineas):
+        parts = ln.replace(',', ' ').split()
+        try:
+            row = [float(p) for p in parts]
+        except ValueError:
+            raise ValueError(f"Valor no numérico en la fila {idx+1}: '{ln}'")
+        if ncols is None:
+            ncols = len(row)
+        elif len(row) != ncols:
+            raise ValueError(f"Inconsistencia en número de columnas (fila {idx+1}).")
+
+
+def leer_texto_matriz(texto, dtype=np.float64):
+    """
+    Convierte texto (filas -> líneas, separador espacio o coma) en matriz.
+    El caso válido se parsea en bloque con el lector en C de np.loadtxt; si
+    falla se recorre línea por línea solo para dar un mensaje de error preciso.
+    """
+    lineas = [ln for ln in texto.replace(',', ' ').splitlines() if ln.strip() != ""]
+    if not lineas:
+        raise ValueError("No se detectaron datos en la matriz.")
+    try:
+        return np.loadtxt(lineas, dtype=dtype, ndmin=2)
+    except ValueError:
+        _diagnostica_texto([ln.strip() for ln in texto.strip().splitlines() if ln.strip() != ""])
+        raise ValueError("No se pudo interpretar la matriz.")
+
+
+# -----------------------------
+# Entrada general
+# -----------------------------
+
+def leer_rejilla(ruta, **kw):
+    """
+    Lee una rejilla eligiendo el lector por extensión (.asc, .xyz, .npy,
+    .bin/.raw/.flt). Los argumentos extra se pasan al lector.
+    """
+    formato = _formato(ruta)
+    if formato == 'asc':
+        return leer_asc(ruta, **kw)
+    if formato == 'xyz':
+        return leer_xyz(ruta, **kw)
+    return leer_binario(ruta, **kw)
+
+
+def inspeccionar_rejilla(ruta, forma=None, dtype=np.float64):
+    """
+    Devuelve el dict info (más 'formato' y 'dtype') sin cargar los valores:
+      - .asc: solo lee el encabezado
+      - .npy: solo lee el encabezado del arreglo
+      - binario crudo: deduce filas a partir del tamaño del archivo y
+        'forma' = (filas o None, columnas)
+      - .xyz: no tiene encabezado; lee únicamente las coordenadas x y
+    """
+    formato = _formato(ruta)
+    if formato == 'asc':
+        with open(ruta, 'rb') as f:
+            info = _info_asc(_leer_encabezado_asc(f))
+        dt = np.float64
+    elif formato == 'npy':
+        arr = np.load(ruta, mmap_mode='r')
+        info = _info(arr.shape[0], arr.shape[1] if arr.ndim > 1 else 1)
+        dt = arr.dtype
+    elif formato == 'binario':
+        if forma is None:
+            raise ValueError("Para un binario crudo se requiere forma=(filas, columnas).")
+        dt = np.dtype(dtype)
+        columnas = forma[1]
+        filas = os.path.getsize(ruta) // (dt.itemsize * columnas)
+        info = _info(filas, columnas)
+    else:
+        puntos = _leer_puntos_xyz(ruta)
+        info, _, _ = _ejes_xyz(puntos[:, 0], puntos[:, 1])
+        dt = np.float64
+    info['formato'] = formato
+    info['dtype'] = np.dtype(dt).name
+    return info
+
+
+if __name__ == "__main__":
+    import sys
+    for r in sys.argv[1:]:
+        print(r, inspeccionar_rejilla(r))
@@ -0,0 +1,282 @@
+"""
+escenarios.py
+
+Barridos de escenarios para la pérdida total por fricción de una lista de
+tramos (misma hidráulica que compute_tramo):
+- Monte Carlo: caudal con variación normal (coeficiente de variación),
+  rugosidad envejecida (factor uniforme) y tolerancia de diámetro (uniforme)
+  muestreados por tramo y escenario
+- Paramétrico: malla de factores de caudal, rugosidad y diámetro aplicados
+  a todos los tramos
+- Cada bloque de escenarios se evalúa vectorizado con compute_tramos_array y
+  los bloques se reparten en un pool de procesos
+- Solo se guardan resúmenes acumulativos (histograma, media, desviación,
+  mín/máx) que se combinan entre bloques; los percentiles se obtienen del
+  histograma de bins logarítmicos, sin guardar cada resultado
+
+Los números aleatorios de cada bloque salen de su propia semilla derivada
+(SeedSequence), así que el resultado no depende del número de procesos.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from flujo_tuberias import compute_tramos_array, rug_map
+
+# elementos (escenarios x tramos) evaluados por bloque
+CHUNK_ELEMENTS = 500_000
+HIST_BINS = 2000
+PERCENTILES = (5, 50, 95, 99)
+Q_MIN = 1e-9
+
+# estado de cada proceso trabajador (ver _init_worker)
+_base = {}
+
+
+def _tramo_base(tramos):
+    # (L m, D mm, Q L/s, material) -> arreglos SI
+    if len(tramos) == 0:
+        raise ValueError('No hay tramos definidos')
+    L, Dmm, Qls, mats = zip(*tramos)
+    return {
+        'L': np.array(L, dtype=float),
+        'D': np.array(Dmm, dtype=float)/1000.0,
+        'Q': np.array(Qls, dtype=float)/1000.0,
+        'e': np.array([rug_map.get(m, 1.5e-6) for m in mats]),
+    }
+
+
+def _init_worker(base, method, edges):
+    _base.clear()
+    _base.update(base)
+    _base['method'] = method
+    _base['edges'] = edges
+
+
+def _empty_summary(edges):
+    return {'n': 0, 'mean': 0.0, 'm2': 0.0, 'min': np.inf, 'max': -np.inf,
+            'counts': np.zeros(len(edges) + 1, dtype=np.int64), 'not_converged': 0}
+
+
+def _summarize(total_h, converged, edges):
+    # resumen de un bloque; counts[0] y counts[-1] son bajo/sobre el rango
+    s = _empty_summary(edges)
+    s['n'] = total_h.size
+    s['mean'] = float(total_h.mean())
+    s['m2'] = float(((total_h - s['mean'])**2).sum())
+    s['min'] = float(total_h.min())
+    s['max'] = float(total_h.max())
+    s['counts'] = np.bincount(np.searchsorted(edges, total_h, side='right'),
+                              minlength=len(edges) + 1).astype(np.int64)
+    s['not_converged'] = int(np.count_nonzero(~converged))
+    return s
+
+
+def _merge(a, b):
+    # combina dos resúmenes (media y M2 con la fórmula de Chan et al.)
+    if b['n'] == 0:
+        return a
+    if a['n'] == 0:
+        return b
+    n = a['n'] + b['n']
+    delta = b['mean'] - a['mean']
+    return {
+        'n': n,
+        'mean': a['mean'] + delta*b['n']/n,
+        'm2': a['m2'] + b['m2'] + delta**2*a['n']*b['n']/n,
+        'min': min(a['min'], b['min']),
+        'max': max(a['max'], b['max']),
+        'counts': a['counts'] + b['counts'],
+        'not_converged': a['not_converged'] + b['not_converged'],
+    }
+
+
+def _evaluate(q_fac, e_fac, d_fac):
+    # pérdida total por escenario; los factores se difunden contra (tramos,)
+    b = _base
+    D = b['D']*d_fac
+    Q = np.maximum(b['Q']*q_fac, Q_MIN)
+    L = np.broadcast_to(b['L'], D.shape)
+    res = compute_tramos_array(L, D, Q, b['e']*e_fac, method=b['method'])
+    return res['hf'].sum(axis=1), res['converged'].all(axis=1)
+
+
+def _sample_factors(rng, n, m, flow_cv, aging, diameter_tol):
+    q_fac = rng.normal(1.0, flow_cv, (n, m)) if flow_cv > 0 else np.ones((n, 1))
+    e_fac = rng.uniform(aging[0], aging[1], (n, m)) if aging[1] > aging[0] else np.full((n, 1), aging[0])
+    d_fac = (1.0 + rng.uniform(-diameter_tol, diameter_tol, (n, m))) if diameter_tol > 0 else np.ones((n, 1))
+    return q_fac, e_fac, d_fac
+
+
+def _mc_chunk(seed, n, flow_cv, aging, diameter_tol):
+    rng = np.random.default_rng(seed)
+    factors = _sample_factors(rng, n, _base['L'].size, flow_cv, aging, diameter_tol)
+    return _summarize(*_evaluate(*factors), _base['edges'])
+
+
+def _grid_chunk(start, stop, q_grid, e_grid, d_grid):
+    iq, ie, idd = np.unravel_index(np.arange(start, stop), (len(q_grid), len(e_grid), len(d_grid)))
+    total_h, converged = _evaluate(q_grid[iq][:, None], e_grid[ie][:, None], d_grid[idd][:, None])
+    return _summarize(total_h, converged, _base['edges']), total_h
+
+
+def _run(base, method, edges, tasks, fn, processes):
+    # ejecuta fn(*task) en serie o en el pool y devuelve los resultados en orden
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if not isinstance(processes, int) or processes <= 0:
+        raise ValueError('processes debe ser un entero positivo.')
+    if processes == 1 or len(tasks) <= 1:
+        _init_worker(base, method, edges)
+        try:
+            for task in tasks:
+                yield fn(*task)
+        finally:
+            _base.clear()
+        return
+    with ProcessPoolExecutor(max_workers=min(processes, len(tasks)),
+                             initializer=_init_worker, initargs=(base, method, edges)) as pool:
+        yield from pool.map(fn, *zip(*tasks))
+
+
+def _edges_from_pilot(lo, hi, bins):
+    # bins logarítmicos entre lo/2 y 2*hi; fuera de ese rango solo se cuentan
+    lo = max(lo, 1e-12)
+    return np.geomspace(lo/2.0, max(hi, lo)*2.0, bins + 1)
+
+
+def finish_summary(s, edges, percentiles=PERCENTILES):
+    """
+    Resumen final: n, media, desviación estándar, mín, máx, percentiles
+    (interpolados en el histograma logarítmico; exactos a la anchura de un
+    bin, ~0.1 % con los valores por defecto), histograma y escenarios con
+    Colebrook sin converger.
+    """
+    n = s['n']
+    counts = s['counts']
+    cum = np.cumsum(counts)
+    pct = {}
+    for p in percentiles:
+        rank = p/100.0*n
+        i = int(np.searchsorted(cum, rank, side='left'))
+        if i == 0:
+            pct[p] = s['min']
+        elif i == len(counts) - 1:
+            pct[p] = s['max']
+        else:
+            # interpolación geométrica dentro del bin [edges[i-1], edges[i])
+            before = cum[i-1]
+            frac = (rank - before)/counts[i] if counts[i] else 0.0
+            val = edges[i-1]*(edges[i]/edges[i-1])**frac
+            pct[p] = float(min(max(val, s['min']), s['max']))
+    return {
+        'n': n,
+        'mean': s['mean'],
+        'std': float(np.sqrt(s['m2']/(n - 1))) if n > 1 else 0.0,
+        'min': s['min'],
+        'max': s['max'],
+        'percentiles': pct,
+        'hist_counts': counts[1:-1],
+        'hist_edges': edges,
+        'below_range': int(counts[0]),
+        'above_range': int(counts[-1]),
+        'not_converged': s['not_converged'],
+    }
+
+
+def monte_carlo(tramos, n=1_000_000, flow_cv=0.10, aging=(1.0, 3.0), diameter_tol=0.02,
+                method='colebrook', seed=0, processes=None, chunk_elements=CHUNK_ELEMENTS,
+                bins=HIST_BINS, percentiles=PERCENTILES):
+    """
+    Distribución de la pérdida total (m) de 'tramos' ((L m, D mm, Q L/s,
+    material), como en la interfaz) para n escenarios aleatorios:
+      - caudal: Q * Normal(1, flow_cv)
+      - rugosidad: e * Uniforme(aging[0], aging[1]) (envejecimiento)
+      - diámetro: D * (1 + Uniforme(-diameter_tol, diameter_tol))
+    muestreados de forma independiente por tramo y escenario.
+    processes=None usa os.cpu_count(); processes=1 corre en este proceso.
+    Devuelve el dict de finish_summary.
+    """
+    if n <= 0:
+        raise ValueError('n debe ser positivo.')
+    base = _tramo_base(tramos)
+    m = base['L'].size
+    rows = max(1, chunk_elements // m)
+    seeds = np.random.SeedSequence(seed).spawn(-(-n // rows))
+    sizes = [min(rows, n - i*rows) for i in range(len(seeds))]
+
+    # bloque piloto (en este proceso) para fijar el rango del histograma
+    _init_worker(base, method, np.array([0.0, 1.0]))
+    try:
+        pilot, _ = _evaluate(*_sample_factors(np.random.default_rng(seeds[0]), min(sizes[0], 10_000), m,
+                                              flow_cv, aging, diameter_tol))
+    finally:
+        _base.clear()
+    edges = _edges_from_pilot(pilot.min(), pilot.max(), bins)
+
+    tasks = [(sd, size, flow_cv, tuple(aging), diameter_tol) for sd, size in zip(seeds, sizes)]
+    total = _empty_summary(edges)
+    for part in _run(base, method, edges, tasks, _mc_chunk, processes):
+        total = _merge(total, part)
+    return finish_summary(total, edges, percentiles)
+
+
+def parametric_sweep(tramos, flow_factors, roughness_factors=(1.0,), diameter_factors=(1.0,),
+                     method='colebrook', processes=None, chunk_elements=CHUNK_ELEMENTS,
+                     bins=HIST_BINS, percentiles=PERCENTILES):
+    """
+    Pérdida total para cada combinación de factores (caudal, rugosidad,
+    diámetro) aplicados a todos los tramos. Devuelve (tabla, resumen): la
+    tabla tiene forma (len(flow), len(roughness), len(diameter)) y el
+    resumen es el de finish_summary sobre todas las combinaciones.
+    """
+    base = _tramo_base(tramos)
+    grids = [np.asarray(x, dtype=float).ravel() for x in (flow_factors, roughness_factors, diameter_factors)]
+    shape = tuple(g.size for g in grids)
+    count = int(np.prod(shape))
+    if count == 0:
+        raise ValueError('Cada lista de factores debe tener al menos un valor.')
+    rows = max(1, chunk_elements // base['L'].size)
+    tasks = [(start, min(start + rows, count), *grids) for start in range(0, count, rows)]
+
+    # rango del histograma con los extremos de la malla (hf crece con Q y e y decrece con D)
+    _init_worker(base, method, np.array([0.0, 1.0]))
+    try:
+        corners, _ = _evaluate(np.array([[grids[0].min()], [grids[0].max()]]),
+                               np.array([[grids[1].min()], [grids[1].max()]]),
+                               np.array([[grids[2].max()], [grids[2].min()]]))
+    finally:
+        _base.clear()
+    edges = _edges_from_pilot(corners.min(), corners.max(), bins)
+
+    table = np.empty(count)
+    total = _empty_summary(edges)
+    for (start, stop, *_), (part, values) in zip(tasks, _run(base, method, edges, tasks, _grid_chunk, processes)):
+        table[start:stop] = values
+        total = _merge(total, part)
+    return table.reshape(shape), finish_summary(total, edges, percentiles)
+
+
+def scenario_report(summary):
+    # texto breve del resumen (interfaz / línea de comandos)
+    lines = [f"Escenarios: {summary['n']}",
+             f"Pérdida total media = {summary['mean']:.3f} m (desv. est. {summary['std']:.3f} m)",
+             f"Mín = {summary['min']:.3f} m, máx = {summary['max']:.3f} m"]
+    lines += [f"P{p} = {v:.3f} m" for p, v in summary['percentiles'].items()]
+    if summary['not_converged']:
+        lines.append(f"Escenarios con Colebrook sin converger: {summary['not_converged']}")
+    return '\n'.join(lines) + '\n'
+
+
+if __name__ == '__main__':
+    import time
+
+    tramos = [(400, 150, 20, 'PVC'), (600, 100, 10, 'Fierro galvanizado'), (500, 100, 10, 'PEAD')]
+    t = time.perf_counter()
+    summary = monte_carlo(tramos, n=1_000_000, seed=1)
+    print(scenario_report(summary), end='')
+    print(f"({time.perf_counter() - t:.2f} s)")
+    table, _ = parametric_sweep(tramos, np.linspace(0.8, 1.2, 5), (1.0, 2.0, 3.0), processes=1)
+    print(np.round(table[:, :, 0], 3))
@@ -4,47 +4,56 @@ flujo_tuberias.py
 
 Programa integrado: flujo hidráulico + representación topográfica (matrices y perfiles)
 - Permite introducir una matriz de elevaciones (topografía)
-- Extraer un perfil longitudinal (fila o columna) o editarlo manualmente
+- Extraer un perfil longitudinal (fila, columna o polilínea) o editarlo manualmente
 - Crear varios tramos de tubería (lista) y calcular pérdidas por tramos
+- Elegir diámetros comerciales de costo mínimo con una pérdida o presión límite
 - Usa Darcy–Weisbach + Colebrook (iterativo) o Swamee–Jain
+- Revisa la línea piezométrica y de energía contra el terreno en cada estación
+  (presión negativa o bajo la mínima, recubrimiento insuficiente)
+- Simula el golpe de ariete por cierre de válvula (método de las características)
 - Visualiza mapa de elevaciones (heatmap) y perfil longitudinal (plot)
-- Exporta resultados a CSV
+- Exporta resultados a CSV (por bloques) o a un .npz binario compacto
 
 Guardar en carpeta: mi_modelado
-Ejecutar: python flujo_tuberias.py
+Ejecutar (interfaz): python flujo_tuberias.py
+Ejecutar (lote, sin interfaz):
+    python flujo_tuberias.py --tramos tramos.csv [--perfil perfil.csv] [--perfil-tubo tubo.csv]
+                             [--metodo swamee] [--salida resultados.csv|.npz]
+                             [--carga 120] [--pmin 10] [--recubrimiento 0.8]
+                             [--escenarios 1000000] [--procesos 4]
+                             [--catalogo diametros.csv] [--hf-max 25]
+                             [--cierre 5] [--celeridad 1000] [--duracion 60]
+                             [--dt 0.005] [--carga-descarga 80]
+                             [--cache-friccion] [--instrumentar [registros.jsonl]]
+
+El núcleo hidráulico solo depende de NumPy; tkinter y matplotlib se importan
+al abrir la interfaz.
 """
 
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
 import numpy as np
 import math
 import csv
-import matplotlib.pyplot as plt
-from matplotlib import cm
 import os
+import sys
+import threading
+from collections import OrderedDict
+
+import ruta_compartido
+ruta_compartido.agregar()
+from rejillas_io import leer_texto_matriz
+from exportacion import escribir_columnas_csv
+from instrumentacion import etapa, contar, emitir, emitir_contadores, activar, resumen
+from topografia import (TopographyModel, build_pyramid, select_level, level_window,
+                        sample_polyline, parse_polyline)
+from gradiente_hidraulico import grade_line, grade_summary, MIN_PRESSURE, MIN_COVER
 
 # -----------------------------
 # UTILIDADES: parseo y ejemplos
 # -----------------------------
 
 def parse_matrix_text(text):
-    lines = [ln.strip() for ln in text.strip().splitlines() if ln.strip() != ""]
-    if not lines:
-        raise ValueError("No se detectaron datos en la matriz.")
-    matrix = []
-    ncols = None
-    for idx, ln in enumerate(lines):
-        parts = ln.replace(',', ' ').split()
-        try:
-            row = [float(p) for p in parts]
-        except ValueError:
-            raise ValueError(f"Valor no numérico en la fila {idx+1}: '{ln}'")
-        if ncols is None:
-            ncols = len(row)
-        elif len(row) != ncols:
-            raise ValueError(f"Inconsistencia en número de columnas (fila {idx+1}).")
-        matrix.append(row)
-    return np.array(matrix, dtype=float)
+    # parseo en bloque compartido con movimiento_tierras (compartido/rejillas_io.py)
+    return leer_texto_matriz(text)
 
 
 def swamee_jain_f(Re, e, D):
@@ -68,24 +77,336 @@ def colebrook_iterative(Re, e, D, init_f=0.02, niter=40):
     if Re < 2300:
         return 64.0 / Re
     f = init_f
-    for _ in range(niter):
+    it = 0
+    for it in range(1, niter + 1):
         # avoid domain error
         try:
             denom = (e/(3.7*D)) + (2.51/(Re*math.sqrt(f)))
             val = -2.0*math.log10(denom)
             f_new = 1.0/(val**2)
             if abs(f_new - f) < 1e-6:
+                contar('colebrook_iteraciones', it)
                 return f_new
             f = f_new
         except Exception:
             break
+    contar('colebrook_iteraciones', it)
+    contar('colebrook_no_convergidos')
+    return f
+
+
+# -----------------------------
+# FRICCIÓN: versiones vectorizadas (arreglos de tramos)
+# -----------------------------
+
+RE_LAMINAR = 2300.0
+
+
+def _friction_inputs(Re, e, D):
+    Re, e, D = np.broadcast_arrays(np.asarray(Re, dtype=float),
+                                   np.asarray(e, dtype=float),
+                                   np.asarray(D, dtype=float))
+    valid = Re > 0
+    laminar = valid & (Re < RE_LAMINAR)
+    turbulent = valid & ~laminar
+    f = np.full(Re.shape, np.nan)
+    f[laminar] = 64.0 / Re[laminar]
+    return Re, e, D, f, laminar, turbulent
+
+
+def swamee_jain_f_array(Re, e, D):
+    # Swamee-Jain sobre arreglos (broadcast de Re, e, D).
+    # Igual que swamee_jain_f, pero NaN donde la escalar devuelve None.
+    Re, e, D, f, laminar, turb = _friction_inputs(Re, e, D)
+    with np.errstate(all='ignore'):
+        f[turb] = 0.25 / (np.log10((e[turb]/(3.7*D[turb])) + (5.74/(Re[turb]**0.9)))**2)
+    f[~np.isfinite(f)] = np.nan
     return f
 
 
+def colebrook_array(Re, e, D, init_f=0.02, niter=40, tol=1e-6, method='fixed'):
+    """
+    Colebrook sobre arreglos (broadcast de Re, e, D). Devuelve (f, converged):
+      - f: factor de fricción (NaN donde colebrook_iterative devuelve None)
+      - converged: bool por elemento (laminar => True)
+    Flujo laminar (Re < 2300) enmascarado como 64/Re; el resto (transicional
+    y turbulento) se resuelve solo sobre los elementos aún activos.
+    method='fixed': misma iteración de punto fijo, valor inicial y criterio de
+        paro que colebrook_iterative, por lo que reproduce la versión escalar
+        (diferencias de redondeo < 1e-12).
+    method='newton': Newton sobre x = 1/sqrt(f) partiendo de Swamee-Jain;
+        converge a la raíz exacta en 2-3 iteraciones (|dx| < tol relativo).
+        Es más preciso que la escalar, que se detiene con |df| < 1e-6.
+    """
+    Re, e, D, f, laminar, turb = _friction_inputs(Re, e, D)
+    converged = laminar.copy()
+    idx = np.flatnonzero(turb)
+    if idx.size == 0:
+        return f, converged
+    Re_t, rel_t = Re.ravel()[idx], (e.ravel()[idx] / (3.7*D.ravel()[idx]))
+    f_flat, conv_flat = f.ravel(), converged.ravel()
+
+    with np.errstate(all='ignore'):
+        if method == 'newton':
+            k = 2.51 / Re_t
+            x = 1.0 / np.sqrt(swamee_jain_f_array(Re_t, e.ravel()[idx], D.ravel()[idx]))
+            act = np.isfinite(x)
+            done = np.zeros(idx.size, dtype=bool)
+            for _ in range(niter):
+                a = np.flatnonzero(act)
+                if a.size == 0:
+                    break
+                contar('colebrook_iteraciones', a.size)
+                arg = rel_t[a] + k[a]*x[a]
+                F = x[a] + 2.0*np.log10(arg)
+                dF = 1.0 + (2.0/math.log(10.0)) * k[a] / arg
+                x_new = x[a] - F/dF
+                bad = ~np.isfinite(x_new) | (x_new <= 0)
+                x_new = np.where(bad, x[a], x_new)
+                ok = np.abs(x_new - x[a]) <= tol*np.abs(x_new)
+                x[a] = x_new
+                done[a[ok & ~bad]] = True
+                act[a[ok | bad]] = False
+            f_t = np.where(np.isfinite(x) & (x > 0), 1.0/(x*x), np.nan)
+        else:
+            f_t = np.full(idx.size, float(init_f))
+            act = np.ones(idx.size, dtype=bool)
+            done = np.zeros(idx.size, dtype=bool)
+            for _ in range(niter):
+                a = np.flatnonzero(act)
+                if a.size == 0:
+                    break
+                contar('colebrook_iteraciones', a.size)
+                fa = f_t[a]
+                denom = rel_t[a] + (2.51/(Re_t[a]*np.sqrt(fa)))
+                val = -2.0*np.log10(denom)
+                f_new = 1.0/(val**2)
+                bad = ~np.isfinite(f_new)
+                f_new = np.where(bad, fa, f_new)  # como el 'break' de la escalar
+                ok = np.abs(f_new - fa) < tol
+                f_t[a] = f_new
+                done[a[ok & ~bad]] = True
+                act[a[ok | bad]] = False
+
+    f_flat[idx] = f_t
+    conv_flat[idx] = done
+    contar('colebrook_no_convergidos', int(idx.size - np.count_nonzero(done)))
+    return f_flat.reshape(Re.shape), conv_flat.reshape(Re.shape)
+
+
+# -----------------------------
+# CACHÉ DEL FACTOR DE FRICCIÓN (opcional)
+# -----------------------------
+
+class FrictionCache:
+    """
+    Caché LRU acotada de f(Re, e, D) para 'colebrook' y 'swamee'.
+    Re, e y D se cuantizan en escala logarítmica con media anchura rel_tol/3
+    y f se calcula en el punto representativo de la celda (del mismo lado
+    de Re = 2300 que la entrada), así que el f devuelto difiere del exacto a
+    lo más ~rel_tol relativo (la sensibilidad relativa de f a cada entrada es
+    <= 1). rel_tol=0 usa las entradas exactas como llave.
+    Se guarda (f, converged); contadores: hits, misses, evictions.
+    Se puede compartir entre hilos (la interfaz calcula en un hilo de trabajo
+    y optimiza diámetros en el principal): el diccionario y los contadores se
+    protegen con un candado; f se calcula fuera de él.
+    """
+
+    def __init__(self, maxsize=100_000, rel_tol=1e-6):
+        if maxsize <= 0:
+            raise ValueError("maxsize debe ser positivo.")
+        if rel_tol < 0:
+            raise ValueError("rel_tol no puede ser negativo.")
+        self.maxsize = int(maxsize)
+        self.rel_tol = float(rel_tol)
+        self._step = 2.0*math.log1p(rel_tol/3.0)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {'size': len(self._data), 'maxsize': self.maxsize, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions,
+                    'hit_rate': self.hits/total if total else 0.0}
+
+    def _store(self, key, value):
+        # llamar con el candado tomado
+        self._data[key] = value
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    # llave de e = 0 (tubo liso) en la escala cuantizada
+    _E_ZERO = -(1 << 40)
+
+    def _rep_re(self, Re_rep, laminar):
+        # el representativo no debe cruzar la frontera laminar/turbulento
+        return np.where(laminar, np.minimum(Re_rep, np.nextafter(RE_LAMINAR, 0.0)),
+                        np.maximum(Re_rep, RE_LAMINAR))
+
+    def get(self, method, Re, e, D):
+        # versión escalar (Re > 0), en Python puro: es la que usa compute_tramo
+        step = self._step
+        laminar = Re < RE_LAMINAR
+        if step:
+            k = (round(math.log(Re)/step), round(math.log(e)/step) if e > 0 else self._E_ZERO,
+                 round(math.log(D)/step))
+        else:
+            k = (Re, e, D)
+        key = (method, laminar) + k
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if hit is not None:
+            return hit[0] if hit[0] == hit[0] else None
+        if step:
+            Re = float(self._rep_re(math.exp(k[0]*step), laminar))
+            e = math.exp(k[1]*step) if k[1] != self._E_ZERO else 0.0
+            D = math.exp(k[2]*step)
+        f = swamee_jain_f(Re, e, D) if method == 'swamee' else colebrook_iterative(Re, e, D)
+        # None (sin solución) se guarda como NaN, igual que en lookup
+        with self._lock:
+            self._store(key, (math.nan if f is None else f, f is not None))
+        return f
+
+    def lookup(self, method, Re, e, D):
+        """
+        Versión sobre arreglos (Re > 0): agrupa las entradas por celda,
+        consulta la caché una vez por celda y calcula solo las faltantes con
+        colebrook_array/swamee_jain_f_array. Devuelve (f, converged).
+        """
+        Re, e, D = (np.asarray(x, dtype=float).ravel() for x in (Re, e, D))
+        laminar = Re < RE_LAMINAR
+        step = self._step
+        if step:
+            with np.errstate(divide='ignore'):
+                kRe = np.round(np.log(Re)/step).astype(np.int64)
+                ke = np.where(e > 0, np.round(np.log(np.where(e > 0, e, 1.0))/step), self._E_ZERO).astype(np.int64)
+                kD = np.round(np.log(D)/step).astype(np.int64)
+            cols = (laminar.astype(np.int64), kRe, ke, kD)
+        else:
+            cols = (laminar.astype(np.int64),) + tuple(x.view(np.int64) for x in (Re, e, D))
+        # llave de una sola columna (base mixta) si los rangos caben en 62 bits
+        lows = [c.min() for c in cols]
+        spans = [int(c.max()) - int(lo) + 1 for c, lo in zip(cols, lows)]
+        if math.prod(spans) < 2**62:
+            packed = np.zeros(Re.size, dtype=np.int64)
+            for c, lo, span in zip(cols, lows, spans):
+                packed = packed*span + (c - lo)
+            _, first, inverse = np.unique(packed, return_index=True, return_inverse=True)
+        else:
+            _, first, inverse = np.unique(np.stack(cols, axis=1), axis=0,
+                                          return_index=True, return_inverse=True)
+        n_u = first.size
+        f_u = np.empty(n_u)
+        conv_u = np.empty(n_u, dtype=bool)
+        keys = list(zip(*(c[first].tolist() for c in cols)))
+        missing = []
+        data = self._data
+        for i, key in enumerate(keys):
+            keys[i] = (method, bool(key[0])) + (key[1:] if step else
+                                                 (float(Re[first[i]]), float(e[first[i]]), float(D[first[i]])))
+        with self._lock:
+            for i, key in enumerate(keys):
+                hit = data.get(key)
+                if hit is None:
+                    missing.append(i)
+                else:
+                    data.move_to_end(key)
+                    f_u[i], conv_u[i] = hit
+            # cada entrada cuenta: las repeticiones dentro de la llamada son aciertos
+            self.misses += len(missing)
+            self.hits += Re.size - len(missing)
+        if missing:
+            idx = first[missing]
+            Re_m, e_m, D_m = Re[idx], e[idx], D[idx]
+            if step:
+                Re_m = self._rep_re(np.exp(kRe[idx]*step), laminar[idx])
+                e_m = np.where(e_m > 0, np.exp(ke[idx]*step), 0.0)
+                D_m = np.exp(kD[idx]*step)
+            if method == 'swamee':
+                f_m = swamee_jain_f_array(Re_m, e_m, D_m)
+                conv_m = np.isfinite(f_m)
+            else:
+                f_m, conv_m = colebrook_array(Re_m, e_m, D_m)
+            f_u[missing] = f_m
+            conv_u[missing] = conv_m
+            with self._lock:
+                for i, fv, cv in zip(missing, f_m.tolist(), conv_m.tolist()):
+                    self._store(keys[i], (fv, cv))
+        inverse = inverse.ravel()
+        return f_u[inverse], conv_u[inverse]
+
+
+_friction_cache = None
+
+
+def enable_friction_cache(maxsize=100_000, rel_tol=1e-6):
+    # activa la caché para compute_tramo, compute_tramos_array y las funciones
+    # que los usan (compute_tramos, escenarios, red_tuberias...); devuelve la caché
+    global _friction_cache
+    _friction_cache = FrictionCache(maxsize, rel_tol)
+    return _friction_cache
+
+
+def disable_friction_cache():
+    global _friction_cache
+    _friction_cache = None
+
+
+def friction_cache_stats():
+    # None si la caché está desactivada
+    return None if _friction_cache is None else _friction_cache.stats()
+
+
+def emit_instrumentation():
+    # registros finales: contadores acumulados y estadísticas de la caché
+    emitir_contadores('hidraulica')
+    if _friction_cache is not None:
+        emitir({'tipo': 'cache', 'sistema': 'hidraulica', **_friction_cache.stats()})
+
+
+def friction_factor(Re, e, D, method='colebrook'):
+    # f escalar (None si no se puede calcular), pasando por la caché si está activa
+    if _friction_cache is None or not Re > 0:
+        return swamee_jain_f(Re, e, D) if method == 'swamee' else colebrook_iterative(Re, e, D)
+    return _friction_cache.get(method, Re, e, D)
+
+
+def friction_factor_array(Re, e, D, method='colebrook'):
+    # (f, converged) sobre arreglos, pasando por la caché si está activa
+    if _friction_cache is None:
+        if method == 'swamee':
+            f = swamee_jain_f_array(Re, e, D)
+            return f, np.isfinite(f)
+        return colebrook_array(Re, e, D)
+    Re, e, D = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (Re, e, D)))
+    f = np.full(Re.shape, np.nan)
+    converged = np.zeros(Re.shape, dtype=bool)
+    valid = Re > 0
+    if valid.any():
+        f[valid], converged[valid] = _friction_cache.lookup(method, Re[valid], e[valid], D[valid])
+    return f, converged
+
+
 # -----------------------------
 # HIDRÁULICA: cálculos por tramo
 # -----------------------------
 
+# rugosidad absoluta e (m) por material
+rug_map = {'PVC':1.5e-6,'PEAD':7e-6,'Fierro galvanizado':1.5e-4,'Concreto':3e-4}
+
 def compute_tramo(L, D_m, Q_m3s, e, mu=1e-3, rho=1000.0, method='colebrook'):
     # retorna dict con resultados
     A = math.pi*(D_m**2)/4.0
@@ -93,10 +414,7 @@ def compute_tramo(L, D_m, Q_m3s, e, mu=1e-3, rho=1000.0, method='colebrook'):
         raise ValueError("Diámetro inválido")
     V = Q_m3s / A
     Re = rho*V*D_m / mu
-    if method == 'swamee':
-        f = swamee_jain_f(Re, e, D_m)
-    else:
-        f = colebrook_iterative(Re, e, D_m)
+    f = friction_factor(Re, e, D_m, method)
     if f is None or f <= 0:
         raise ValueError("No se pudo calcular el factor de fricción")
     g = 9.81
@@ -113,23 +431,178 @@ def compute_tramo(L, D_m, Q_m3s, e, mu=1e-3, rho=1000.0, method='colebrook'):
     }
 
 
+def compute_tramos_array(L, D_m, Q_m3s, e, mu=1e-3, rho=1000.0, method='colebrook'):
+    # versión vectorizada de compute_tramo: mismas claves, cada una un arreglo,
+    # más 'converged' (bool por tramo; con swamee es True donde f es válido)
+    L, D_m, Q_m3s, e = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (L, D_m, Q_m3s, e)))
+    A = math.pi*(D_m**2)/4.0
+    if np.any(A <= 0):
+        raise ValueError("Diámetro inválido")
+    V = Q_m3s / A
+    Re = rho*V*D_m / mu
+    f, converged = friction_factor_array(Re, e, D_m, method)
+    if np.any(~(f > 0)):
+        raise ValueError("No se pudo calcular el factor de fricción")
+    g = 9.81
+    hf = f*(L/D_m)*(V**2/(2*g))
+    return {
+        'L': L,
+        'D_m': D_m,
+        'Q_m3s': Q_m3s,
+        'A': A,
+        'V': V,
+        'Re': Re,
+        'f': f,
+        'hf': hf,
+        'converged': converged
+    }
+
+
+def compute_tramos(tramos, method='colebrook', mu=1e-3, rho=1000.0):
+    # tramos: secuencia de (L m, D mm, Q L/s, material) como en la tabla de la interfaz
+    # retorna (lista de dicts como los de compute_tramo, pérdida total);
+    # todos los tramos se resuelven juntos con compute_tramos_array
+    if len(tramos) == 0:
+        raise ValueError('No hay tramos definidos')
+    with etapa('hidraulica', 'compute_tramos', celdas=len(tramos), metodo=method):
+        L, Dmm, Qls, mats = zip(*tramos)
+        e = np.array([rug_map.get(m, 1.5e-6) for m in mats])
+        res = compute_tramos_array(np.array(L, dtype=float), np.array(Dmm, dtype=float)/1000.0,
+                                   np.array(Qls, dtype=float)/1000.0, e, mu=mu, rho=rho, method=method)
+        keys = ('L', 'D_m', 'Q_m3s', 'A', 'V', 'Re', 'f', 'hf')
+        tramos_results = [dict(zip(keys, vals)) for vals in zip(*(res[k].tolist() for k in keys))]
+        total_h = sum(r['hf'] for r in tramos_results)
+    return tramos_results, total_h
+
+
+def build_report(tramos_results, total_h, profile_z, max_tramos=None, grade=None):
+    # texto de resultados mostrado por la interfaz y por la línea de comandos;
+    # max_tramos limita cuántos tramos se listan (None = todos);
+    # grade: resultado de grade_line para incluir la revisión de presiones
+    delta_z = profile_z[-1] - profile_z[0] if len(profile_z)>1 else 0.0
+    report = f"Total pérdida por fricción (suma tramos) = {total_h:.3f} m\n"
+    report += f"Cambio neto de elevación entre inicio y fin = {delta_z:.3f} m\n"
+    if grade is not None:
+        report += "\nLínea piezométrica vs terreno:\n" + grade_summary(grade)
+    report += "\nTramos (hf m):\n"
+    shown = tramos_results if max_tramos is None else tramos_results[:max_tramos]
+    for i,r in enumerate(shown):
+        report += f"Tramo {i+1}: L={r['L']} m, D={r['D_m']:.3f} m, Q={r['Q_m3s']:.4f} m3/s, V={r['V']:.3f} m/s, hf={r['hf']:.4f} m\n"
+    if len(shown) < len(tramos_results):
+        report += f"... ({len(tramos_results) - len(shown)} tramos más)\n"
+    return report
+
+
+class ComputationCancelled(Exception):
+    pass
+
+
+def compute_tramos_chunked(tramos, method='colebrook', chunk_size=5000, progress=None, cancel=None):
+    # compute_tramos por bloques: llama progress(hechos, total) tras cada bloque y
+    # lanza ComputationCancelled si cancel (threading.Event) está activo
+    tramos_results = []
+    total = len(tramos)
+    for start in range(0, total, chunk_size):
+        if cancel is not None and cancel.is_set():
+            raise ComputationCancelled()
+        results, _ = compute_tramos(tramos[start:start+chunk_size], method=method)
+        tramos_results.extend(results)
+        if progress is not None:
+            progress(len(tramos_results), total)
+    if not tramos_results:
+        raise ValueError('No hay tramos definidos')
+    return tramos_results, sum(r['hf'] for r in tramos_results)
+
+
 # -----------------------------
 # EXPORT / IMPORT
 # -----------------------------
 
-def export_results_csv(path, profile_z, tramos_results, total_h, names=None):
+def read_tramos_csv(path):
+    # CSV con columnas L(m), D(mm), Q(L/s), Material; encabezado opcional
+    tramos = []
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        for idx, row in enumerate(csv.reader(f)):
+            row = [c.strip() for c in row]
+            if not row or all(c == '' for c in row):
+                continue
+            try:
+                L, Dmm, Qls = (float(c) for c in row[:3])
+            except ValueError:
+                if idx == 0:
+                    continue  # encabezado
+                raise ValueError(f"Tramo inválido en la línea {idx+1}: {row}")
+            mat = row[3] if len(row) > 3 and row[3] else 'PVC'
+            tramos.append((L, Dmm, Qls, mat))
+    if not tramos:
+        raise ValueError('No hay tramos definidos')
+    return tramos
+
+
+def read_profile_csv(path):
+    # CSV de perfil (como lo guarda la interfaz: estacion, elevacion) o una cota por línea;
+    # se toma la última columna y se omite el encabezado si existe
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        first = f.readline()
+    try:
+        float(first.replace(',', ' ').split()[-1])
+        skip = 0
+    except (ValueError, IndexError):
+        skip = 1
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        data = np.loadtxt(f, delimiter=',' if ',' in first else None, skiprows=skip, ndmin=2)
+    return data[:, -1]
+
+
+def export_results_csv(path, profile_z, tramos_results, total_h, names=None, grade=None):
+    # se escribe por bloques (compartido/exportacion.py): perfiles de millones de
+    # estaciones no se convierten en una sola cadena ni en una fila csv a la vez
     with open(path, 'w', newline='', encoding='utf-8') as f:
-        w = csv.writer(f)
-        w.writerow(['estacion_idx', 'elevacion(m)'])
-        for i, z in enumerate(profile_z):
-            w.writerow([i+1, f"{z:.4f}"])
-        w.writerow([])
-        w.writerow(['tramo', 'L(m)', 'D(m)', 'Q(m3/s)', 'V(m/s)', 'Re', 'f', 'hf(m)'])
-        for i, t in enumerate(tramos_results):
-            w.writerow([i+1, f"{t['L']:.4f}", f"{t['D_m']:.4f}", f"{t['Q_m3s']:.6f}",
-                        f"{t['V']:.4f}", f"{t['Re']:.0f}", f"{t['f']:.6f}", f"{t['hf']:.6f}"])
-        w.writerow([])
-        w.writerow(['total_head_loss(m)', f"{total_h:.6f}"])
+        n = len(profile_z)
+        if grade is None:
+            escribir_columnas_csv(f, ['estacion_idx', 'elevacion(m)'],
+                                  [np.arange(1, n+1), profile_z], ['%d', '%.4f'])
+        else:
+            escribir_columnas_csv(
+                f, ['estacion_idx', 'cadenamiento(m)', 'elevacion(m)', 'HGL(m)', 'EGL(m)',
+                    'presion(m)', 'recubrimiento(m)', 'presion_negativa', 'presion_baja',
+                    'recubrimiento_insuficiente'],
+                [np.arange(1, grade['chainage'].size+1)] +
+                [grade[k] for k in ('chainage', 'terrain', 'hgl', 'egl', 'pressure', 'cover')] +
+                [grade[k].astype(np.int8) for k in ('negative', 'low_pressure', 'cover_violation')],
+                ['%d', '%.3f', '%.4f', '%.4f', '%.4f', '%.4f', '%.4f', '%d', '%d', '%d'])
+        f.write('\n')
+        keys = ('L', 'D_m', 'Q_m3s', 'V', 'Re', 'f', 'hf')
+        cols = [np.array([t[k] for t in tramos_results], dtype=float) for k in keys]
+        escribir_columnas_csv(f, ['tramo', 'L(m)', 'D(m)', 'Q(m3/s)', 'V(m/s)', 'Re', 'f', 'hf(m)'],
+                              [np.arange(1, len(tramos_results)+1)] + cols,
+                              ['%d', '%.4f', '%.4f', '%.6f', '%.4f', '%.0f', '%.6f', '%.6f'])
+        f.write('\n')
+        f.write(f"total_head_loss(m),{total_h:.6f}\n")
+
+
+def export_results_npz(path, profile_z, tramos_results, total_h, grade=None):
+    # binario compacto (np.savez): arreglos del perfil, de los tramos y de la HGL
+    keys = ('L', 'D_m', 'Q_m3s', 'A', 'V', 'Re', 'f', 'hf')
+    arrays = {'profile_z': np.asarray(profile_z, dtype=float), 'total_h': np.float64(total_h)}
+    arrays.update({f"tramo_{k}": np.array([t[k] for t in tramos_results], dtype=float) for k in keys})
+    if grade is not None:
+        for k in ('chainage', 'terrain', 'pipe_z', 'hgl', 'egl', 'pressure', 'cover'):
+            arrays[f"grade_{k}"] = grade[k]
+        arrays['grade_tramo'] = grade['tramo'].astype(np.int32)
+        for k in ('negative', 'low_pressure', 'cover_violation'):
+            arrays[f"grade_{k}"] = grade[k].astype(bool)
+        for k in ('head_start', 'head_start_assumed', 'cover_checked'):
+            arrays[f"grade_{k}"] = np.asarray(grade[k])
+    np.savez(path, **arrays)
+
+
+def export_results(path, profile_z, tramos_results, total_h, grade=None):
+    # formato según la extensión: .npz binario, cualquier otra CSV
+    if str(path).lower().endswith('.npz'):
+        export_results_npz(path, profile_z, tramos_results, total_h, grade=grade)
+    else:
+        export_results_csv(path, profile_z, tramos_results, total_h, grade=grade)
 
 
 # -----------------------------
@@ -137,51 +610,117 @@ def export_results_csv(path, profile_z, tramos_results, total_h, names=None):
 # -----------------------------
 
 def run_gui():
+    import queue
+    import threading
+    import tkinter as tk
+    from tkinter import ttk, filedialog, messagebox
+    from matplotlib import cm
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+
     root = tk.Tk()
     root.title('Flujo hidráulico + Topografía')
-    root.geometry('1000x700')
+    root.geometry('1400x760')
 
     # frames
     left = tk.Frame(root)
     left.pack(side='left', fill='both', expand=True, padx=8, pady=8)
     right = tk.Frame(root)
     right.pack(side='right', fill='y', padx=8, pady=8)
+    plot_frame = tk.Frame(root)
+    plot_frame.pack(side='left', fill='both', expand=True, padx=4, pady=8)
+
+    # gráficas embebidas: una sola figura que se redibuja en cada cálculo
+    fig = Figure(figsize=(5, 6), tight_layout=True)
+    ax1, ax2 = fig.subplots(2, 1)
+    canvas = FigureCanvasTkAgg(fig, master=plot_frame)
+    NavigationToolbar2Tk(canvas, plot_frame).update()
+    canvas.get_tk_widget().pack(fill='both', expand=True)
+    artists = {'im': None, 'cbar': None, 'line': None, 'hgl': None, 'egl': None, 'flags': None,
+               'pyramid': None, 'updating': False, 'pending': False}
 
     # LEFT: Topografía input
     tk.Label(left, text='Matriz de elevaciones (filas → líneas, separador espacio o coma)', font=('Segoe UI', 10, 'bold')).pack(anchor='w')
     txt_matrix = tk.Text(left, width=60, height=12)
     txt_matrix.pack()
 
+    # matriz parseada y cacheada; el texto es la fuente solo si no se cargó un archivo
+    topo = TopographyModel()
+    # cota del eje de la tubería por estación (Archivo > Cargar perfil de tubería)
+    pipe_profile = {'z': None, 'name': ''}
+    preview = {'page': 0}
+    page_frame = tk.Frame(left)
+    page_frame.pack(fill='x')
+    lbl_page = tk.Label(page_frame, text='')
+
+    def show_text(text):
+        # modo texto: el cuadro es editable y manda
+        txt_matrix.config(state='normal')
+        txt_matrix.delete('1.0', tk.END)
+        txt_matrix.insert(tk.END, text)
+        lbl_page.config(text='')
+
+    def show_preview():
+        # modo archivo: el cuadro es una vista previa paginada de solo lectura
+        rows, cols_ = topo.shape
+        page = preview['page']
+        txt_matrix.config(state='normal')
+        txt_matrix.delete('1.0', tk.END)
+        txt_matrix.insert(tk.END, topo.preview(page))
+        txt_matrix.config(state='disabled')
+        lbl_page.config(text=f"{topo.name}: {rows}x{cols_} | página {page+1}/{topo.page_count()}")
+
+    def change_page(step):
+        if topo.source != 'file':
+            return
+        preview['page'] = min(max(preview['page'] + step, 0), topo.page_count() - 1)
+        show_preview()
+
+    tk.Button(page_frame, text='<', command=lambda: change_page(-1)).pack(side='left')
+    tk.Button(page_frame, text='>', command=lambda: change_page(1)).pack(side='left')
+    lbl_page.pack(side='left', padx=4)
+
+    def current_matrix():
+        # arreglo actual; el texto se vuelve a parsear solo si su contenido cambió
+        if topo.source != 'file':
+            topo.update_from_text(txt_matrix.get('1.0', tk.END))
+        return topo.require()
+
     # example buttons
     ex_frame = tk.Frame(left)
     ex_frame.pack(fill='x', pady=4)
     def load_example_flat():
         example = '\n'.join(['12.00 12.00 12.00 12.00']*4)
-        txt_matrix.delete('1.0', tk.END)
-        txt_matrix.insert(tk.END, example)
+        topo.reset()
+        show_text(example)
     def load_example_slope():
         example = '\n'.join(['10.0 11.0 12.0 13.0']*4)
-        txt_matrix.delete('1.0', tk.END)
-        txt_matrix.insert(tk.END, example)
+        topo.reset()
+        show_text(example)
     tk.Button(ex_frame, text='Ejemplo plano', command=load_example_flat).pack(side='left', padx=4)
     tk.Button(ex_frame, text='Ejemplo pendiente', command=load_example_slope).pack(side='left', padx=4)
 
     # profile extraction
     prof_frame = tk.Frame(left)
     prof_frame.pack(fill='x', pady=6)
-    tk.Label(prof_frame, text='Extraer perfil de (fila o columna, 0-index):').pack(side='left')
+    tk.Label(prof_frame, text='Extraer perfil de (índice o vértices f,c; f,c, 0-index):').pack(side='left')
     spin_rc = tk.StringVar(value='fila')
-    ttk.Combobox(prof_frame, values=['fila', 'columna'], textvariable=spin_rc, width=8).pack(side='left', padx=4)
-    ent_index = tk.Entry(prof_frame, width=4)
+    ttk.Combobox(prof_frame, values=['fila', 'columna', 'polilínea'], textvariable=spin_rc, width=9).pack(side='left', padx=4)
+    ent_index = tk.Entry(prof_frame, width=16)
     ent_index.pack(side='left')
     def extract_profile():
         try:
-            mat = parse_matrix_text(txt_matrix.get('1.0', tk.END))
-            idx = int(ent_index.get()) if ent_index.get().strip()!='' else 0
-            if spin_rc.get() == 'fila':
+            mat = current_matrix()
+            if spin_rc.get() == 'polilínea':
+                # estaciones cada celda con interpolación bilineal
+                _, prof = sample_polyline(mat, parse_polyline(ent_index.get()), interval=1.0)
+                prof = prof.tolist()
+            elif spin_rc.get() == 'fila':
+                idx = int(ent_index.get()) if ent_index.get().strip()!='' else 0
                 if idx <0 or idx>=mat.shape[0]: raise IndexError('Índice fila fuera de rango')
                 prof = mat[idx,:].tolist()
             else:
+                idx = int(ent_index.get()) if ent_index.get().strip()!='' else 0
                 if idx <0 or idx>=mat.shape[1]: raise IndexError('Índice columna fuera de rango')
                 prof = mat[:,idx].tolist()
             # show profile in listbox
@@ -260,9 +799,176 @@ def run_gui():
     tk.Label(opt_frame, text='Método f:').grid(row=0,column=0)
     method_var = tk.StringVar(value='colebrook')
     ttk.Combobox(opt_frame, values=['colebrook','swamee'], textvariable=method_var, width=10).grid(row=0,column=1)
+    # revisión de la línea piezométrica (carga vacía = cota de la primera estación)
+    tk.Label(opt_frame, text='Carga inicio (m):').grid(row=1,column=0)
+    eH0 = tk.Entry(opt_frame, width=8); eH0.grid(row=1,column=1)
+    tk.Label(opt_frame, text='Presión mín (m):').grid(row=2,column=0)
+    ePmin = tk.Entry(opt_frame, width=8); ePmin.insert(0, f"{MIN_PRESSURE:g}"); ePmin.grid(row=2,column=1)
+    tk.Label(opt_frame, text='Recubr. mín (m):').grid(row=3,column=0)
+    eCov = tk.Entry(opt_frame, width=8); eCov.insert(0, f"{MIN_COVER:g}"); eCov.grid(row=3,column=1)
+    # caché de f opcional (como --cache-friccion): los recálculos repiten las
+    # mismas combinaciones (Re, e, D), pero f sale cuantizado (~1e-6 relativo)
+    cache_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(opt_frame, text='Caché de f', variable=cache_var).grid(row=4,column=0,columnspan=2,sticky='w')
+
+    def apply_cache_setting():
+        # se aplica al iniciar un cálculo, en el hilo principal
+        if not cache_var.get():
+            disable_friction_cache()
+        elif friction_cache_stats() is None:
+            enable_friction_cache()
+
+    # compute & visualize (cálculo en un hilo de trabajo; la interfaz sigue respondiendo)
+    def refresh_heatmap():
+        # redibuja solo la ventana visible, desde el nivel de la pirámide que
+        # corresponde a la resolución en pantalla (se llama también al hacer zoom)
+        pyramid = artists.get('pyramid')
+        if pyramid is None or artists['updating']:
+            return
+        rows, cols_ = pyramid[0]['mean'].shape
+        x0, x1 = sorted(ax1.get_xlim())
+        y0, y1 = sorted(ax1.get_ylim())
+        r0, r1 = max(y0 + 0.5, 0), min(y1 + 0.5, rows)
+        c0, c1 = max(x0 + 0.5, 0), min(x1 + 0.5, cols_)
+        if r1 <= r0 or c1 <= c0:
+            return
+        bbox = ax1.get_window_extent()
+        level = select_level(pyramid, r1 - r0, c1 - c0, bbox.height, bbox.width)
+        data, extent = level_window(pyramid, level, r0, r1, c0, c1)
+        artists['updating'] = True
+        try:
+            artists['im'].set_data(data)
+            artists['im'].set_extent(extent)
+            ax1.set_xlim(x0, x1)
+            ax1.set_ylim(y1, y0)
+        finally:
+            artists['updating'] = False
+        canvas.draw_idle()
+
+    def schedule_refresh(ax):
+        # zoom/desplazamiento del usuario: un solo redibujo por ciclo de eventos
+        if artists['updating'] or artists['pending']:
+            return
+        artists['pending'] = True
+        def run():
+            artists['pending'] = False
+            refresh_heatmap()
+        root.after_idle(run)
+
+    def draw_heatmap(pyramid):
+        if pyramid is None:
+            artists['pyramid'] = None
+            if artists['im'] is not None:
+                artists['im'].set_visible(False)
+            ax1.set_title('No hay matriz válida')
+            return
+        artists['pyramid'] = pyramid
+        rows, cols_ = pyramid[0]['mean'].shape
+        coarse = pyramid[-1]
+        if artists['im'] is None:
+            artists['im'] = ax1.imshow(coarse['mean'], cmap=cm.terrain, interpolation='nearest')
+            artists['cbar'] = fig.colorbar(artists['im'], ax=ax1, label='m')
+            ax1.callbacks.connect('xlim_changed', schedule_refresh)
+            ax1.callbacks.connect('ylim_changed', schedule_refresh)
+        artists['im'].set_visible(True)
+        # escala de color fija para toda la rejilla (mín/máx del nivel más grueso)
+        artists['im'].set_clim(np.nanmin(coarse['min']), np.nanmax(coarse['max']))
+        artists['updating'] = True
+        try:
+            ax1.set_xlim(-0.5, cols_-0.5)
+            ax1.set_ylim(rows-0.5, -0.5)
+        finally:
+            artists['updating'] = False
+        ax1.set_title('Mapa de elevaciones')
+        refresh_heatmap()
+
+    def draw_profile(profile_z, grade):
+        # terreno, HGL, EGL y estaciones marcadas contra el cadenamiento
+        stations = grade['chainage']
+        flagged = grade['low_pressure'] | grade['cover_violation']
+        if artists['line'] is None:
+            artists['line'], = ax2.plot(stations, profile_z, color='saddlebrown', label='Terreno')
+            artists['hgl'], = ax2.plot(stations, grade['hgl'], color='tab:blue', label='HGL')
+            artists['egl'], = ax2.plot(stations, grade['egl'], color='tab:green', ls='--', label='EGL')
+            artists['flags'], = ax2.plot(stations[flagged], profile_z[flagged], 'rx', ls='none',
+                                         label='Presión/recubrimiento')
+            ax2.set_xlabel('Cadenamiento (m)')
+            ax2.set_ylabel('Elevación (m)')
+            ax2.set_title('Perfil longitudinal')
+            ax2.legend(loc='best', fontsize='small')
+        else:
+            artists['line'].set_data(stations, profile_z)
+            artists['hgl'].set_data(stations, grade['hgl'])
+            artists['egl'].set_data(stations, grade['egl'])
+            artists['flags'].set_data(stations[flagged], profile_z[flagged])
+            ax2.relim()
+            ax2.autoscale_view()
+
+    job = {'thread': None, 'cancel': None, 'queue': queue.Queue()}
+
+    def worker(get_pyramid, tramos, method, grade_opts, profile_z, cancel, out):
+        try:
+            out.put(('progress', 0, len(tramos)))
+            tramos_results, total_h = compute_tramos_chunked(
+                tramos, method=method, cancel=cancel,
+                progress=lambda done, total: out.put(('progress', done, total)))
+            grade = grade_line(profile_z, tramos_results, **grade_opts)
+            # pirámide de la instantánea de la matriz tomada en el hilo principal
+            pyramid = get_pyramid() if get_pyramid is not None else None
+            out.put(('done', pyramid, tramos_results, total_h, grade))
+        except ComputationCancelled:
+            out.put(('cancelled',))
+        except Exception as e:
+            out.put(('error', str(e)))
+
+    def finish_job():
+        job['thread'] = None
+        btn_compute.config(state='normal')
+        btn_cancel.config(state='disabled')
+
+    def poll_job(profile_z, digest):
+        try:
+            while True:
+                msg = job['queue'].get_nowait()
+                if msg[0] == 'progress':
+                    progress['maximum'] = max(msg[2], 1)
+                    progress['value'] = msg[1]
+                    lbl_status.config(text=f'Tramos calculados: {msg[1]}/{msg[2]}')
+                    continue
+                finish_job()
+                if msg[0] == 'cancelled':
+                    lbl_status.config(text='Cálculo cancelado')
+                elif msg[0] == 'error':
+                    lbl_status.config(text='Error')
+                    messagebox.showerror('Error', msg[1])
+                else:
+                    # se guarda en caché solo si la matriz no cambió durante el cálculo
+                    if msg[1] is not None:
+                        topo.store_derived('pyramid', digest, msg[1])
+                    show_results(msg[1], msg[2], msg[3], profile_z, msg[4])
+                return
+        except queue.Empty:
+            pass
+        root.after(50, poll_job, profile_z, digest)
+
+    def show_results(pyramid, tramos_results, total_h, profile_z, grade):
+        lbl_status.config(text='Cálculo terminado')
+        draw_heatmap(pyramid)
+        draw_profile(profile_z, grade)
+        canvas.draw_idle()
+        messagebox.showinfo('Resultados', build_report(tramos_results, total_h, profile_z,
+                                                        max_tramos=50, grade=grade))
+        # offer export
+        if messagebox.askyesno('Exportar', '¿Desea exportar resultados CSV?'):
+            p = filedialog.asksaveasfilename(defaultextension='.csv', filetypes=[('CSV files','*.csv'),
+                                                                                 ('NumPy (binario)','*.npz')])
+            if p:
+                export_results(p, profile_z, tramos_results, total_h, grade=grade)
+                messagebox.showinfo('Exportado', f'Archivo exportado: {p}')
 
-    # compute & visualize
     def compute_all():
+        if job['thread'] is not None:
+            return
         try:
             # read profile
             if list_profile.size() == 0:
@@ -278,59 +984,85 @@ def run_gui():
             items = tree.get_children()
             if not items:
                 raise ValueError('No hay tramos definidos')
-            tramos = []
-            rug_map = {'PVC':1.5e-6,'PEAD':7e-6,'Fierro galvanizado':1.5e-4,'Concreto':3e-4}
-            tramos_results = []
-            total_h = 0.0
-            for it in items:
-                L = float(tree.item(it,'values')[0])
-                Dmm = float(tree.item(it,'values')[1])
-                Qls = float(tree.item(it,'values')[2])
-                mat = tree.item(it,'values')[3]
-                Dm = Dmm/1000.0
-                Qm3s = Qls/1000.0
-                e = rug_map.get(mat, 1.5e-6)
-                res = compute_tramo(L, Dm, Qm3s, e, method=method_var.get())
-                tramos_results.append(res)
-                total_h += res['hf']
-            # account elevation differences along profile as additional head change (optional)
-            # For reporting, compute net elevation change
-            delta_z = profile_z[-1] - profile_z[0] if len(profile_z)>1 else 0.0
-            # show results
-            report = f"Total pérdida por fricción (suma tramos) = {total_h:.3f} m\n"
-            report += f"Cambio neto de elevación entre inicio y fin = {delta_z:.3f} m\n"
-            report += "\nTramos (hf m):\n"
-            for i,r in enumerate(tramos_results):
-                report += f"Tramo {i+1}: L={r['L']} m, D={r['D_m']:.3f} m, Q={r['Q_m3s']:.4f} m3/s, V={r['V']:.3f} m/s, hf={r['hf']:.4f} m\n"
-            messagebox.showinfo('Resultados', report)
-            # plots
-            fig1, ax1 = plt.subplots()
-            # heatmap if matrix exists
-            try:
-                mat = parse_matrix_text(txt_matrix.get('1.0', tk.END))
-                im = ax1.imshow(mat, cmap=cm.terrain)
-                ax1.set_title('Mapa de elevaciones')
-                plt.colorbar(im, ax=ax1, label='m')
-            except Exception:
-                ax1.text(0.5,0.5,'No hay matriz válida',ha='center')
-            # profile plot
-            fig2, ax2 = plt.subplots()
-            stations = list(range(1, len(profile_z)+1))
-            ax2.plot(stations, profile_z, marker='o')
-            ax2.set_xlabel('Estación')
-            ax2.set_ylabel('Elevación (m)')
-            ax2.set_title('Perfil longitudinal')
-            plt.show()
-            # offer export
-            if messagebox.askyesno('Exportar', '¿Desea exportar resultados CSV?'):
-                p = filedialog.asksaveasfilename(defaultextension='.csv', filetypes=[('CSV files','*.csv')])
-                if p:
-                    export_results_csv(p, profile_z, tramos_results, total_h)
-                    messagebox.showinfo('Exportado', f'Archivo exportado: {p}')
+            tramos = [tree.item(it,'values') for it in items]
+            profile_z = np.array(profile_z)
+            pipe_z = pipe_profile['z']
+            if pipe_z is not None and pipe_z.size != profile_z.size:
+                raise ValueError(f"El perfil de tubería ({pipe_profile['name']}) tiene {pipe_z.size} "
+                                 f"cotas y el perfil {profile_z.size} estaciones")
+            grade_opts = {'head_start': float(eH0.get()) if eH0.get().strip() else None,
+                          'pipe_z': pipe_z,
+                          'min_pressure': float(ePmin.get()),
+                          'min_cover': float(eCov.get())}
         except Exception as e:
             messagebox.showerror('Error', str(e))
+            return
+        # el hilo de trabajo no toca 'topo': recibe el arreglo actual (que no se
+        # modifica en sitio; cargar o editar la matriz crea otro) y, si ya existe,
+        # la pirámide en caché
+        try:
+            current_matrix()
+            mat, digest, cached = topo.snapshot('pyramid')
+            get_pyramid = (lambda: cached) if cached is not None else (lambda: build_pyramid(mat))
+        except Exception:
+            digest, get_pyramid = None, None
+        apply_cache_setting()
+        job['cancel'] = threading.Event()
+        job['thread'] = threading.Thread(
+            target=worker, daemon=True,
+            args=(get_pyramid, tramos, method_var.get(), grade_opts, profile_z, job['cancel'], job['queue']))
+        btn_compute.config(state='disabled')
+        btn_cancel.config(state='normal')
+        lbl_status.config(text='Calculando...')
+        job['thread'].start()
+        root.after(50, poll_job, profile_z, digest)
 
-    tk.Button(right, text='Calcular y visualizar', command=compute_all, bg='orange').pack(pady=8)
+    def cancel_compute():
+        if job['cancel'] is not None:
+            job['cancel'].set()
+
+    btn_compute = tk.Button(right, text='Calcular y visualizar', command=compute_all, bg='orange')
+    btn_compute.pack(pady=8)
+    progress = ttk.Progressbar(right, length=220, mode='determinate')
+    progress.pack()
+    lbl_status = tk.Label(right, text='')
+    lbl_status.pack()
+    btn_cancel = tk.Button(right, text='Cancelar', command=cancel_compute, state='disabled')
+    btn_cancel.pack(pady=4)
+
+    def optimize_tramos():
+        # reemplaza los D(mm) de la tabla por la asignación de costo mínimo
+        from optimizacion_diametros import optimize_diameters, read_catalog_csv
+        items = tree.get_children()
+        if not items:
+            messagebox.showerror('Error', 'No hay tramos definidos')
+            return
+        p = filedialog.askopenfilename(title='Catálogo: Material, D(mm), costo($/m)',
+                                       filetypes=[('CSV files','*.csv')])
+        if not p:
+            return
+        val = simple_input('Optimizar diámetros', 'Pérdida total máxima (m); vacío = solo presión mínima')
+        if val is None:
+            return
+        if job['thread'] is None:
+            apply_cache_setting()
+        try:
+            tramos = [tree.item(it,'values') for it in items]
+            profile_z = [float(list_profile.get(i).split(':')[1]) for i in range(list_profile.size())]
+            sol = optimize_diameters(
+                tramos, read_catalog_csv(p),
+                max_head_loss=float(val) if val.strip() else None,
+                profile_z=profile_z or None,
+                head_start=float(eH0.get()) if eH0.get().strip() else None,
+                min_pressure=float(ePmin.get()) if profile_z else None)
+        except Exception as e:
+            messagebox.showerror('Error', str(e))
+            return
+        for it, (L, _, Qls, mat), Dmm in zip(items, tramos, sol['D_mm']):
+            tree.item(it, values=(L, f"{Dmm:.1f}", Qls, mat))
+        messagebox.showinfo('Optimizar diámetros',
+                            f"Costo total = {sol['cost']:.2f}\nPérdida total = {sol['total_h']:.3f} m")
+    tk.Button(right, text='Optimizar diámetros', command=optimize_tramos).pack(pady=4)
 
     def simple_input(title, prompt):
         win = tk.Toplevel(root)
@@ -350,27 +1082,44 @@ def run_gui():
     menubar = tk.Menu(root)
     file_menu = tk.Menu(menubar, tearoff=0)
     def load_csv_matrix():
-        p = filedialog.askopenfilename(filetypes=[('CSV files','*.csv')])
+        p = filedialog.askopenfilename(filetypes=[('Rejillas','*.csv *.txt *.asc *.xyz *.npy'),
+                                                  ('CSV files','*.csv'), ('ESRI ASCII','*.asc'),
+                                                  ('XYZ','*.xyz'), ('NumPy','*.npy')])
         if not p: return
-        with open(p,'r',encoding='utf-8-sig') as f:
-            txt = f.read()
-        txt_matrix.delete('1.0', tk.END)
-        txt_matrix.insert(tk.END, txt)
+        try:
+            topo.load_file(p)
+        except Exception as e:
+            messagebox.showerror('Error', str(e))
+            return
+        preview['page'] = 0
+        show_preview()
     def save_profile():
         if list_profile.size()==0:
             messagebox.showwarning('Atención','No hay perfil para guardar')
             return
         p = filedialog.asksaveasfilename(defaultextension='.csv', filetypes=[('CSV files','*.csv')])
         if p:
-            with open(p,'w',newline='',encoding='utf-8') as f:
-                w = csv.writer(f)
-                w.writerow(['estacion','elevacion(m)'])
-                for i in range(list_profile.size()):
-                    parts = list_profile.get(i).split(':')
-                    z = float(parts[1].strip())
-                    w.writerow([i+1,f"{z:.4f}"])
+            z = np.array([float(item.split(':')[1]) for item in list_profile.get(0, tk.END)])
+            escribir_columnas_csv(p, ['estacion','elevacion(m)'], [np.arange(1, z.size+1), z], ['%d', '%.4f'])
             messagebox.showinfo('Guardado', f'Perfil guardado en {p}')
-    file_menu.add_command(label='Cargar matriz (CSV)', command=load_csv_matrix)
+    def load_pipe_profile():
+        p = filedialog.askopenfilename(title='Cota del eje de la tubería por estación',
+                                       filetypes=[('CSV files','*.csv'), ('Texto','*.txt')])
+        if not p: return
+        try:
+            pipe_profile['z'] = read_profile_csv(p)
+        except Exception as e:
+            messagebox.showerror('Error', str(e))
+            return
+        pipe_profile['name'] = os.path.basename(p)
+        messagebox.showinfo('Perfil de tubería', f"{pipe_profile['z'].size} cotas cargadas; "
+                                                 'se revisará el recubrimiento')
+    def clear_pipe_profile():
+        pipe_profile['z'] = None
+        pipe_profile['name'] = ''
+    file_menu.add_command(label='Cargar matriz (CSV/ASC/XYZ/NPY)', command=load_csv_matrix)
+    file_menu.add_command(label='Cargar perfil de tubería (CSV)', command=load_pipe_profile)
+    file_menu.add_command(label='Quitar perfil de tubería', command=clear_pipe_profile)
     file_menu.add_command(label='Guardar perfil (CSV)', command=save_profile)
     menubar.add_cascade(label='Archivo', menu=file_menu)
     root.config(menu=menubar)
@@ -378,5 +1127,133 @@ def run_gui():
     root.mainloop()
 
 
+def main(argv=None):
+    # sin argumentos abre la interfaz; con --tramos corre en lote
+    import argparse
+    parser = argparse.ArgumentParser(description='Pérdidas por fricción en tramos de tubería.')
+    parser.add_argument('--tramos', help='CSV de tramos: L(m), D(mm), Q(L/s), Material')
+    parser.add_argument('--perfil', help='CSV de perfil longitudinal (elevaciones)')
+    parser.add_argument('--perfil-tubo', metavar='CSV',
+                        help='CSV con la cota del eje de la tubería en cada estación de --perfil; '
+                             'sin él no se revisa el recubrimiento')
+    parser.add_argument('--metodo', choices=['colebrook', 'swamee'], default='colebrook')
+    parser.add_argument('--salida', help='CSV de resultados o .npz binario (por defecto se imprime el reporte)')
+    parser.add_argument('--carga', type=float,
+                        help='carga piezométrica al inicio (m); por defecto la cota de la primera estación')
+    parser.add_argument('--pmin', type=float, default=MIN_PRESSURE, help='presión mínima (m)')
+    parser.add_argument('--recubrimiento', type=float, default=MIN_COVER, help='recubrimiento mínimo (m)')
+    parser.add_argument('--escenarios', type=int,
+                        help='número de escenarios Monte Carlo (caudal, envejecimiento y tolerancia de D)')
+    parser.add_argument('--procesos', type=int, help='procesos para los escenarios (por defecto todos los núcleos)')
+    parser.add_argument('--catalogo', help='CSV de diámetros comerciales (Material, D(mm), costo($/m)): '
+                                           'reemplaza D por la asignación de costo mínimo')
+    parser.add_argument('--hf-max', type=float, help='pérdida total máxima (m) para --catalogo')
+    parser.add_argument('--cierre', type=float, metavar='SEG',
+                        help='simular el golpe de ariete por cierre lineal de la válvula final en SEG s '
+                             '(0 = instantáneo); carga inicial = --carga o la primera cota del perfil')
+    parser.add_argument('--celeridad', type=float, default=1000.0, help='celeridad de la onda (m/s)')
+    parser.add_argument('--duracion', type=float, help='tiempo simulado (s); por defecto cierre + 4 L/a')
+    parser.add_argument('--dt', type=float,
+                        help='paso de tiempo del transitorio (s); por defecto el tramo más corto '
+                             'se divide en golpe_ariete.MIN_REACHES tramos de cálculo')
+    parser.add_argument('--carga-descarga', type=float,
+                        help='carga a la salida de la válvula (m); por defecto la última cota del '
+                             'perfil, o 0 sin perfil')
+    parser.add_argument('--cache-friccion', action='store_true',
+                        help='usar la caché del factor de fricción y mostrar sus estadísticas')
+    parser.add_argument('--instrumentar', nargs='?', const='', metavar='JSONL',
+                        help='medir etapas y contadores (resumen en stderr; opcionalmente registros JSON '
+                             'por línea en el archivo); también con MODELADO_INSTRUMENTAR')
+    args = parser.parse_args(argv)
+    if args.tramos is None:
+        if args.perfil or args.perfil_tubo or args.salida:
+            parser.error('--perfil, --perfil-tubo y --salida requieren --tramos')
+        run_gui()
+        return 0
+    if args.perfil_tubo and not args.perfil:
+        parser.error('--perfil-tubo requiere --perfil')
+    if args.hf_max is not None:
+        if not args.catalogo:
+            parser.error('--hf-max requiere --catalogo')
+        if not args.hf_max > 0:
+            parser.error('--hf-max debe ser positivo')
+    if args.catalogo and args.hf_max is None and not args.perfil:
+        parser.error('--catalogo requiere --hf-max o --perfil (presión mínima --pmin)')
+    if args.cierre is not None:
+        if args.carga is None and not args.perfil:
+            parser.error('--cierre requiere --carga o --perfil')
+        if args.cierre < 0:
+            parser.error('--cierre no puede ser negativo')
+        for name in ('celeridad', 'duracion', 'dt'):
+            value = getattr(args, name)
+            if value is not None and not value > 0:
+                parser.error(f'--{name} debe ser positivo')
+    if args.cache_friccion:
+        enable_friction_cache()
+    if args.instrumentar is not None:
+        activar(args.instrumentar or None)
+    with etapa('hidraulica', 'lectura_csv'):
+        tramos = read_tramos_csv(args.tramos)
+        profile_z = read_profile_csv(args.perfil) if args.perfil else np.zeros(0)
+        pipe_z = read_profile_csv(args.perfil_tubo) if args.perfil_tubo else None
+    if pipe_z is not None and pipe_z.shape != profile_z.shape:
+        parser.error(f'--perfil-tubo tiene {pipe_z.size} cotas y --perfil {profile_z.size} estaciones')
+    if args.catalogo:
+        from optimizacion_diametros import optimize_diameters, read_catalog_csv
+        # con perfil también se exige la presión mínima en cada estación
+        try:
+            sol = optimize_diameters(tramos, read_catalog_csv(args.catalogo), max_head_loss=args.hf_max,
+                                     profile_z=profile_z if len(profile_z) else None,
+                                     head_start=args.carga, pipe_z=pipe_z,
+                                     min_pressure=args.pmin if len(profile_z) else None,
+                                     method=args.metodo)
+        except ValueError as e:
+            parser.exit(1, f'{parser.prog}: error: --catalogo: {e}\n')
+        tramos = [(L, Dmm, Qls, mat) for (L, _, Qls, mat), Dmm in zip(tramos, sol['D_mm'])]
+        print(f"Diámetros optimizados: costo total = {sol['cost']:.2f}")
+    tramos_results, total_h = compute_tramos(tramos, method=args.metodo)
+    grade = None
+    if len(profile_z):
+        grade = grade_line(profile_z, tramos_results, head_start=args.carga, pipe_z=pipe_z,
+                           min_pressure=args.pmin, min_cover=args.recubrimiento)
+    with etapa('hidraulica', 'exportar_csv' if args.salida else 'reporte'):
+        if args.salida:
+            export_results(args.salida, profile_z, tramos_results, total_h, grade=grade)
+            print(f'Archivo exportado: {args.salida}')
+        else:
+            print(build_report(tramos_results, total_h, profile_z, grade=grade), end='')
+    if args.escenarios:
+        from escenarios import monte_carlo, scenario_report
+        summary = monte_carlo(tramos, n=args.escenarios, method=args.metodo, processes=args.procesos)
+        print('\nMonte Carlo de la pérdida total:')
+        print(scenario_report(summary), end='')
+    if args.cierre is not None:
+        from golpe_ariete import simulate_transient, transient_summary, valve_closure
+        head = args.carga if args.carga is not None else profile_z[0]
+        head_end = args.carga_descarga
+        if head_end is None:
+            head_end = profile_z[-1] if len(profile_z) else 0.0
+        length = sum(t[0] for t in tramos)
+        duration = args.duracion or args.cierre + 4.0*length/args.celeridad
+        try:
+            res = simulate_transient(tramos, args.celeridad, duration, head, head_end=head_end,
+                                     dt=args.dt, method=args.metodo, closure=valve_closure(args.cierre))
+        except ValueError as e:
+            parser.exit(1, f'{parser.prog}: error: golpe de ariete: {e}\n')
+        print()
+        print(transient_summary(res), end='')
+    if args.cache_friccion:
+        st = friction_cache_stats()
+        print(f"\nCaché de fricción: {st['hits']} aciertos, {st['misses']} fallos, "
+              f"{st['evictions']} desalojos (tasa de aciertos {st['hit_rate']:.1%})")
+    if args.instrumentar is not None:
+        emit_instrumentation()
+        print(resumen(), file=sys.stderr)
+    return 0
+
+
 if __name__ == '__main__':
-    run_gui()
+    # se ejecuta el módulo importado (no __main__) para que escenarios y
+    # optimizacion_diametros compartan su estado, p. ej. la caché de fricción
+    import flujo_tuberias
+    sys.exit(flujo_tuberias.main())
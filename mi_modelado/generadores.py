@@ -0,0 +1,80 @@
+"""
+generadores.py
+
+Datos sintéticos para pruebas de rendimiento de la parte hidráulica:
+- Listas aleatorias de tramos (L m, D mm, Q L/s, material), como las de la
+  tabla de la interfaz o read_tramos_csv
+- Redes malladas en rejilla (nodos, tuberías y reservorios) con el formato
+  de red_tuberias.solve_network
+- Perfiles longitudinales (caminata aleatoria suavizada)
+"""
+
+import numpy as np
+
+from flujo_tuberias import rug_map
+
+# diámetros comerciales (mm) usados por los generadores
+DIAMETERS_MM = (50, 63, 75, 90, 110, 160, 200, 250, 315, 400)
+
+
+def random_tramos(n, seed=None, length=(50.0, 500.0), velocity=(0.3, 2.5), materials=None):
+    # n tramos con diámetro comercial y caudal para una velocidad en el rango dado
+    if n <= 0:
+        raise ValueError('n debe ser positivo.')
+    rng = np.random.default_rng(seed)
+    materials = list(rug_map) if materials is None else list(materials)
+    L = rng.uniform(*length, n)
+    Dmm = rng.choice(DIAMETERS_MM, n).astype(float)
+    V = rng.uniform(*velocity, n)
+    Qls = V*np.pi*(Dmm/1000.0)**2/4.0*1000.0
+    mats = rng.choice(materials, n)
+    return list(zip(L.tolist(), Dmm.tolist(), Qls.tolist(), mats.tolist()))
+
+
+def random_network(rows, cols, seed=None, head=60.0, total_demand=0.15, length=(100.0, 300.0)):
+    """
+    Malla de rows x cols uniones conectadas a sus vecinas (derecha y abajo),
+    alimentada por un reservorio en la esquina (0, 0) con carga 'head' (m).
+    La demanda total (m3/s) se reparte al azar entre las uniones (cada una
+    entre 0.5 y 1.5 veces el promedio) y los diámetros se escogen de mayor a
+    menor según la distancia al reservorio.
+    Devuelve (nodes, pipes, reservoirs) para solve_network.
+    """
+    if rows <= 0 or cols <= 0:
+        raise ValueError('rows y cols deben ser positivos.')
+    rng = np.random.default_rng(seed)
+    name = lambda r, c: f"N{r}_{c}"
+    nodes = {name(r, c): float(q) for (r, c), q in
+             zip(np.ndindex(rows, cols), rng.uniform(0.5, 1.5, rows*cols)*total_demand/(rows*cols))}
+    reservoirs = {'R': float(head)}
+    sizes = np.array(DIAMETERS_MM[4:], dtype=float)/1000.0
+    far = max(rows + cols - 2, 1)
+    pipes = [{'from': 'R', 'to': name(0, 0), 'L': 50.0, 'D_m': float(sizes[-1]), 'material': 'PEAD'}]
+    for r in range(rows):
+        for c in range(cols):
+            # más cerca del reservorio => diámetro mayor
+            D = float(sizes[int((1 - (r + c)/far)*(len(sizes) - 1))])
+            for r2, c2 in ((r, c + 1), (r + 1, c)):
+                if r2 < rows and c2 < cols:
+                    pipes.append({'from': name(r, c), 'to': name(r2, c2),
+                                  'L': float(rng.uniform(*length)), 'D_m': D, 'material': 'PVC'})
+    return nodes, pipes, reservoirs
+
+
+def random_profile(n, seed=None, start=100.0, slope=-0.002, step=1.0, roughness=0.05):
+    # n cotas a cada 'step' m: pendiente media más caminata aleatoria suavizada
+    rng = np.random.default_rng(seed)
+    walk = np.cumsum(rng.normal(0.0, roughness, n))
+    kernel = np.ones(min(25, n))/min(25, n)
+    walk = np.convolve(walk, kernel, mode='same')
+    return start + slope*step*np.arange(n) + walk
+
+
+if __name__ == '__main__':
+    from red_tuberias import solve_network
+
+    print(random_tramos(3, seed=0))
+    nodes, pipes, reservoirs = random_network(10, 10, seed=0)
+    sol = solve_network(nodes, pipes, reservoirs)
+    print(len(pipes), 'tuberías;', 'iteraciones:', sol['iterations'], 'convergió:', sol['converged'])
+    print(random_profile(5, seed=0))
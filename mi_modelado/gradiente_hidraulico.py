@@ -0,0 +1,163 @@
+"""
+gradiente_hidraulico.py
+
+Línea piezométrica (HGL) y línea de energía (EGL) contra el terreno a lo
+largo del perfil longitudinal:
+- Los tramos se colocan uno tras otro desde el cadenamiento 0 (su longitud L
+  define dónde empieza y termina cada uno)
+- Cada estación se asigna a su tramo con searchsorted y la pérdida acumulada
+  se interpola dentro del tramo (hf uniforme por metro): todo con sumas
+  acumuladas de NumPy, sin ciclos por estación
+- Presión en cada estación = HGL - cota del eje de la tubería
+- Marca estaciones con presión negativa, presión menor que la mínima y
+  recubrimiento menor que el mínimo (este último solo si se da la cota de
+  la tubería; si no, se supone el recubrimiento de diseño y no se revisa)
+
+Unidades: m (cargas y presiones en m de columna de agua).
+"""
+
+import numpy as np
+
+import ruta_compartido
+ruta_compartido.agregar()
+from instrumentacion import etapa
+
+g = 9.81
+# valores por defecto de diseño (m)
+MIN_PRESSURE = 10.0
+MIN_COVER = 0.8
+DESIGN_COVER = 1.0
+
+
+def _tramo_arrays(tramos_results):
+    # acepta la lista de dicts de compute_tramos o el dict de arreglos de
+    # compute_tramos_array; devuelve (L, D, V, hf) como arreglos
+    if isinstance(tramos_results, dict):
+        get = lambda k: np.asarray(tramos_results[k], dtype=float)
+    else:
+        get = lambda k: np.array([r[k] for r in tramos_results], dtype=float)
+    L, D, V, hf = get('L'), get('D_m'), get('V'), get('hf')
+    if L.size == 0:
+        raise ValueError('No hay tramos definidos')
+    if np.any(L <= 0):
+        raise ValueError('Las longitudes de los tramos deben ser positivas.')
+    return L, D, V, hf
+
+
+def grade_line(profile_z, tramos_results, head_start=None, chainage=None, pipe_z=None,
+               design_cover=DESIGN_COVER, min_pressure=MIN_PRESSURE, min_cover=MIN_COVER):
+    """
+    Evalúa HGL/EGL en todas las estaciones del perfil.
+      - profile_z: cota del terreno en cada estación
+      - tramos_results: resultados de compute_tramos / compute_tramos_array
+      - head_start: carga piezométrica al inicio (m); por defecto la cota del
+        terreno en la primera estación (tanque a nivel del suelo), que el
+        resumen señala como supuesta
+      - chainage: cadenamiento de cada estación (m); por defecto las
+        estaciones se reparten uniformemente sobre la longitud total
+      - pipe_z: cota del eje de la tubería en cada estación; por defecto
+        terreno - design_cover - D/2 (tubería tendida con el recubrimiento de
+        diseño). Sin pipe_z el recubrimiento no se revisa: 'cover' queda en
+        NaN y 'cover_violation' sin marcas
+    Las estaciones fuera de [0, longitud total] quedan en NaN y sin marcas.
+    Devuelve dict de arreglos por estación ('chainage', 'terrain', 'pipe_z',
+    'tramo', 'hgl', 'egl', 'pressure', 'cover', 'negative', 'low_pressure',
+    'cover_violation') más 'head_start', 'head_start_assumed',
+    'cover_checked' y 'length'.
+    """
+    z = np.asarray(profile_z, dtype=float)
+    if z.ndim != 1 or z.size == 0:
+        raise ValueError('No hay perfil definido')
+    if pipe_z is not None and np.ndim(pipe_z) and np.shape(pipe_z) != z.shape:
+        raise ValueError('El perfil de la tubería debe tener una cota por estación.')
+    with etapa('hidraulica', 'grade_line', celdas=z.size):
+        return _grade_line(z, tramos_results, head_start, chainage, pipe_z,
+                           design_cover, min_pressure, min_cover)
+
+
+def _grade_line(z, tramos_results, head_start, chainage, pipe_z, design_cover, min_pressure, min_cover):
+    L, D, V, hf = _tramo_arrays(tramos_results)
+
+    cum_L = np.concatenate([[0.0], np.cumsum(L)])
+    cum_hf = np.concatenate([[0.0], np.cumsum(hf)])
+    total = cum_L[-1]
+    if chainage is None:
+        s = np.linspace(0.0, total, z.size)
+    else:
+        s = np.asarray(chainage, dtype=float)
+        if s.shape != z.shape:
+            raise ValueError('El cadenamiento debe tener una entrada por estación.')
+    H0 = z[0] if head_start is None else float(head_start)
+
+    on_pipe = (s >= 0.0) & (s <= total)
+    k = np.clip(np.searchsorted(cum_L, s, side='right') - 1, 0, L.size - 1)
+    loss = cum_hf[k] + (s - cum_L[k])*(hf[k]/L[k])
+    hgl = np.where(on_pipe, H0 - loss, np.nan)
+    egl = hgl + V[k]**2/(2*g)
+
+    if pipe_z is None:
+        pz = z - design_cover - D[k]/2.0
+        cover = np.full(z.shape, np.nan)
+    else:
+        pz = np.broadcast_to(np.asarray(pipe_z, dtype=float), z.shape)
+        cover = z - (pz + D[k]/2.0)
+    pressure = hgl - pz
+    with np.errstate(invalid='ignore'):
+        negative = on_pipe & (pressure < 0.0)
+        low = on_pipe & (pressure < min_pressure)
+        cover_bad = on_pipe & (cover < min_cover)
+    return {
+        'chainage': s,
+        'terrain': z,
+        'pipe_z': pz,
+        'tramo': np.where(on_pipe, k, -1),
+        'hgl': hgl,
+        'egl': egl,
+        'pressure': pressure,
+        'cover': cover,
+        'negative': negative,
+        'low_pressure': low,
+        'cover_violation': cover_bad,
+        'head_start': H0,
+        'head_start_assumed': head_start is None,
+        'cover_checked': pipe_z is not None,
+        'length': total,
+    }
+
+
+def grade_summary(grade, max_listed=10):
+    # texto con el resumen de la revisión de presiones y recubrimiento
+    p = grade['pressure']
+    lines = [f"Carga piezométrica inicial = {grade['head_start']:.3f} m"]
+    if grade.get('head_start_assumed'):
+        lines[0] += " (supuesta: cota del terreno en la primera estación; indique la carga real)"
+    if np.all(np.isnan(p)):
+        lines.append("Ninguna estación cae sobre la tubería.")
+        return '\n'.join(lines) + '\n'
+    i = int(np.nanargmin(p))
+    lines.append(f"Presión mínima = {p[i]:.3f} m en el cadenamiento {grade['chainage'][i]:.2f} m")
+    checks = [('negative', 'presión negativa'), ('low_pressure', 'presión bajo la mínima')]
+    if grade.get('cover_checked', True):
+        checks.append(('cover_violation', 'recubrimiento bajo el mínimo'))
+    for key, label in checks:
+        idx = np.flatnonzero(grade[key])
+        lines.append(f"Estaciones con {label}: {idx.size}")
+        if idx.size:
+            shown = ', '.join(f"{c:.2f}" for c in grade['chainage'][idx[:max_listed]])
+            more = ' ...' if idx.size > max_listed else ''
+            lines.append(f"  cadenamientos (m): {shown}{more}")
+    if not grade.get('cover_checked', True):
+        lines.append("Recubrimiento no revisado (sin perfil de la tubería)")
+    return '\n'.join(lines) + '\n'
+
+
+if __name__ == '__main__':
+    from flujo_tuberias import compute_tramos
+
+    tramos = [(400, 150, 20, 'PVC'), (600, 100, 10, 'PVC'), (500, 100, 10, 'PEAD')]
+    res, total_h = compute_tramos(tramos)
+    # terreno con una loma a mitad del trazo
+    s = np.linspace(0, 1500, 301)
+    terrain = 100 - 0.01*s + 12*np.exp(-((s - 800)/150)**2)
+    grade = grade_line(terrain, res, head_start=112.0, chainage=s)
+    print(grade_summary(grade), end='')
@@ -0,0 +1,209 @@
+"""
+optimizacion_diametros.py
+
+Selección de diámetros comerciales de costo mínimo para una cadena de tramos
+en serie:
+- Catálogo por material: lista de (D mm, costo por metro)
+- Tabla hf[tramo, diámetro] precalculada en una sola llamada vectorizada a
+  compute_tramos_array (Q y material fijos por tramo)
+- Programación dinámica sobre la pérdida acumulada discretizada (mochila de
+  elección múltiple): para cada tramo y cada nivel de pérdida consumida se
+  guarda el costo mínimo; las pérdidas se redondean hacia arriba, así que
+  la solución siempre cumple la restricción real
+- Restricciones: pérdida total máxima y/o presión mínima en las estaciones
+  del perfil (con la misma geometría que gradiente_hidraulico.grade_line)
+"""
+
+import csv
+
+import numpy as np
+
+from flujo_tuberias import compute_tramos_array, rug_map
+from gradiente_hidraulico import DESIGN_COVER
+
+# niveles de discretización de la pérdida acumulada
+RESOLUTION = 4000
+
+
+def read_catalog_csv(path):
+    # CSV Material, D(mm), costo($/m); encabezado opcional -> {material: [(D, costo), ...]}
+    catalog = {}
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        for idx, row in enumerate(csv.reader(f)):
+            row = [c.strip() for c in row]
+            if not row or all(c == '' for c in row):
+                continue
+            try:
+                Dmm, cost = float(row[1]), float(row[2])
+            except (ValueError, IndexError):
+                if idx == 0:
+                    continue  # encabezado
+                raise ValueError(f"Diámetro inválido en la línea {idx+1}: {row}")
+            catalog.setdefault(row[0], []).append((Dmm, cost))
+    if not catalog:
+        raise ValueError('El catálogo de diámetros está vacío.')
+    return catalog
+
+
+def hf_table(tramos, catalog, method='colebrook', mu=1e-3, rho=1000.0):
+    """
+    Tablas (n_tramos x k) de diámetros (mm), costo del tramo y hf (m) para
+    cada diámetro del catálogo del material del tramo. Las celdas sin
+    diámetro (catálogos más cortos) quedan con costo infinito.
+    """
+    if len(tramos) == 0:
+        raise ValueError('No hay tramos definidos')
+    L, _, Qls, mats = (np.array(x) for x in zip(*tramos))
+    L = L.astype(float)
+    missing = sorted(set(mats) - set(catalog))
+    if missing:
+        raise ValueError(f"No hay diámetros en el catálogo para: {', '.join(missing)}")
+    k = max(len(catalog[m]) for m in set(mats))
+    Dmm = np.full((len(tramos), k), np.nan)
+    unit = np.full((len(tramos), k), np.inf)
+    for m in set(mats):
+        rows = np.flatnonzero(mats == m)
+        sizes = np.array(sorted(catalog[m]), dtype=float)
+        Dmm[rows, :len(sizes)] = sizes[:, 0]
+        unit[rows, :len(sizes)] = sizes[:, 1]
+    valid = np.isfinite(unit)
+    D = np.where(valid, Dmm, 1.0)/1000.0
+    e = np.array([rug_map.get(m, 1.5e-6) for m in mats])[:, None]
+    res = compute_tramos_array(L[:, None], D, Qls.astype(float)[:, None]/1000.0, e,
+                               mu=mu, rho=rho, method=method)
+    hf = np.where(valid, res['hf'], np.inf)
+    return Dmm, unit*L[:, None], hf
+
+
+def _pressure_caps(profile_z, L, Dmm, hf, head_start, chainage, pipe_z, min_pressure):
+    # cap[i, j]: máxima pérdida acumulada antes del tramo i con la que el
+    # diámetro j aún da presión >= mínima en todas las estaciones del tramo
+    z = np.asarray(profile_z, dtype=float)
+    cum_L = np.concatenate([[0.0], np.cumsum(L)])
+    s = np.linspace(0.0, cum_L[-1], z.size) if chainage is None else np.asarray(chainage, dtype=float)
+    n, k = hf.shape
+    caps = np.full((n, k), np.inf)
+    on_pipe = (s >= 0.0) & (s <= cum_L[-1])
+    s, z = s[on_pipe], z[on_pipe]
+    pz_given = None if pipe_z is None else np.broadcast_to(np.asarray(pipe_z, dtype=float),
+                                                           on_pipe.shape)[on_pipe]
+    tramo = np.clip(np.searchsorted(cum_L, s, side='right') - 1, 0, n - 1)
+    frac = (s - cum_L[tramo])/L[tramo]
+    for i in np.unique(tramo):
+        sel = tramo == i
+        Dm = np.where(np.isfinite(hf[i]), Dmm[i], 0.0)/1000.0
+        # cota del eje por estación y diámetro (recubrimiento de diseño por defecto)
+        if pz_given is None:
+            pz = z[sel][:, None] - DESIGN_COVER - Dm[None, :]/2.0
+        else:
+            pz = pz_given[sel][:, None]
+        allow = head_start - pz - min_pressure
+        caps[i] = np.min(allow - frac[sel][:, None]*hf[i][None, :], axis=0)
+    return caps
+
+
+def optimize_diameters(tramos, catalog, max_head_loss=None, profile_z=None, head_start=None,
+                       min_pressure=None, chainage=None, pipe_z=None, method='colebrook',
+                       resolution=RESOLUTION):
+    """
+    Asignación de diámetros de costo mínimo para 'tramos' ((L m, D mm, Q L/s,
+    material); el D actual se ignora) con diámetros de 'catalog'
+    ({material: [(D mm, costo por m), ...]}).
+    Restricciones (al menos una):
+      - max_head_loss: pérdida total por fricción máxima (m)
+      - min_pressure (con profile_z): presión mínima (m) en cada estación del
+        perfil; head_start, chainage y pipe_z como en grade_line
+    La pérdida acumulada se discretiza en 'resolution' niveles redondeando
+    hacia arriba: el resultado siempre es factible y su costo es óptimo salvo
+    por esa discretización.
+    Devuelve dict con 'D_mm' (lista por tramo), 'cost', 'hf' (lista),
+    'total_h'. Lanza ValueError si ninguna combinación cumple.
+    """
+    if max_head_loss is None and min_pressure is None:
+        raise ValueError('Indique la pérdida máxima o la presión mínima.')
+    Dmm, cost, hf = hf_table(tramos, catalog, method=method)
+    n, k = hf.shape
+    L = np.array([t[0] for t in tramos], dtype=float)
+
+    caps = np.full((n, k), np.inf)
+    if min_pressure is not None:
+        if profile_z is None or len(profile_z) == 0:
+            raise ValueError('La restricción de presión requiere el perfil del terreno.')
+        H0 = profile_z[0] if head_start is None else head_start
+        caps = _pressure_caps(profile_z, L, Dmm, hf, H0, chainage, pipe_z, min_pressure)
+    limit = np.inf if max_head_loss is None else float(max_head_loss)
+    # mayor pérdida acumulada alcanzable: hasta el último tramo con estaciones
+    # la acota su cap; de ahí en adelante (tramos sin estaciones, cap
+    # infinito) se suma la mayor pérdida de cada tramo
+    hf_max = np.where(np.isfinite(hf), hf, 0.0).max(axis=1)
+    capped = np.flatnonzero(np.isfinite(caps).any(axis=1))
+    if capped.size:
+        i = capped[-1]
+        reach = np.max(caps[i][np.isfinite(caps[i])]) + hf_max[i:].sum()
+    else:
+        reach = hf_max.sum()
+    top = min(limit, reach)
+    if not top > 0:
+        raise ValueError('No existe combinación de diámetros que cumpla las restricciones.')
+
+    step = top/resolution
+    with np.errstate(invalid='ignore'):
+        w = np.where(np.isfinite(hf), np.ceil(hf/step - 1e-9), resolution + 1).astype(np.int64)
+        cap_units = np.where(np.isfinite(caps), np.floor(caps/step + 1e-9), resolution)
+    cap_units = np.minimum(cap_units, resolution).astype(np.int64)
+
+    # best[b]: costo mínimo con b unidades de pérdida consumidas
+    B = resolution + 1
+    best = np.full(B, np.inf)
+    best[0] = 0.0
+    choice = np.full((n, B), -1, dtype=np.int16)
+    for i in range(n):
+        new = np.full(B, np.inf)
+        for j in range(k):
+            wj = w[i, j]
+            if wj >= B or not np.isfinite(cost[i, j]) or cap_units[i, j] < 0:
+                continue
+            # estados previos permitidos: b <= cap y b + wj <= resolution
+            last = min(cap_units[i, j], B - 1 - wj)
+            cand = best[:last + 1] + cost[i, j]
+            tgt = new[wj:wj + last + 1]
+            better = cand < tgt
+            tgt[better] = cand[better]
+            choice[i, wj:wj + last + 1][better] = j
+        best = new
+    if not np.isfinite(best).any():
+        raise ValueError('No existe combinación de diámetros que cumpla las restricciones.')
+
+    b = int(np.argmin(best))
+    total_cost = float(best[b])
+    picks = np.empty(n, dtype=np.intp)
+    for i in range(n - 1, -1, -1):
+        j = int(choice[i, b])
+        picks[i] = j
+        b -= w[i, j]
+    rows = np.arange(n)
+    hf_sel = hf[rows, picks]
+    return {
+        'D_mm': Dmm[rows, picks].tolist(),
+        'cost': total_cost,
+        'hf': hf_sel.tolist(),
+        'total_h': float(hf_sel.sum()),
+    }
+
+
+if __name__ == '__main__':
+    import time
+
+    sizes = [50, 63, 75, 90, 110, 125, 160, 200, 250, 315, 355, 400, 450, 500, 560, 630, 710, 800, 900, 1000]
+    catalog = {
+        'PVC': [(d, 0.004*d**1.5) for d in sizes],
+        'PEAD': [(d, 0.005*d**1.5) for d in sizes],
+    }
+    rng = np.random.default_rng(0)
+    tramos = [(float(rng.uniform(100, 600)), 0.0, float(rng.uniform(5, 60)),
+               'PVC' if rng.random() < 0.7 else 'PEAD') for _ in range(300)]
+    t = time.perf_counter()
+    sol = optimize_diameters(tramos, catalog, max_head_loss=80.0)
+    print(f"Costo = {sol['cost']:.2f}, pérdida total = {sol['total_h']:.3f} m "
+          f"({time.perf_counter() - t:.3f} s)")
+    print('Diámetros (mm):', sol['D_mm'][:10], '...')
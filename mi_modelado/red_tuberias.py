@@ -0,0 +1,185 @@
+"""
+red_tuberias.py
+
+Solución de redes de tuberías malladas (método del gradiente global,
+Todini-Pilati): resuelve simultáneamente continuidad en los nodos y energía
+en las tuberías con Newton sobre matrices dispersas.
+- Pérdidas por Darcy–Weisbach con el factor de fricción de flujo_tuberias
+  (Colebrook o Swamee–Jain, versión vectorizada de compute_tramo)
+- Rugosidad por material tomada de rug_map
+- En la zona de transición (2000 < Re < 4000) f se interpola linealmente
+  entre 64/2000 y Colebrook en Re = 4000: el salto de compute_tramo en
+  Re = 2300 haría oscilar a Newton en redes con tuberías de poco caudal
+- Nodos con demanda (m3/s) y reservorios de carga fija (m)
+
+Unidades SI: L y D en m, Q en m3/s, cargas en m.
+
+Requiere SciPy (scipy.sparse; ver requirements.txt). Los demás módulos lo
+importan solo al resolver una red: flujo_tuberias (tramos en serie y la
+interfaz) no depende de SciPy.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import spsolve
+
+from flujo_tuberias import compute_tramos_array, colebrook_array, rug_map
+from instrumentacion import etapa, contar
+
+# caudal mínimo para evitar derivadas nulas en tuberías sin flujo
+Q_MIN = 1e-9
+# zona de transición laminar-turbulenta con f interpolado
+RE_TRANSITION = (2000.0, 4000.0)
+
+
+def _pipe_hydraulics(L, D, Qabs, e, mu, rho, method):
+    # compute_tramos_array con f continuo en la zona de transición
+    res = compute_tramos_array(L, D, Qabs, e, mu=mu, rho=rho, method=method)
+    re_lo, re_hi = RE_TRANSITION
+    Re = res['Re']
+    band = (Re > re_lo) & (Re < re_hi)
+    if np.any(band):
+        f_lo = 64.0/re_lo
+        f_hi = colebrook_array(re_hi, e[band], D[band], method='newton')[0]
+        f = res['f'].copy()
+        f[band] = f_lo + (f_hi - f_lo)*(Re[band] - re_lo)/(re_hi - re_lo)
+        res['f'] = f
+        res['hf'] = f*(L/D)*(res['V']**2/(2*9.81))
+    return res
+
+
+def _pipe_arrays(pipes, index):
+    n = len(pipes)
+    frm = np.empty(n, dtype=np.intp)
+    to = np.empty(n, dtype=np.intp)
+    L = np.empty(n)
+    D = np.empty(n)
+    e = np.empty(n)
+    for k, p in enumerate(pipes):
+        try:
+            frm[k] = index[p['from']]
+            to[k] = index[p['to']]
+        except KeyError as exc:
+            raise ValueError(f"Tubería {k+1}: nodo desconocido {exc}")
+        L[k] = p['L']
+        D[k] = p['D_m']
+        e[k] = p['e'] if 'e' in p else rug_map.get(p.get('material', 'PVC'), 1.5e-6)
+    if np.any(L <= 0) or np.any(D <= 0):
+        raise ValueError("Longitudes y diámetros deben ser positivos.")
+    return frm, to, L, D, e
+
+
+def _check_connectivity(frm, to, n_nodes, is_fixed):
+    # cada componente conexa debe tener al menos un reservorio
+    adj = sp.coo_matrix((np.ones(frm.size), (frm, to)), shape=(n_nodes, n_nodes))
+    ncomp, labels = connected_components(adj, directed=False)
+    with_fixed = np.zeros(ncomp, dtype=bool)
+    with_fixed[labels[is_fixed]] = True
+    if not with_fixed.all():
+        raise ValueError("Hay nodos sin conexión a un reservorio de carga fija.")
+
+
+def solve_network(nodes, pipes, reservoirs, mu=1e-3, rho=1000.0, method='colebrook',
+                  tol=1e-6, max_iter=100, Q0=None):
+    """
+    Resuelve caudales y cargas de una red mallada.
+      - nodes: {nombre: demanda_m3s} de los nodos de unión (demanda > 0 sale)
+      - pipes: lista de dicts {'from', 'to', 'L', 'D_m', 'material' o 'e'}
+      - reservoirs: {nombre: carga_m} de los nodos de carga fija
+      - Q0: caudales iniciales opcionales (m3/s); por defecto V = 1 m/s
+    Converge cuando sum|dQ| / sum|Q| < tol.
+    Devuelve dict con 'Q', 'V', 'Re', 'f', 'hf' (arreglos por tubería, en el
+    orden de 'pipes'; Q > 0 en el sentido from -> to), 'H' ({nodo: carga}),
+    'iterations' y 'converged'.
+    """
+    junctions = list(nodes)
+    fixed = list(reservoirs)
+    if not fixed:
+        raise ValueError("Se requiere al menos un reservorio de carga fija.")
+    if set(junctions) & set(fixed):
+        raise ValueError("Un nodo no puede ser a la vez unión y reservorio.")
+    names = junctions + fixed
+    index = {name: i for i, name in enumerate(names)}
+    nj = len(junctions)
+
+    frm, to, L, D, e = _pipe_arrays(pipes, index)
+    is_fixed = np.arange(len(names)) >= nj
+    _check_connectivity(frm, to, len(names), is_fixed)
+
+    # incidencia: h_k = H_from - H_to  =>  A[k, from] = -1, A[k, to] = +1
+    npipes = len(pipes)
+    rows = np.concatenate([np.arange(npipes), np.arange(npipes)])
+    cols = np.concatenate([frm, to])
+    vals = np.concatenate([-np.ones(npipes), np.ones(npipes)])
+    A = sp.csr_matrix((vals, (rows, cols)), shape=(npipes, len(names)))
+    A12 = A[:, :nj].tocsc()
+    A10 = A[:, nj:]
+    A21 = A12.T.tocsr()
+    q = np.array([nodes[n] for n in junctions], dtype=float)
+    H0 = np.array([reservoirs[n] for n in fixed], dtype=float)
+    A10H0 = A10 @ H0
+
+    area = np.pi*D**2/4.0
+    Q = np.asarray(Q0, dtype=float).copy() if Q0 is not None else area*1.0
+    H = np.full(nj, H0.mean())
+
+    converged = False
+    it = 0
+    # tiempo total y número de iteraciones de Newton (si la instrumentación está activa)
+    with etapa('hidraulica', 'solve_network', celdas=npipes, nodos=nj) as reg:
+        for it in range(1, max_iter + 1):
+            Qabs = np.maximum(np.abs(Q), Q_MIN)
+            hf = _pipe_hydraulics(L, D, Qabs, e, mu, rho, method)['hf']
+            # energía: h(Q) - (H_from - H_to) con h(Q) = hf * signo(Q)
+            F1 = hf*np.sign(Q) + A12 @ H + A10H0
+            F2 = A21 @ Q - q
+            # dh/dQ con f constante (exponente 2)
+            Dinv = Qabs / (2.0*hf)
+            M = (A21 @ sp.diags(Dinv) @ A12).tocsc()
+            dH = spsolve(M, F2 - A21 @ (Dinv*F1)) if nj else np.zeros(0)
+            dH = np.atleast_1d(dH)
+            dQ = -Dinv*(F1 + A12 @ dH)
+            Q = Q + dQ
+            H = H + dH
+            if np.abs(dQ).sum() <= tol*max(np.abs(Q).sum(), Q_MIN):
+                converged = True
+                break
+        reg['iteraciones'] = it
+        reg['convergio'] = converged
+    contar('red_iteraciones_newton', it)
+
+    res = _pipe_hydraulics(L, D, np.maximum(np.abs(Q), Q_MIN), e, mu, rho, method)
+    heads = dict(zip(junctions, H.tolist()))
+    heads.update(zip(fixed, H0.tolist()))
+    return {
+        'Q': Q,
+        'V': Q/area,
+        'Re': res['Re'],
+        'f': res['f'],
+        'hf': res['hf']*np.sign(Q),
+        'H': heads,
+        'iterations': it,
+        'converged': converged
+    }
+
+
+if __name__ == '__main__':
+    # malla de dos circuitos alimentada por un reservorio
+    nodes = {'A': 0.0, 'B': 0.010, 'C': 0.015, 'D': 0.010, 'E': 0.005}
+    reservoirs = {'R': 50.0}
+    pipes = [
+        {'from': 'R', 'to': 'A', 'L': 500, 'D_m': 0.25, 'material': 'PVC'},
+        {'from': 'A', 'to': 'B', 'L': 300, 'D_m': 0.15, 'material': 'PVC'},
+        {'from': 'A', 'to': 'C', 'L': 400, 'D_m': 0.20, 'material': 'PEAD'},
+        {'from': 'B', 'to': 'D', 'L': 300, 'D_m': 0.10, 'material': 'PVC'},
+        {'from': 'C', 'to': 'D', 'L': 350, 'D_m': 0.15, 'material': 'Concreto'},
+        {'from': 'C', 'to': 'E', 'L': 250, 'D_m': 0.10, 'material': 'PVC'},
+        {'from': 'D', 'to': 'E', 'L': 200, 'D_m': 0.10, 'material': 'PVC'},
+    ]
+    sol = solve_network(nodes, pipes, reservoirs)
+    print('Iteraciones:', sol['iterations'], 'convergió:', sol['converged'])
+    for p, Qk, hk in zip(pipes, sol['Q'], sol['hf']):
+        print(f"{p['from']}->{p['to']}: Q={Qk*1000:.3f} L/s, hf={hk:.4f} m")
+    for n, h in sol['H'].items():
+        print(f"H[{n}] = {h:.3f} m")
@@ -0,0 +1,289 @@
+"""
+topografia.py
+
+Modelo de la matriz de elevaciones usada por flujo_tuberias:
+- Guarda la rejilla como arreglo NumPy junto con un hash de su contenido
+- El texto de la interfaz solo se vuelve a parsear cuando su hash cambia
+- Los archivos (CSV/ASC/XYZ/NPY) se leen directo al arreglo con rejillas_io;
+  el cuadro de texto pasa a ser una vista previa paginada
+- Los productos derivados (p. ej. pirámides de visualización) se guardan en
+  caché por hash y se descartan al cambiar la matriz
+- Pirámide de niveles de detalle (media/mín/máx por bloques) para dibujar
+  mapas de calor de rejillas grandes a la resolución de pantalla
+- Perfiles a lo largo de polilíneas arbitrarias con interpolación bilineal
+  vectorizada
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+import ruta_compartido
+ruta_compartido.agregar()
+from rejillas_io import leer_rejilla, leer_texto_matriz
+
+PREVIEW_ROWS = 50
+PREVIEW_COLS = 40
+# la pirámide se reduce hasta que el nivel más grueso quepa en este tamaño
+PYRAMID_MIN_SIZE = 256
+
+
+def _digest_bytes(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def array_digest(arr):
+    # hash del contenido (forma + dtype + bytes) de un arreglo
+    arr = np.ascontiguousarray(arr)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((arr.shape, arr.dtype.str)).encode())
+    h.update(arr.view(np.uint8).reshape(-1))
+    return h.hexdigest()
+
+
+class TopographyModel:
+    """
+    Matriz de elevaciones parseada una sola vez por cambio.
+      - source: 'text' (el cuadro de texto manda) o 'file' (el arreglo manda)
+      - digest: hash del texto o del arreglo cargado
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.array = None
+        self.digest = None
+        self.source = None
+        self.name = ''
+        self._derived = {}
+
+    def _set(self, array, digest, source, name):
+        if digest != self.digest:
+            self._derived.clear()
+        self.array = array
+        self.digest = digest
+        self.source = source
+        self.name = name
+
+    def update_from_text(self, text):
+        # parsea el texto solo si cambió; devuelve True si hubo cambio
+        digest = _digest_bytes(text.strip().encode('utf-8'))
+        if self.source == 'text' and digest == self.digest:
+            return False
+        array = leer_texto_matriz(text)
+        self._set(array, digest, 'text', '')
+        return True
+
+    def load_file(self, path):
+        # CSV/TXT como texto de matriz; ASC, XYZ, NPY y binarios con rejillas_io
+        ext = os.path.splitext(path)[1].lower()
+        if ext in ('.csv', '.txt'):
+            with open(path, 'r', encoding='utf-8-sig') as f:
+                array = leer_texto_matriz(f.read())
+        else:
+            array, _ = leer_rejilla(path)
+        array = np.ascontiguousarray(array, dtype=float)
+        self._set(array, array_digest(array), 'file', os.path.basename(path))
+        return array
+
+    def require(self):
+        if self.array is None:
+            raise ValueError("No se detectaron datos en la matriz.")
+        return self.array
+
+    @property
+    def shape(self):
+        return None if self.array is None else self.array.shape
+
+    def derived(self, key, factory):
+        # producto derivado de la matriz actual, calculado una vez por hash
+        if key not in self._derived:
+            self._derived[key] = factory(self.require())
+        return self._derived[key]
+
+    def snapshot(self, key):
+        # (arreglo, hash, derivado en caché o None) para calcular en otro hilo
+        # sin tocar el modelo; el resultado se guarda luego con store_derived
+        return self.require(), self.digest, self._derived.get(key)
+
+    def store_derived(self, key, digest, value):
+        # guarda un derivado calculado fuera del modelo solo si la matriz no
+        # cambió mientras tanto; devuelve True si se guardó
+        if digest is None or digest != self.digest:
+            return False
+        self._derived[key] = value
+        return True
+
+    def page_count(self, rows_per_page=PREVIEW_ROWS):
+        if self.array is None:
+            return 0
+        return max(1, -(-self.array.shape[0] // rows_per_page))
+
+    def preview(self, page=0, rows_per_page=PREVIEW_ROWS, max_cols=PREVIEW_COLS, dec=3):
+        # texto de una página de filas (columnas recortadas a max_cols)
+        arr = self.require()
+        start = page*rows_per_page
+        block = arr[start:start+rows_per_page, :max_cols]
+        lines = [' '.join(f"{v:.{dec}f}" for v in row) for row in block.tolist()]
+        if arr.shape[1] > max_cols:
+            lines = [ln + ' ...' for ln in lines]
+        return '\n'.join(lines)
+
+
+# -----------------------------
+# PIRÁMIDE DE NIVELES DE DETALLE
+# -----------------------------
+
+def _block_reduce(a, factor, ufunc, fill):
+    # reduce bloques factor x factor combinando las factor**2 vistas
+    # escalonadas (operaciones elemento a elemento, sin ejes internos cortos)
+    pr, pc = -a.shape[0] % factor, -a.shape[1] % factor
+    if pr or pc:
+        a = np.pad(a, ((0, pr), (0, pc)), constant_values=fill)
+    out = a[0::factor, 0::factor].copy()
+    for i in range(factor):
+        for j in range(factor):
+            if i or j:
+                ufunc(out, a[i::factor, j::factor], out=out)
+    return out
+
+
+def build_pyramid(arr, factor=2, min_size=PYRAMID_MIN_SIZE):
+    """
+    Niveles de detalle de una rejilla. Cada nivel es un dict con 'step'
+    (celdas originales por celda del nivel) y arreglos 'mean', 'min', 'max'
+    (float32; NaN donde el bloque no tiene datos). El nivel 0 es la rejilla
+    original y cada nivel siguiente reduce bloques factor x factor del
+    anterior (la media se pondera por número de celdas válidas); la memoria
+    extra total es ~1/3 de la original por arreglo.
+    """
+    arr = np.asarray(arr, dtype=float)
+    levels = [{'step': 1, 'mean': arr, 'min': arr, 'max': arr}]
+    step = 1
+    valid = np.isfinite(arr)
+    sum_ = np.where(valid, arr, 0.0)
+    count = valid.astype(np.int32)
+    min_ = max_ = arr
+    while max(levels[-1]['mean'].shape) > min_size:
+        sum_ = _block_reduce(sum_, factor, np.add, 0.0)
+        count = _block_reduce(count, factor, np.add, 0)
+        min_ = _block_reduce(min_, factor, np.fmin, np.nan)
+        max_ = _block_reduce(max_, factor, np.fmax, np.nan)
+        step *= factor
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = (sum_ / count).astype(np.float32)
+        levels.append({'step': step, 'mean': mean,
+                       'min': min_.astype(np.float32), 'max': max_.astype(np.float32)})
+    return levels
+
+
+def select_level(pyramid, view_rows, view_cols, pixels_h, pixels_w):
+    # nivel más grueso que aún da al menos una celda por píxel en la vista
+    cells_per_pixel = max(view_rows / max(pixels_h, 1), view_cols / max(pixels_w, 1))
+    best = 0
+    for i, level in enumerate(pyramid):
+        if level['step'] <= cells_per_pixel:
+            best = i
+    return best
+
+
+def level_window(pyramid, level, row0, row1, col0, col1, stat='mean'):
+    """
+    Recorte del nivel 'level' que cubre las filas/columnas originales
+    [row0, row1) x [col0, col1). Devuelve (datos, extent) con extent en
+    coordenadas de celda originales, listo para imshow.
+    """
+    lv = pyramid[level]
+    step = lv['step']
+    data = lv[stat]
+    r0 = max(int(row0) // step, 0)
+    c0 = max(int(col0) // step, 0)
+    r1 = min(-(-int(np.ceil(row1)) // step), data.shape[0])
+    c1 = min(-(-int(np.ceil(col1)) // step), data.shape[1])
+    rows, cols = pyramid[0]['mean'].shape
+    extent = (c0*step - 0.5, min(c1*step, cols) - 0.5, min(r1*step, rows) - 0.5, r0*step - 0.5)
+    return data[r0:r1, c0:c1], extent
+
+
+# -----------------------------
+# PERFILES SOBRE POLILÍNEAS
+# -----------------------------
+
+def bilinear_sample(arr, rows, cols):
+    # interpolación bilineal de arr en posiciones (fila, columna) fraccionarias
+    arr = np.asarray(arr, dtype=float)
+    rows = np.asarray(rows, dtype=float)
+    cols = np.asarray(cols, dtype=float)
+    nr, nc = arr.shape
+    if np.any((rows < 0) | (rows > nr - 1) | (cols < 0) | (cols > nc - 1)):
+        raise ValueError("La polilínea sale de la matriz de elevaciones.")
+    r0 = np.minimum(np.floor(rows).astype(np.intp), max(nr - 2, 0))
+    c0 = np.minimum(np.floor(cols).astype(np.intp), max(nc - 2, 0))
+    r1 = np.minimum(r0 + 1, nr - 1)
+    c1 = np.minimum(c0 + 1, nc - 1)
+    fr = rows - r0
+    fc = cols - c0
+    top = arr[r0, c0]*(1 - fc) + arr[r0, c1]*fc
+    bottom = arr[r1, c0]*(1 - fc) + arr[r1, c1]*fc
+    return top*(1 - fr) + bottom*fr
+
+
+def polyline_stations(vertices, interval):
+    """
+    Estaciones cada 'interval' (unidades de celda) a lo largo de la polilínea
+    'vertices' = [(fila, col), ...]; siempre incluye el punto final.
+    Devuelve (cadenamiento, filas, columnas).
+    """
+    v = np.asarray(vertices, dtype=float)
+    if v.ndim != 2 or v.shape[1] != 2 or v.shape[0] < 2:
+        raise ValueError("La polilínea necesita al menos dos vértices (fila, columna).")
+    if not interval > 0:
+        raise ValueError("El intervalo entre estaciones debe ser positivo.")
+    seg = np.hypot(np.diff(v[:, 0]), np.diff(v[:, 1]))
+    cum = np.concatenate([[0.0], np.cumsum(seg)])
+    total = cum[-1]
+    chain = np.arange(0.0, total, interval)
+    if chain.size == 0 or chain[-1] < total:
+        chain = np.append(chain, total)
+    k = np.clip(np.searchsorted(cum, chain, side='right') - 1, 0, len(seg) - 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = np.where(seg[k] > 0, (chain - cum[k]) / seg[k], 0.0)
+    rows = v[k, 0] + t*(v[k+1, 0] - v[k, 0])
+    cols = v[k, 1] + t*(v[k+1, 1] - v[k, 1])
+    return chain, rows, cols
+
+
+def sample_polyline(arr, vertices, interval=1.0, cell_size=1.0):
+    """
+    Perfil de elevaciones a lo largo de una polilínea en coordenadas de la
+    rejilla (fila, columna). Devuelve (cadenamiento, elevaciones), con el
+    cadenamiento en unidades de cell_size.
+    """
+    chain, rows, cols = polyline_stations(vertices, interval)
+    return chain*cell_size, bilinear_sample(arr, rows, cols)
+
+
+def sample_polylines(arr, polylines, interval=1.0, cell_size=1.0):
+    # varias alineaciones con una sola interpolación sobre todas las estaciones
+    stations = [polyline_stations(v, interval) for v in polylines]
+    if not stations:
+        return []
+    rows = np.concatenate([st[1] for st in stations])
+    cols = np.concatenate([st[2] for st in stations])
+    z = bilinear_sample(arr, rows, cols)
+    bounds = np.cumsum([0] + [st[0].size for st in stations])
+    return [(st[0]*cell_size, z[a:b]) for st, a, b in zip(stations, bounds[:-1], bounds[1:])]
+
+
+def parse_polyline(text):
+    # "f,c; f,c; ..." -> lista de vértices (fila, columna)
+    vertices = []
+    for part in text.replace('\n', ';').split(';'):
+        if part.strip():
+            nums = part.replace(',', ' ').split()
+            if len(nums) != 2:
+                raise ValueError(f"Vértice inválido: '{part.strip()}' (use fila,columna)")
+            vertices.append((float(nums[0]), float(nums[1])))
+    return vertices
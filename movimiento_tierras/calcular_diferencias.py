@@ -1,4 +1,6 @@
 # Función: calcular_diferencias
+from motor_corte_relleno import a_arreglo, diferencias_arreglo
+from rejilla_elevaciones import RejillaElevaciones
 
 def _dimensiones_iguales(m1, m2):
     return (
@@ -13,20 +15,19 @@ def calcular_diferencias(actual, diseno):
     """
     Calcula delta h = actual - diseno, celda a celda.
     Devuelve una matriz de mismas dimensiones.
+    Envoltorio de compatibilidad sobre motor_corte_relleno.
+    Con RejillaElevaciones devuelve otra rejilla (misma geometría y
+    precisión) en lugar de una lista de listas; NaN donde falte alguna cota.
     """
+    rejillas = [m for m in (actual, diseno) if isinstance(m, RejillaElevaciones)]
+    if rejillas:
+        dif = diferencias_arreglo(a_arreglo(actual), a_arreglo(diseno))
+        return rejillas[0].con_valores(dif.astype(rejillas[0].dtype, copy=False))
+
     if not _dimensiones_iguales(actual, diseno):
         raise ValueError("Las matrices actual y diseno deben tener las mismas dimensiones.")
 
-    filas = len(actual)
-    cols = len(actual[0]) if filas else 0
-
-    dif = []
-    for i in range(filas):
-        fila = []
-        for j in range(cols):
-            fila.append(float(actual[i][j]) - float(diseno[i][j]))
-        dif.append(fila)
-    return dif
+    return diferencias_arreglo(a_arreglo(actual), a_arreglo(diseno)).tolist()
 
 
 if __name__ == "__main__":
@@ -1,29 +1,34 @@
 # Función: calcular_volumenes
+import numpy as np
+
+from motor_corte_relleno import a_arreglo, volumenes_arreglo
+from rejilla_elevaciones import RejillaElevaciones
+
 def calcular_volumenes(diferencias, area_celda):
     """
     Recorre la matriz de diferencias y suma:
       volumen_corte   = sum(delta * area) para delta > 0
       volumen_relleno = sum(|delta| * area) para delta < 0
     Devuelve (volumen_corte, volumen_relleno) en unidades cúbicas del área ingresada.
+    Envoltorio de compatibilidad sobre motor_corte_relleno.
+    También acepta una RejillaElevaciones; las celdas sin dato no suman.
+    Las filas pueden tener distinta longitud (como en la versión original):
+    el volumen no depende de la forma, así que se suman todas las celdas.
     """
     if not isinstance(area_celda, (int, float)) or area_celda <= 0:
         raise ValueError("area_celda debe ser un número positivo.")
 
+    if isinstance(diferencias, RejillaElevaciones):
+        return volumenes_arreglo(diferencias.valores, area_celda)
+
     if not isinstance(diferencias, list) or not all(isinstance(f, list) for f in diferencias):
         raise TypeError("diferencias debe ser una matriz (lista de listas).")
 
-    corte = 0.0
-    relleno = 0.0
-
-    for fila in diferencias:
-        for delta in fila:
-            delta = float(delta)
-            if delta > 0:
-                corte += delta * area_celda
-            elif delta < 0:
-                relleno += (-delta) * area_celda  # abs(delta)
+    if len({len(f) for f in diferencias}) > 1:
+        celdas = np.concatenate([np.asarray(f, dtype=np.float64) for f in diferencias])
+        return volumenes_arreglo(celdas.reshape(1, -1), area_celda)
 
-    return corte, relleno
+    return volumenes_arreglo(a_arreglo(diferencias), area_celda)
 
 
 if __name__ == "__main__":
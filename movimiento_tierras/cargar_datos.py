@@ -1,9 +1,28 @@
 # Función: cargar_datos
-def cargar_datos():
+import ruta_compartido
+ruta_compartido.agregar()
+from rejillas_io import leer_rejilla
+from rejilla_elevaciones import RejillaElevaciones
+
+def cargar_datos(ruta_actual=None, ruta_diseno=None, dtype=None):
     """
     Devuelve dos matrices: (actual, diseno) con elevaciones en metros.
-    Se usan datos fijos y simples para la práctica (pueden cambiarse).
+    Sin rutas se usan datos fijos y simples para la práctica (pueden cambiarse).
+    Con rutas (.asc, .xyz, .npy) las superficies se leen con rejillas_io y se
+    devuelven como arreglos NumPy (NODATA -> NaN).
+    Con dtype (np.float32 o np.float64) ambas superficies se devuelven como
+    RejillaElevaciones de esa precisión, con tamaño de celda y origen.
     """
+    if ruta_actual is not None or ruta_diseno is not None:
+        if ruta_actual is None or ruta_diseno is None:
+            raise ValueError("Se requieren ruta_actual y ruta_diseno.")
+        if dtype is not None:
+            return (RejillaElevaciones.desde_archivo(ruta_actual, dtype),
+                    RejillaElevaciones.desde_archivo(ruta_diseno, dtype))
+        actual, _ = leer_rejilla(ruta_actual)
+        diseno, _ = leer_rejilla(ruta_diseno)
+        return actual, diseno
+
     actual = [
         [12.5, 12.6, 12.8, 13.0],
         [12.2, 12.4, 12.7, 12.9],
@@ -16,6 +35,8 @@ def cargar_datos():
         [12.1, 12.1, 12.2, 12.4]
     ]
 
+    if dtype is not None:
+        return RejillaElevaciones(actual, dtype=dtype), RejillaElevaciones(diseno, dtype=dtype)
     return actual, diseno
 
 
@@ -1,32 +1,27 @@
 # Función: clasificar_corte_relleno
+from motor_corte_relleno import a_arreglo, clasificar_arreglo, codigos_a_letras
+from rejilla_elevaciones import RejillaElevaciones
 
 def clasificar_corte_relleno(diferencias, tol=0.0):
     """
     Clasifica cada celda de la matriz de diferencias como 'C' (corte),
     'R' (relleno) o 'N' (neutro) basándose en una tolerancia.
     Devuelve una matriz de clasificaciones de las mismas dimensiones.
+    Envoltorio de compatibilidad sobre motor_corte_relleno.
+    Con una RejillaElevaciones devuelve directamente los códigos int8
+    (ver motor_corte_relleno.CODIGO_*); las celdas sin dato son neutras.
     """
+    if isinstance(diferencias, RejillaElevaciones):
+        return clasificar_arreglo(diferencias.valores, tol)
+
     if not isinstance(diferencias, list) or not all(isinstance(f, list) for f in diferencias):
         raise TypeError("diferencias debe ser una matriz (lista de listas).")
 
-    filas = len(diferencias)
-    if filas == 0:
+    if len(diferencias) == 0:
         return []
-    cols = len(diferencias[0])
 
-    clasificacion = []
-    for i in range(filas):
-        fila_clasificacion = []
-        for j in range(cols):
-            delta = float(diferencias[i][j])
-            if delta > tol:
-                fila_clasificacion.append('C')
-            elif delta < -tol:
-                fila_clasificacion.append('R')
-            else:
-                fila_clasificacion.append('N')
-        clasificacion.append(fila_clasificacion)
-    return clasificacion
+    codigos = clasificar_arreglo(a_arreglo(diferencias), tol)
+    return codigos_a_letras(codigos).tolist()
 
 
 if __name__ == "__main__":
@@ -1,14 +1,21 @@
 # Función: crear_matriz_elevaciones
-def crear_matriz_elevaciones(filas, columnas, valor_inicial=0):
+from rejilla_elevaciones import crear_rejilla_elevaciones
+
+def crear_matriz_elevaciones(filas, columnas, valor_inicial=0, dtype=None, tam_celda=1.0):
     """
     Crea una matriz (lista de listas) de tamaño filas x columnas
     con todas las celdas inicializadas a valor_inicial.
+    Con dtype (np.float32 o np.float64) devuelve en su lugar una
+    RejillaElevaciones compacta con ese tamaño de celda.
     """
     if not isinstance(filas, int) or not isinstance(columnas, int):
         raise TypeError("filas y columnas deben ser enteros.")
     if filas <= 0 or columnas <= 0:
         raise ValueError("filas y columnas deben ser > 0.")
 
+    if dtype is not None:
+        return crear_rejilla_elevaciones(filas, columnas, valor_inicial, tam_celda, dtype=dtype)
+
     return [[valor_inicial for _ in range(columnas)] for _ in range(filas)]
 
 
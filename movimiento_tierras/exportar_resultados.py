@@ -0,0 +1,115 @@
+# Función: exportar_corte_relleno / exportar_zonas_csv
+import os
+
+import numpy as np
+
+import ruta_compartido
+ruta_compartido.agregar()
+from exportacion import escribir_asc, escribir_columnas_csv, escribir_matriz_csv, escribir_npy, NODATA
+from motor_corte_relleno import a_arreglo, clasificar_arreglo
+from rejilla_elevaciones import RejillaElevaciones
+from instrumentacion import etapa
+
+FORMATOS = ('asc', 'npy', 'csv')
+
+
+def _con_sin_dato(dif, codigos):
+    # códigos int16 de un bloque con NODATA donde delta h es NaN
+    codigos = codigos.astype(np.int16)
+    if dif.dtype.kind == 'f':
+        codigos[np.isnan(dif)] = NODATA
+    return codigos
+
+
+def exportar_corte_relleno(prefijo, diferencias, codigos=None, formatos=('asc', 'npy'),
+                           tol=0.0, tam_celda=None, origen=None):
+    """
+    Escribe delta h y la clasificación sin armar el texto completo en memoria
+    (compartido/exportacion.py, por bloques de filas):
+      - 'asc': ESRI ASCII grid (delta h con NaN -> NODATA)
+      - 'npy': binario compacto (delta h en su tipo, códigos int16)
+      - 'csv': una fila de la rejilla por línea
+    En la clasificación las celdas sin dato (delta h NaN) llevan el valor
+    NODATA en lugar del código neutro, en los tres formatos. Los códigos se
+    calculan por bloque de filas al escribir, sin armar la rejilla completa.
+    'diferencias' puede ser una lista, un arreglo, un .npy mapeado en memoria
+    (p. ej. el de corte_relleno_por_bloques) o una RejillaElevaciones, de la
+    que se toman tam_celda y origen. Sin 'codigos' se clasifica con 'tol'.
+    Archivos: <prefijo>_dh.<ext> y <prefijo>_clasificacion.<ext>.
+    Devuelve la lista de rutas escritas.
+    """
+    desconocidos = set(formatos) - set(FORMATOS)
+    if desconocidos:
+        raise ValueError(f"Formato no soportado: {', '.join(sorted(desconocidos))}")
+    if isinstance(diferencias, RejillaElevaciones):
+        tam_celda = diferencias.tam_celda if tam_celda is None else tam_celda
+        origen = diferencias.origen if origen is None else origen
+    tam_celda = 1.0 if tam_celda is None else tam_celda
+    xll, yll = (0.0, 0.0) if origen is None else origen
+
+    dif = diferencias if isinstance(diferencias, np.memmap) else a_arreglo(diferencias)
+    if codigos is None:
+        def clasificar(bloque, inicio):
+            return _con_sin_dato(bloque, clasificar_arreglo(bloque, tol))
+    else:
+        codigos = np.asarray(codigos)
+        if codigos.shape != dif.shape:
+            raise ValueError("Los códigos deben tener las dimensiones de delta h.")
+
+        def clasificar(bloque, inicio):
+            return _con_sin_dato(bloque, np.asarray(codigos[inicio:inicio + bloque.shape[0]]))
+
+    rutas = []
+    with etapa('terreno', 'exportar', celdas=dif.size, formatos=','.join(formatos)):
+        # la clasificación se escribe desde delta h, transformando cada bloque
+        for nombre, transformar, fmt, tipo in (('dh', None, '%.4f', None),
+                                               ('clasificacion', clasificar, '%d', np.int16)):
+            for ext in formatos:
+                ruta = f"{prefijo}_{nombre}.{ext}"
+                if ext == 'asc':
+                    escribir_asc(ruta, dif, tam_celda, xll, yll, fmt=None if transformar is None else fmt,
+                                 transformar=transformar)
+                elif ext == 'npy':
+                    escribir_npy(ruta, dif, tipo, transformar=transformar)
+                else:
+                    escribir_matriz_csv(ruta, dif, fmt, transformar=transformar)
+                rutas.append(ruta)
+    return rutas
+
+
+def exportar_zonas_csv(ruta, zonas):
+    """
+    Tabla de zonas de zonas_corte_relleno (una fila por zona) para la
+    planeación de acarreos.
+    """
+    claves = ['tipo', 'celdas', 'volumen', 'fila_min', 'fila_max', 'col_min', 'col_max',
+              'centroide_fila', 'centroide_col']
+    formatos = ['%s', '%d', '%.3f', '%d', '%d', '%d', '%d', '%.2f', '%.2f']
+    if 'centroide_x' in zonas:
+        claves += ['centroide_x', 'centroide_y']
+        formatos += ['%.3f', '%.3f']
+    k = len(zonas['tipo'])
+    columnas = [np.arange(1, k + 1), np.where(zonas['tipo'] > 0, 'C', 'R')]
+    columnas += [zonas[c] for c in claves[1:]]
+    return escribir_columnas_csv(ruta, ['zona'] + claves, columnas, ['%d'] + formatos)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from generar_terreno import generar_par_terreno
+    from zonas_corte_relleno import zonas_corte_relleno
+    from rejillas_io import leer_asc
+
+    actual, diseno = generar_par_terreno(500, 400, semilla=2)
+    rejilla = RejillaElevaciones(actual - diseno, tam_celda=5.0, origen=(500000.0, 2100000.0))
+    with tempfile.TemporaryDirectory() as tmp:
+        rutas = exportar_corte_relleno(os.path.join(tmp, 'terreno'), rejilla,
+                                       formatos=FORMATOS, tol=0.05)
+        for r in rutas:
+            print(f"{os.path.basename(r):<28} {os.path.getsize(r) / 2**20:8.2f} MiB")
+        leido, info = leer_asc(rutas[0])
+        print("ASC releído:", leido.shape, info['tam_celda'], (info['xll'], info['yll']),
+              "dif. máx.", float(np.nanmax(np.abs(leido - rejilla.valores))))
+        _, zonas = zonas_corte_relleno(rejilla, 25.0, tol=0.05)
+        ruta = os.path.join(tmp, 'zonas.csv')
+        print(exportar_zonas_csv(ruta, zonas), "zonas;", open(ruta).readline().strip())
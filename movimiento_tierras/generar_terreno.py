@@ -0,0 +1,64 @@
+# Función: generar_terreno_fractal / generar_par_terreno
+import numpy as np
+
+
+def generar_terreno_fractal(filas, columnas, hurst=0.8, amplitud=10.0, cota_media=100.0,
+                            semilla=None, dtype=np.float64):
+    """
+    Superficie de terreno sintética (movimiento browniano fraccional) por
+    síntesis espectral: ruido blanco filtrado con un espectro de potencia
+    ~ k^-(2*hurst + 2) y transformada inversa.
+      - hurst (0-1): valores altos => terreno más suave
+      - amplitud: desviación estándar de las cotas (m)
+      - cota_media: cota promedio (m)
+    Devuelve un arreglo NumPy (filas x columnas).
+    """
+    if not isinstance(filas, int) or not isinstance(columnas, int):
+        raise TypeError("filas y columnas deben ser enteros.")
+    if filas <= 0 or columnas <= 0:
+        raise ValueError("filas y columnas deben ser > 0.")
+    if not 0.0 < hurst < 1.0:
+        raise ValueError("hurst debe estar entre 0 y 1.")
+
+    rng = np.random.default_rng(semilla)
+    ruido = np.fft.rfft2(rng.standard_normal((filas, columnas)))
+    ky = np.fft.fftfreq(filas)[:, None]
+    kx = np.fft.rfftfreq(columnas)[None, :]
+    k = np.hypot(ky, kx)
+    k[0, 0] = np.inf  # sin componente constante
+    ruido *= k ** -(hurst + 1.0)
+    z = np.fft.irfft2(ruido, s=(filas, columnas))
+    desv = z.std()
+    if desv > 0:
+        z *= amplitud / desv
+    z += cota_media
+    return z.astype(dtype, copy=False)
+
+
+def generar_par_terreno(filas, columnas, hurst=0.8, amplitud=10.0, cota_media=100.0,
+                        semilla=None, dtype=np.float64):
+    """
+    Par (actual, diseno) para pruebas de rendimiento:
+      - actual: terreno fractal (generar_terreno_fractal)
+      - diseno: plano de ajuste por mínimos cuadrados del terreno con
+        plataformas horizontales en bandas de filas, como una rasante de
+        terracerías; produce zonas mezcladas de corte y relleno.
+    """
+    actual = generar_terreno_fractal(filas, columnas, hurst, amplitud, cota_media, semilla, dtype)
+    f = np.arange(filas, dtype=np.float64)
+    c = np.arange(columnas, dtype=np.float64)
+    # plano z = a + b*fila + d*col con las medias por fila y por columna
+    pf = np.polyfit(f, actual.mean(axis=1), 1) if filas > 1 else (0.0, actual.mean())
+    pc = np.polyfit(c, actual.mean(axis=0), 1) if columnas > 1 else (0.0, actual.mean())
+    base = float(actual.mean())
+    diseno = (base + pf[0]*(f - f.mean()))[:, None] + (pc[0]*(c - c.mean()))[None, :]
+    # plataformas: cada banda de ~1/8 de las filas toma la cota de su primera fila
+    banda = max(filas // 8, 1)
+    diseno = diseno[(np.arange(filas) // banda) * banda]
+    return actual, diseno.astype(dtype, copy=False)
+
+
+if __name__ == "__main__":
+    a, d = generar_par_terreno(6, 8, semilla=1)
+    print(np.round(a, 2))
+    print(np.round(d, 2))
@@ -0,0 +1,92 @@
+# Función: construir_indice / consultar_ventana / consultar_ventanas
+import numpy as np
+
+from motor_corte_relleno import a_arreglo, clasificar_arreglo, validar_area, CODIGO_CORTE, CODIGO_RELLENO
+
+
+def _tabla_acumulada(valores, dtype):
+    """
+    Tabla de sumas acumuladas 2D (summed-area table) con una fila y una
+    columna de ceros al inicio: tabla[i, j] = suma(valores[:i, :j]).
+    """
+    filas, cols = valores.shape
+    tabla = np.zeros((filas + 1, cols + 1), dtype=dtype)
+    interior = tabla[1:, 1:]
+    np.cumsum(valores, axis=0, dtype=dtype, out=interior)
+    np.cumsum(interior, axis=1, dtype=dtype, out=interior)
+    return tabla
+
+
+def construir_indice(diferencias, area_celda=25.0, tol=0.0):
+    """
+    Precalcula, a partir de la matriz de diferencias delta h, las tablas de
+    sumas acumuladas de:
+      - la parte positiva de delta h (corte)
+      - la parte negativa de delta h en valor absoluto (relleno)
+      - el número de celdas 'C' y 'R' (según 'tol')
+    Con ellas cualquier ventana rectangular se resuelve en tiempo constante.
+    Devuelve un dict con las tablas, el área de celda y la forma de la matriz.
+    """
+    validar_area(area_celda)
+    dif = a_arreglo(diferencias)
+    codigos = clasificar_arreglo(dif, tol)
+    conteo_dtype = np.int32 if dif.size < 2**31 else np.int64
+    return {
+        'corte': _tabla_acumulada(np.where(dif > 0, dif, 0.0), np.float64),
+        'relleno': _tabla_acumulada(np.where(dif < 0, -dif, 0.0), np.float64),
+        'n_corte': _tabla_acumulada(codigos == CODIGO_CORTE, conteo_dtype),
+        'n_relleno': _tabla_acumulada(codigos == CODIGO_RELLENO, conteo_dtype),
+        'area_celda': float(area_celda),
+        'forma': dif.shape,
+    }
+
+
+def _suma_ventanas(tabla, f0, c0, f1, c1):
+    return tabla[f1, c1] - tabla[f0, c1] - tabla[f1, c0] + tabla[f0, c0]
+
+
+def consultar_ventanas(indice, ventanas):
+    """
+    Resuelve muchas ventanas a la vez. 'ventanas' es una secuencia (k, 4) de
+    (fila_ini, col_ini, fila_fin, col_fin) con fin exclusivo, como en un
+    corte de lista m[fila_ini:fila_fin][col_ini:col_fin].
+    Devuelve (vol_corte, vol_relleno, n_corte, n_relleno, n_neutro), cada uno
+    un arreglo de longitud k.
+    """
+    v = np.asarray(ventanas, dtype=np.intp)
+    if v.ndim != 2 or v.shape[1] != 4:
+        raise ValueError("ventanas debe tener forma (k, 4): (fila_ini, col_ini, fila_fin, col_fin).")
+    f0, c0, f1, c1 = v.T
+    filas, cols = indice['forma']
+    if np.any((f0 < 0) | (c0 < 0) | (f1 > filas) | (c1 > cols) | (f0 > f1) | (c0 > c1)):
+        raise ValueError("Ventana fuera de la matriz o con inicio mayor que fin.")
+
+    area = indice['area_celda']
+    vol_corte = _suma_ventanas(indice['corte'], f0, c0, f1, c1) * area
+    vol_relleno = _suma_ventanas(indice['relleno'], f0, c0, f1, c1) * area
+    n_corte = _suma_ventanas(indice['n_corte'], f0, c0, f1, c1).astype(np.int64)
+    n_relleno = _suma_ventanas(indice['n_relleno'], f0, c0, f1, c1).astype(np.int64)
+    n_neutro = (f1 - f0) * (c1 - c0) - n_corte - n_relleno
+    # la resta de sumas acumuladas puede dejar -0.0 o residuos mínimos negativos
+    np.maximum(vol_corte, 0.0, out=vol_corte)
+    np.maximum(vol_relleno, 0.0, out=vol_relleno)
+    return vol_corte, vol_relleno, n_corte, n_relleno, n_neutro
+
+
+def consultar_ventana(indice, fila_ini, col_ini, fila_fin, col_fin):
+    """
+    Corte, relleno y conteos C/R/N de una sola ventana (fin exclusivo).
+    Devuelve (vol_corte, vol_relleno, n_corte, n_relleno, n_neutro).
+    """
+    res = consultar_ventanas(indice, [(fila_ini, col_ini, fila_fin, col_fin)])
+    return tuple(x[0].item() for x in res)
+
+
+if __name__ == "__main__":
+    dif = [[0.1, 0.2, 0.2, 0.2],
+           [-0.1, 0.1, 0.2, 0.2],
+           [-0.1, 0.0, 0.1, 0.2]]
+    ind = construir_indice(dif, 25.0)
+    print(consultar_ventana(ind, 0, 0, 3, 4))
+    print(consultar_ventana(ind, 1, 0, 3, 2))
+    print(consultar_ventanas(ind, [(0, 0, 1, 1), (0, 2, 3, 4)]))
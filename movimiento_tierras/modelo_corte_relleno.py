@@ -1,29 +1,75 @@
 from cargar_datos import cargar_datos
-from calcular_diferencias import calcular_diferencias
-from clasificar_corte_relleno import clasificar_corte_relleno
-from calcular_volumenes import calcular_volumenes
-from mostrar_resultados import mostrar_resultados
+from motor_corte_relleno import corte_relleno_vectorizado, codigos_a_letras
+from procesamiento_bloques import corte_relleno_por_bloques, FILAS_BLOQUE
+from procesamiento_paralelo import corte_relleno_paralelo
+from mostrar_resultados import mostrar_resultados, mostrar_volumenes, mostrar_balance
+from rasante_balance import desplazamiento_balance
+from instrumentacion import etapa, emitir_contadores, activo, resumen
 
 # Función: modelo_corte_relleno
-def modelo_corte_relleno(area_celda=25.0, tol_neutro=0.0):
+def modelo_corte_relleno(area_celda=25.0, tol_neutro=0.0,
+                         ruta_actual=None, ruta_diseno=None, filas_bloque=FILAS_BLOQUE,
+                         procesos=1, dtype=None, factor_balance=None):
     """
     Flujo principal:
       1) Cargar matrices actual y diseño
-      2) Calcular diferencias
-      3) Clasificar celdas
-      4) Calcular volúmenes totales
-      5) Mostrar resultados
+      2) Calcular diferencias, clasificar celdas y calcular volúmenes
+         totales en una sola pasada vectorizada (motor_corte_relleno)
+      3) Mostrar resultados
     Parámetros:
       - area_celda: área de cada celda (m^2, por ej. 5m x 5m => 25.0)
       - tol_neutro: tolerancia para considerar delta ~ 0 como 'N'
+      - ruta_actual, ruta_diseno: superficies en archivo; solo se muestran
+        los volúmenes totales. Los .npy se abren mapeados en memoria y se
+        procesan por bloques de 'filas_bloque' filas; los .asc / .xyz se
+        cargan completos con cargar_datos y se procesan igual por bloques.
+      - procesos: con superficies en archivo, número de procesos para repartir
+        los bloques de filas (1 = en serie, None = todos los núcleos).
+      - dtype: np.float32 o np.float64 para cargar las superficies (.asc,
+        .xyz o los datos fijos) como RejillaElevaciones compactas; las
+        celdas sin dato no suman volumen.
+      - factor_balance: si se indica, con las matrices en memoria se muestra
+        además cuánto subir o bajar el diseño para que corte = factor x
+        relleno (rasante_balance.desplazamiento_balance).
+    Con MODELADO_INSTRUMENTAR definida (ver compartido/instrumentacion.py)
+    se registra el tiempo de cada etapa, incluidas la carga y la impresión.
     """
-    actual, diseno = cargar_datos()
-    diferencias = calcular_diferencias(actual, diseno)
-    clasificacion = clasificar_corte_relleno(diferencias, tol=tol_neutro)
-    vol_corte, vol_relleno = calcular_volumenes(diferencias, area_celda)
-    mostrar_resultados(actual, diseno, diferencias, clasificacion, vol_corte, vol_relleno)
+    if ruta_actual is not None or ruta_diseno is not None:
+        if ruta_actual is None or ruta_diseno is None:
+            raise ValueError("Se requieren ruta_actual y ruta_diseno.")
+        if all(str(r).lower().endswith('.npy') for r in (ruta_actual, ruta_diseno)):
+            actual, diseno = ruta_actual, ruta_diseno
+        else:
+            with etapa('terreno', 'cargar_datos'):
+                actual, diseno = cargar_datos(ruta_actual, ruta_diseno, dtype)
+        if procesos == 1:
+            vol_corte, vol_relleno = corte_relleno_por_bloques(
+                actual, diseno, area_celda, tol=tol_neutro, filas_bloque=filas_bloque)
+        else:
+            vol_corte, vol_relleno = corte_relleno_paralelo(
+                actual, diseno, area_celda, tol=tol_neutro, procesos=procesos,
+                filas_bloque=filas_bloque)
+        with etapa('terreno', 'mostrar_resultados'):
+            mostrar_volumenes(vol_corte, vol_relleno)
+        emitir_contadores('terreno')
+        return vol_corte, vol_relleno
+
+    with etapa('terreno', 'cargar_datos'):
+        actual, diseno = cargar_datos(dtype=dtype)
+    diferencias, codigos, vol_corte, vol_relleno = corte_relleno_vectorizado(
+        actual, diseno, area_celda, tol=tol_neutro)
+    clasificacion = codigos_a_letras(codigos)
+    with etapa('terreno', 'mostrar_resultados', celdas=codigos.size):
+        mostrar_resultados(actual, diseno, diferencias, clasificacion, vol_corte, vol_relleno)
+    if factor_balance is not None:
+        print()
+        mostrar_balance(desplazamiento_balance(actual, diseno, area_celda, factor_balance),
+                        factor_balance)
+    emitir_contadores('terreno')
     return vol_corte, vol_relleno
 
 
 if __name__ == "__main__":
     modelo_corte_relleno(area_celda=25.0, tol_neutro=0.001)
+    if activo():
+        print(resumen())
@@ -0,0 +1,126 @@
+# Clase: ModeloCorteRelleno (recálculo incremental)
+import math
+
+import numpy as np
+
+from motor_corte_relleno import (
+    a_arreglo, corte_relleno_vectorizado, clasificar_arreglo, diferencias_arreglo, validar_area,
+    CODIGO_CORTE, CODIGO_RELLENO, CODIGO_NEUTRO,
+)
+
+
+def _partes(dif):
+    """
+    Suma de la parte positiva y de la parte negativa (en valor absoluto) de
+    un bloque de delta h.
+    """
+    return (math.fsum(dif[dif > 0].ravel()), math.fsum((-dif[dif < 0]).ravel()))
+
+
+class ModeloCorteRelleno:
+    """
+    Modelo de corte/relleno con estado para iteraciones de diseño.
+    Conserva delta h, la clasificación (códigos int8) y los totales de corte,
+    relleno y conteos C/R/N. actualizar_diseno() recalcula solo la región
+    editada y corrige los totales por diferencia, con costo proporcional al
+    tamaño de la edición y no al del terreno.
+    """
+
+    def __init__(self, actual, diseno, area_celda=25.0, tol=0.0):
+        validar_area(area_celda)
+        self.area_celda = float(area_celda)
+        self.tol = tol
+        self.actual = a_arreglo(actual).copy()
+        self.diseno = a_arreglo(diseno).copy()
+        self.recalcular()
+
+    def recalcular(self):
+        """
+        Recalcula todo desde cero (también elimina la deriva de redondeo que
+        pueda acumularse tras muchas ediciones).
+        """
+        # con área 1 los "volúmenes" son las sumas de delta h
+        self.diferencias, self.codigos, self._suma_corte, self._suma_relleno = \
+            corte_relleno_vectorizado(self.actual, self.diseno, 1.0, self.tol)
+        self._n = {c: int(np.count_nonzero(self.codigos == c))
+                   for c in (CODIGO_CORTE, CODIGO_RELLENO, CODIGO_NEUTRO)}
+
+    @property
+    def vol_corte(self):
+        return self._suma_corte * self.area_celda
+
+    @property
+    def vol_relleno(self):
+        return self._suma_relleno * self.area_celda
+
+    @property
+    def conteos(self):
+        """
+        Número de celdas {'C': ..., 'R': ..., 'N': ...}.
+        """
+        return {'C': self._n[CODIGO_CORTE], 'R': self._n[CODIGO_RELLENO], 'N': self._n[CODIGO_NEUTRO]}
+
+    def _region(self, region):
+        filas, cols = self.diseno.shape
+        f0, c0, f1, c1 = (int(x) for x in region)
+        if not (0 <= f0 <= f1 <= filas and 0 <= c0 <= c1 <= cols):
+            raise ValueError("Región fuera de la matriz o con inicio mayor que fin.")
+        return np.s_[f0:f1, c0:c1]
+
+    def actualizar_diseno(self, region, nuevos_valores):
+        """
+        Reemplaza las cotas de diseño en 'region' = (fila_ini, col_ini,
+        fila_fin, col_fin) (fin exclusivo) por 'nuevos_valores' (escalar o
+        matriz del tamaño de la región) y actualiza delta h, la clasificación
+        y los totales solo en esa región.
+        Devuelve (volumen_corte, volumen_relleno) actualizados.
+        """
+        sl = self._region(region)
+        dif_ant = self.diferencias[sl]
+        cod_ant = self.codigos[sl]
+        corte_ant, relleno_ant = _partes(dif_ant)
+        n_ant = {c: int(np.count_nonzero(cod_ant == c)) for c in self._n}
+
+        self.diseno[sl] = nuevos_valores
+        # en float64 como recalcular(), aunque las rejillas sean float32
+        dif_nueva = diferencias_arreglo(self.actual[sl], self.diseno[sl])
+        cod_nuevo = clasificar_arreglo(dif_nueva, self.tol)
+        corte_nuevo, relleno_nuevo = _partes(dif_nueva)
+
+        self.diferencias[sl] = dif_nueva
+        self.codigos[sl] = cod_nuevo
+        self._suma_corte += corte_nuevo - corte_ant
+        self._suma_relleno += relleno_nuevo - relleno_ant
+        for c in self._n:
+            self._n[c] += int(np.count_nonzero(cod_nuevo == c)) - n_ant[c]
+        return self.vol_corte, self.vol_relleno
+
+
+if __name__ == "__main__":
+    from cargar_datos import cargar_datos
+
+    a, d = cargar_datos()
+    modelo = ModeloCorteRelleno(a, d, area_celda=25.0, tol=0.001)
+    print(modelo.vol_corte, modelo.vol_relleno, modelo.conteos)
+    # plataforma a cota 12.5 en la esquina inferior izquierda
+    print(modelo.actualizar_diseno((1, 0, 3, 2), 12.5), modelo.conteos)
+
+    # rejillas float32: muchas ediciones incrementales contra un recálculo completo
+    from generar_terreno import generar_par_terreno
+    from rejilla_elevaciones import RejillaElevaciones
+
+    actual, diseno = generar_par_terreno(400, 300, semilla=4)
+    modelo = ModeloCorteRelleno(RejillaElevaciones(actual, dtype=np.float32),
+                                RejillaElevaciones(diseno, dtype=np.float32), 25.0, tol=0.01)
+    rng = np.random.default_rng(4)
+    for _ in range(500):
+        # diseño escalado, lejos del terreno: la resta en float32 redondearía
+        f0, c0 = rng.integers(0, 380), rng.integers(0, 280)
+        modelo.actualizar_diseno((f0, c0, f0 + 20, c0 + 20),
+                                 modelo.diseno[f0:f0 + 20, c0:c0 + 20] * rng.uniform(0.3, 1.7))
+    incremental = (modelo.vol_corte, modelo.vol_relleno, modelo.conteos)
+    modelo.recalcular()
+    completo = (modelo.vol_corte, modelo.vol_relleno, modelo.conteos)
+    assert incremental[2] == completo[2]
+    assert np.allclose(incremental[:2], completo[:2], rtol=1e-12, atol=0.0), (incremental, completo)
+    print("float32, 500 ediciones: incremental", incremental[:2], "completo", completo[:2])
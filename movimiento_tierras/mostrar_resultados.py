@@ -1,26 +1,82 @@
 # Función: mostrar_resultados
+from numbers import Real
+
+import numpy as np
+
+# Con más celdas, mostrar_resultados(modo='auto') imprime solo estadísticas
+MAX_CELDAS_COMPLETO = 400
 
 def _formatea_matriz(m, dec=3, ancho=7):
     """
     Convierte una matriz en un string tabular.
     - Números con decimales: formatea con 'dec' decimales.
     - Cadenas/char: imprime tal cual.
+    Acepta también arreglos NumPy y RejillaElevaciones (se recorren por filas).
     """
     lineas = []
     for fila in m:
         celdas = []
         for v in fila:
-            if isinstance(v, (int, float)):
+            if isinstance(v, Real):
                 celdas.append(f"{v:>{ancho}.{dec}f}")
             else:
                 celdas.append(f"{str(v):>{ancho}}")
         lineas.append(" ".join(celdas))
     return "\n".join(lineas)
 
-def mostrar_resultados(actual, diseno, diferencias, clasificacion, volumen_corte, volumen_relleno):
+def _num_celdas(m):
+    return len(m) * (len(m[0]) if len(m) else 0)
+
+def _estadisticas(m):
+    """
+    Resumen de una matriz numérica en una línea: dimensiones, celdas sin
+    dato (NaN) y mín/máx/media/desviación de las celdas válidas.
+    """
+    a = np.asarray(m)
+    sin_dato = int(np.count_nonzero(np.isnan(a)))
+    texto = f"{a.shape[0]} x {a.shape[1]} celdas, sin dato: {sin_dato}"
+    if sin_dato == a.size:
+        return texto
+    return (texto + f", mín {np.nanmin(a):.3f}, máx {np.nanmax(a):.3f}, "
+            f"media {np.nanmean(a, dtype=np.float64):.3f}, desv. {np.nanstd(a, dtype=np.float64):.3f}")
+
+def _conteos(clasificacion):
+    """
+    Conteo C/R/N de una clasificación en letras o en códigos int8.
+    """
+    c = np.asarray(clasificacion)
+    if c.dtype.kind in 'iub':
+        n = {'C': np.count_nonzero(c > 0), 'R': np.count_nonzero(c < 0)}
+    else:
+        n = {'C': np.count_nonzero(c == 'C'), 'R': np.count_nonzero(c == 'R')}
+    n['N'] = c.size - n['C'] - n['R']
+    total = max(c.size, 1)
+    return "  ".join(f"{k}: {int(v)} ({100.0 * v / total:.1f} %)" for k, v in n.items())
+
+def mostrar_resultados(actual, diseno, diferencias, clasificacion, volumen_corte, volumen_relleno,
+                       modo='auto'):
     """
     Imprime matrices y resultados finales de corte y relleno.
+      - modo='completo': todas las celdas de cada matriz
+      - modo='resumen': solo estadísticas (dimensiones, sin dato, mín/máx/
+        media/desviación y conteos C/R/N), sin recorrer celda por celda
+      - modo='auto': 'resumen' si hay más de MAX_CELDAS_COMPLETO celdas
     """
+    if modo not in ('auto', 'completo', 'resumen'):
+        raise ValueError("modo debe ser 'auto', 'completo' o 'resumen'.")
+    if modo == 'resumen' or (modo == 'auto' and _num_celdas(actual) > MAX_CELDAS_COMPLETO):
+        print("=== Elevaciones actuales (m) ===")
+        print(_estadisticas(actual))
+        print("\n=== Elevaciones de diseño (m) ===")
+        print(_estadisticas(diseno))
+        print("\n=== Diferencias Δh = actual - diseño (m) ===")
+        print(_estadisticas(diferencias))
+        print("\n=== Clasificación (C=corte, R=relleno, N=neutro) ===")
+        print(_conteos(clasificacion))
+        print()
+        mostrar_volumenes(volumen_corte, volumen_relleno)
+        return
+
     print("=== Elevaciones actuales (m) ===")
     print(_formatea_matriz(actual))
     print("\n=== Elevaciones de diseño (m) ===")
@@ -30,10 +86,43 @@ def mostrar_resultados(actual, diseno, diferencias, clasificacion, volumen_corte
     print("\n=== Clasificación (C=corte, R=relleno, N=neutro) ===")
     print(_formatea_matriz(clasificacion, dec=0))
 
-    print("\n=== Volúmenes totales ===")
+    print()
+    mostrar_volumenes(volumen_corte, volumen_relleno)
+
+def mostrar_volumenes(volumen_corte, volumen_relleno):
+    """
+    Imprime solo los volúmenes totales de corte y relleno.
+    """
+    print("=== Volúmenes totales ===")
     print(f"Volumen de CORTE   : {volumen_corte:.3f} unidades³")
     print(f"Volumen de RELLENO : {volumen_relleno:.3f} unidades³")
 
+def mostrar_balance(balance, factor=1.0):
+    """
+    Imprime el desplazamiento de la rasante que balancea corte y relleno
+    (resultado de rasante_balance.desplazamiento_balance).
+    """
+    print(f"=== Rasante balanceada (corte = {factor:g} x relleno) ===")
+    print(f"Desplazamiento del diseño : {balance['desplazamiento']:+.3f} m")
+    print(f"Volumen de CORTE          : {balance['vol_corte']:.3f} unidades³")
+    print(f"Volumen de RELLENO        : {balance['vol_relleno']:.3f} unidades³")
+
+def mostrar_zonas(zonas, n=10):
+    """
+    Imprime las 'n' zonas de mayor volumen (resultado de
+    zonas_corte_relleno): tipo, celdas, volumen, rectángulo y centroide.
+    """
+    volumen = zonas['volumen'].tolist()
+    orden = sorted(range(len(volumen)), key=volumen.__getitem__, reverse=True)[:n]
+    print(f"=== Zonas de corte/relleno ({len(volumen)} en total, {len(orden)} mayores) ===")
+    print(f"{'zona':>6} {'tipo':>4} {'celdas':>9} {'volumen':>14}  {'filas':>13}  {'columnas':>13}  centroide (f, c)")
+    for i in orden:
+        tipo = 'C' if zonas['tipo'][i] > 0 else 'R'
+        print(f"{i + 1:>6} {tipo:>4} {zonas['celdas'][i]:>9} {volumen[i]:>14.3f}  "
+              f"{zonas['fila_min'][i]:>6}-{zonas['fila_max'][i]:<6}  "
+              f"{zonas['col_min'][i]:>6}-{zonas['col_max'][i]:<6}  "
+              f"({zonas['centroide_fila'][i]:.1f}, {zonas['centroide_col'][i]:.1f})")
+
 
 if __name__ == "__main__":
     # Demo rápida
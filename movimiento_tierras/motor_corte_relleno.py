@@ -0,0 +1,134 @@
+# Función: corte_relleno_vectorizado
+import math
+
+import numpy as np
+
+import ruta_compartido
+ruta_compartido.agregar()
+from instrumentacion import etapa
+from rejilla_elevaciones import RejillaElevaciones, validar_geometria
+
+# Códigos compactos de clasificación (int8)
+CODIGO_RELLENO = -1
+CODIGO_NEUTRO = 0
+CODIGO_CORTE = 1
+
+# Índice = código + 1
+_LETRAS = np.array(['R', 'N', 'C'])
+
+
+def a_arreglo(matriz):
+    """
+    Convierte una matriz (lista de listas o arreglo) en un arreglo 2D float64
+    contiguo. Una matriz vacía se devuelve con forma (0, 0).
+    Una RejillaElevaciones devuelve su arreglo sin copiar (float32 o float64,
+    NODATA como NaN).
+    """
+    if isinstance(matriz, RejillaElevaciones):
+        return matriz.valores
+    arr = np.ascontiguousarray(matriz, dtype=np.float64)
+    if arr.size == 0 and arr.ndim < 2:
+        arr = arr.reshape(0, 0)
+    if arr.ndim != 2:
+        raise ValueError("La matriz debe ser bidimensional.")
+    return arr
+
+
+def diferencias_arreglo(actual, diseno):
+    """
+    Calcula delta h = actual - diseno sobre arreglos completos (float64
+    aunque las superficies sean float32; NaN donde falte alguna cota).
+    """
+    validar_geometria(actual, diseno)
+    if np.shape(actual) != np.shape(diseno):
+        raise ValueError("Las matrices actual y diseno deben tener las mismas dimensiones.")
+    return np.subtract(actual, diseno, dtype=np.float64)
+
+
+def clasificar_arreglo(diferencias, tol=0.0):
+    """
+    Devuelve los códigos de clasificación (int8) de cada celda:
+    CODIGO_CORTE si delta > tol, CODIGO_RELLENO si delta < -tol y
+    CODIGO_NEUTRO en otro caso (incluye NaN).
+    """
+    codigos = (diferencias > tol).view(np.int8) - (diferencias < -tol).view(np.int8)
+    return codigos
+
+
+def codigos_a_letras(codigos):
+    """
+    Traduce los códigos de clasificación a las letras 'C', 'R', 'N'.
+    """
+    return _LETRAS[np.asarray(codigos, dtype=np.intp) + 1]
+
+
+def sumas_por_fila(diferencias):
+    """
+    Suma por fila las partes positiva (corte) y negativa (relleno, en valor
+    absoluto) de delta h. Es la unidad de reducción común a todos los motores:
+    los totales se obtienen con math.fsum sobre estas sumas, de modo que el
+    resultado no depende de cómo se agrupen las filas.
+    """
+    corte = np.sum(diferencias, axis=1, where=diferencias > 0, initial=0.0)
+    relleno = -np.sum(diferencias, axis=1, where=diferencias < 0, initial=0.0)
+    return corte, relleno
+
+
+def totales(corte_filas, relleno_filas, area_celda):
+    """
+    Combina las sumas por fila en (volumen_corte, volumen_relleno).
+    """
+    return (math.fsum(corte_filas) * area_celda,
+            math.fsum(relleno_filas) * area_celda)
+
+
+def validar_area(area_celda):
+    if not isinstance(area_celda, (int, float)) or area_celda <= 0:
+        raise ValueError("area_celda debe ser un número positivo.")
+
+
+def volumenes_arreglo(diferencias, area_celda):
+    """
+    Devuelve (volumen_corte, volumen_relleno) de un arreglo de diferencias.
+    """
+    validar_area(area_celda)
+    return totales(*sumas_por_fila(diferencias), area_celda)
+
+
+def corte_relleno_vectorizado(actual, diseno, area_celda=25.0, tol=0.0):
+    """
+    Calcula en una sola pasada vectorizada:
+      - diferencias delta h = actual - diseno (float64)
+      - clasificación en códigos int8 (ver CODIGO_*)
+      - volúmenes totales de corte y relleno
+    Con la instrumentación activa (ver compartido/instrumentacion.py) cada
+    etapa emite su tiempo, celdas/s y bytes producidos.
+    Acepta listas, arreglos o RejillaElevaciones; las celdas sin dato (NaN)
+    quedan neutras y no suman volumen.
+    Devuelve (diferencias, codigos, volumen_corte, volumen_relleno).
+    """
+    validar_area(area_celda)
+    validar_geometria(actual, diseno)
+    with etapa('terreno', 'a_arreglo') as reg:
+        actual = a_arreglo(actual)
+        diseno = a_arreglo(diseno)
+        reg['celdas'] = actual.size
+    celdas = actual.size
+    with etapa('terreno', 'diferencias', celdas=celdas) as reg:
+        diferencias = diferencias_arreglo(actual, diseno)
+        reg['bytes'] = diferencias.nbytes
+    with etapa('terreno', 'clasificacion', celdas=celdas) as reg:
+        codigos = clasificar_arreglo(diferencias, tol)
+        reg['bytes'] = codigos.nbytes
+    with etapa('terreno', 'volumenes', celdas=celdas):
+        vol_corte, vol_relleno = totales(*sumas_por_fila(diferencias), area_celda)
+    return diferencias, codigos, vol_corte, vol_relleno
+
+
+if __name__ == "__main__":
+    a = [[12.5, 12.6], [12.2, 12.4]]
+    d = [[12.4, 12.4], [12.3, 12.3]]
+    dif, cod, vc, vr = corte_relleno_vectorizado(a, d, 25.0, tol=0.001)
+    print(dif)
+    print(codigos_a_letras(cod))
+    print(vc, vr)
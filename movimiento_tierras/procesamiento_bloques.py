@@ -0,0 +1,111 @@
+# Función: corte_relleno_por_bloques
+import os
+
+import numpy as np
+
+from motor_corte_relleno import (
+    diferencias_arreglo, clasificar_arreglo, sumas_por_fila, totales, validar_area,
+)
+from instrumentacion import etapa, contar
+from rejilla_elevaciones import validar_geometria
+
+# Filas por bloque por defecto (con 10 000 columnas float64 => ~80 MB por superficie)
+FILAS_BLOQUE = 1024
+
+
+def abrir_raster(fuente, forma=None, dtype=np.float64):
+    """
+    Abre una superficie de elevaciones sin cargarla en memoria.
+      - Ruta .npy: se abre con np.load(mmap_mode='r').
+      - Otra ruta: binario crudo en orden C; requiere 'forma' (filas, columnas)
+        y 'dtype'.
+      - Arreglo (o memmap) ya abierto o RejillaElevaciones: se usa su
+        arreglo tal cual, sin copiar.
+    """
+    if not isinstance(fuente, (str, os.PathLike)):
+        arr = np.asarray(fuente)
+        if arr.ndim != 2:
+            raise ValueError("La superficie debe ser bidimensional.")
+        return arr
+    if str(fuente).lower().endswith('.npy'):
+        arr = np.load(fuente, mmap_mode='r')
+    else:
+        if forma is None:
+            raise ValueError("Para un binario crudo se requiere forma=(filas, columnas).")
+        arr = np.memmap(fuente, dtype=dtype, mode='r', shape=tuple(forma))
+    if arr.ndim != 2:
+        raise ValueError("La superficie debe ser bidimensional.")
+    return arr
+
+
+def bloques_de_filas(filas, filas_bloque=FILAS_BLOQUE):
+    """
+    Genera los intervalos (inicio, fin) de filas de cada bloque.
+    """
+    if not isinstance(filas_bloque, int) or filas_bloque <= 0:
+        raise ValueError("filas_bloque debe ser un entero positivo.")
+    for inicio in range(0, filas, filas_bloque):
+        yield inicio, min(inicio + filas_bloque, filas)
+
+
+def corte_relleno_por_bloques(actual, diseno, area_celda=25.0, tol=0.0,
+                              filas_bloque=FILAS_BLOQUE, forma=None, dtype=np.float64,
+                              ruta_diferencias=None, ruta_clasificacion=None):
+    """
+    Recorre las superficies actual y diseño (rutas a .npy / binario crudo o
+    arreglos) por bloques de filas: diferencias -> clasificación -> volúmenes.
+    Solo un bloque de cada superficie está en memoria a la vez; los totales se
+    acumulan por fila y coinciden exactamente con corte_relleno_vectorizado.
+    Opcionalmente escribe delta h (float64) y los códigos de clasificación
+    (int8) en archivos .npy mapeados en memoria.
+    Devuelve (volumen_corte, volumen_relleno).
+    """
+    validar_area(area_celda)
+    validar_geometria(actual, diseno)
+    actual = abrir_raster(actual, forma, dtype)
+    diseno = abrir_raster(diseno, forma, dtype)
+    if actual.shape != diseno.shape:
+        raise ValueError("Las matrices actual y diseno deben tener las mismas dimensiones.")
+
+    filas = actual.shape[0]
+    salida_dif = salida_cod = None
+    if ruta_diferencias is not None:
+        salida_dif = np.lib.format.open_memmap(ruta_diferencias, mode='w+',
+                                               dtype=np.float64, shape=actual.shape)
+    if ruta_clasificacion is not None:
+        salida_cod = np.lib.format.open_memmap(ruta_clasificacion, mode='w+',
+                                               dtype=np.int8, shape=actual.shape)
+
+    corte_filas = np.zeros(filas)
+    relleno_filas = np.zeros(filas)
+    with etapa('terreno', 'bloques', celdas=actual.size, filas_bloque=filas_bloque) as reg:
+        for inicio, fin in bloques_de_filas(filas, filas_bloque):
+            dif = diferencias_arreglo(actual[inicio:fin], diseno[inicio:fin])
+            corte_filas[inicio:fin], relleno_filas[inicio:fin] = sumas_por_fila(dif)
+            if salida_dif is not None:
+                salida_dif[inicio:fin] = dif
+            if salida_cod is not None:
+                salida_cod[inicio:fin] = clasificar_arreglo(dif, tol)
+            contar('bloques_procesados')
+        # bytes del bloque más grande de delta h (memoria de trabajo por bloque)
+        reg['bytes'] = min(filas_bloque, filas) * actual.shape[1] * 8
+
+        for salida in (salida_dif, salida_cod):
+            if salida is not None:
+                salida.flush()
+    return totales(corte_filas, relleno_filas, area_celda)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from motor_corte_relleno import corte_relleno_vectorizado
+
+    rng = np.random.default_rng(0)
+    a = rng.uniform(10, 14, (500, 300))
+    d = rng.uniform(10, 14, (500, 300))
+    with tempfile.TemporaryDirectory() as tmp:
+        ra, rd = os.path.join(tmp, 'actual.npy'), os.path.join(tmp, 'diseno.npy')
+        np.save(ra, a)
+        np.save(rd, d)
+        print(corte_relleno_por_bloques(ra, rd, 25.0, filas_bloque=64))
+    print(corte_relleno_vectorizado(a, d, 25.0)[2:])
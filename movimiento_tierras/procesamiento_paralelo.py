@@ -0,0 +1,157 @@
+# Función: corte_relleno_paralelo
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from motor_corte_relleno import (
+    a_arreglo, diferencias_arreglo, clasificar_arreglo, sumas_por_fila, totales, validar_area,
+)
+from procesamiento_bloques import abrir_raster, bloques_de_filas, FILAS_BLOQUE
+from instrumentacion import etapa, contar
+from rejilla_elevaciones import validar_geometria
+
+# Superficies abiertas en cada proceso trabajador (ver _inicializar_trabajador)
+_superficies = {}
+
+
+def _describir(fuente, forma, dtype, memorias):
+    """
+    Devuelve un descriptor ligero (picklable) de la superficie:
+      - ('ruta', ruta, forma, dtype): el trabajador la abre mapeada en memoria
+      - ('shm', nombre, forma, dtype): arreglo copiado una vez a memoria compartida
+    """
+    if isinstance(fuente, (str, os.PathLike)):
+        return ('ruta', os.fspath(fuente), forma, np.dtype(dtype).str)
+    arr = a_arreglo(fuente)
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    memorias.append(shm)
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+    return ('shm', shm.name, arr.shape, arr.dtype.str)
+
+
+def _abrir_descriptor(desc):
+    tipo, ref, forma, dtype = desc
+    if tipo == 'ruta':
+        return abrir_raster(ref, forma, np.dtype(dtype)), None
+    shm = shared_memory.SharedMemory(name=ref)
+    return np.ndarray(forma, dtype=np.dtype(dtype), buffer=shm.buf), shm
+
+
+def _inicializar_trabajador(desc_actual, desc_diseno, tol, ruta_diferencias, ruta_clasificacion):
+    actual, _superficies['shm_actual'] = _abrir_descriptor(desc_actual)
+    diseno, _superficies['shm_diseno'] = _abrir_descriptor(desc_diseno)
+    _preparar(actual, diseno, tol, ruta_diferencias, ruta_clasificacion)
+
+
+def _preparar(actual, diseno, tol, ruta_diferencias, ruta_clasificacion):
+    _superficies['actual'] = actual
+    _superficies['diseno'] = diseno
+    _superficies['tol'] = tol
+    _superficies['dif'] = None
+    _superficies['cod'] = None
+    if ruta_diferencias is not None:
+        _superficies['dif'] = np.load(ruta_diferencias, mmap_mode='r+')
+    if ruta_clasificacion is not None:
+        _superficies['cod'] = np.load(ruta_clasificacion, mmap_mode='r+')
+
+
+def _procesar_bloque(inicio, fin):
+    """
+    Tarea de un trabajador: diferencias, clasificación (si se pidió salida)
+    y sumas por fila de un bloque.
+    """
+    dif = diferencias_arreglo(_superficies['actual'][inicio:fin],
+                              _superficies['diseno'][inicio:fin])
+    corte, relleno = sumas_por_fila(dif)
+    if _superficies['dif'] is not None:
+        _superficies['dif'][inicio:fin] = dif
+        _superficies['dif'].flush()
+    if _superficies['cod'] is not None:
+        _superficies['cod'][inicio:fin] = clasificar_arreglo(dif, _superficies['tol'])
+        _superficies['cod'].flush()
+    return inicio, fin, corte, relleno
+
+
+def corte_relleno_paralelo(actual, diseno, area_celda=25.0, tol=0.0, procesos=None,
+                           filas_bloque=FILAS_BLOQUE, forma=None, dtype=np.float64,
+                           ruta_diferencias=None, ruta_clasificacion=None):
+    """
+    Igual que corte_relleno_por_bloques, pero reparte los bloques de filas
+    entre 'procesos' trabajadores (None => os.cpu_count()).
+    Las superficies no se envían por pickle: las rutas se abren mapeadas en
+    memoria en cada trabajador y los arreglos se copian una sola vez a
+    memoria compartida. Con un solo proceso (o un solo bloque) no se copia
+    nada: los bloques se leen directamente del arreglo o del memmap.
+    Las sumas por fila de cada bloque se colocan en su posición y se
+    combinan con math.fsum, así que el resultado es idéntico al de la
+    ejecución en serie sin importar el orden en que terminen los bloques.
+    Como en la versión en serie, delta h y los códigos de clasificación se
+    pueden escribir en archivos .npy; cada trabajador escribe sus filas.
+    Devuelve (volumen_corte, volumen_relleno).
+    """
+    validar_area(area_celda)
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+    if not isinstance(procesos, int) or procesos <= 0:
+        raise ValueError("procesos debe ser un entero positivo.")
+    validar_geometria(actual, diseno)
+
+    forma_a = abrir_raster(actual, forma, dtype).shape
+    forma_d = abrir_raster(diseno, forma, dtype).shape
+    if forma_a != forma_d:
+        raise ValueError("Las matrices actual y diseno deben tener las mismas dimensiones.")
+
+    filas = forma_a[0]
+    corte_filas = np.zeros(filas)
+    relleno_filas = np.zeros(filas)
+    bloques = list(bloques_de_filas(filas, filas_bloque))
+    for ruta, tipo in ((ruta_diferencias, np.float64), (ruta_clasificacion, np.int8)):
+        if ruta is not None:
+            # se crea el archivo; los trabajadores lo reabren en modo r+
+            np.lib.format.open_memmap(ruta, mode='w+', dtype=tipo, shape=forma_a).flush()
+
+    memorias = []
+    with etapa('terreno', 'paralelo', celdas=filas * forma_a[1], procesos=procesos,
+               filas_bloque=filas_bloque):
+        try:
+            if procesos == 1 or len(bloques) <= 1:
+                _preparar(abrir_raster(actual, forma, dtype), abrir_raster(diseno, forma, dtype),
+                          tol, ruta_diferencias, ruta_clasificacion)
+                for inicio, fin in bloques:
+                    _, _, corte, relleno = _procesar_bloque(inicio, fin)
+                    corte_filas[inicio:fin] = corte
+                    relleno_filas[inicio:fin] = relleno
+            else:
+                desc_actual = _describir(actual, forma, dtype, memorias)
+                desc_diseno = _describir(diseno, forma, dtype, memorias)
+                args = (desc_actual, desc_diseno, tol, ruta_diferencias, ruta_clasificacion)
+                with ProcessPoolExecutor(max_workers=min(procesos, len(bloques)),
+                                         initializer=_inicializar_trabajador,
+                                         initargs=args) as pool:
+                    inicios, fines = zip(*bloques)
+                    for inicio, fin, corte, relleno in pool.map(_procesar_bloque, inicios, fines):
+                        corte_filas[inicio:fin] = corte
+                        relleno_filas[inicio:fin] = relleno
+            contar('bloques_procesados', len(bloques))
+        finally:
+            for clave in ('shm_actual', 'shm_diseno'):
+                shm = _superficies.pop(clave, None)
+                if shm is not None:
+                    shm.close()
+            _superficies.clear()
+            for shm in memorias:
+                shm.close()
+                shm.unlink()
+    return totales(corte_filas, relleno_filas, area_celda)
+
+
+if __name__ == "__main__":
+    from motor_corte_relleno import corte_relleno_vectorizado
+
+    rng = np.random.default_rng(0)
+    a = rng.uniform(10, 14, (4000, 500))
+    d = rng.uniform(10, 14, (4000, 500))
+    print(corte_relleno_paralelo(a, d, 25.0, procesos=4, filas_bloque=256))
+    print(corte_relleno_vectorizado(a, d, 25.0)[2:])
@@ -0,0 +1,237 @@
+# Función: desplazamiento_balance / plano_balance
+import math
+
+import numpy as np
+
+from motor_corte_relleno import a_arreglo, diferencias_arreglo, validar_area
+from rejilla_elevaciones import RejillaElevaciones
+from instrumentacion import etapa
+
+# Puntos de la curva de corte/relleno por defecto
+PUNTOS_CURVA = 101
+
+
+def construir_tabla_balance(diferencias, area_celda=25.0):
+    """
+    Ordena una sola vez los delta h válidos (se descartan NaN / sin dato) y
+    guarda sus sumas acumuladas. Si el diseño sube 't' metros, con los m
+    valores <= t:
+      relleno(t) = (m*t - acum[m]) * area
+      corte(t)   = (acum[n] - acum[m] - (n - m)*t) * area
+    así que cada desplazamiento candidato cuesta una búsqueda binaria.
+    Devuelve un dict con 'dh' (ordenado), 'acum' (con un cero al inicio) y
+    'area_celda'.
+    """
+    validar_area(area_celda)
+    dif = np.asarray(a_arreglo(diferencias), dtype=np.float64).ravel()
+    with etapa('terreno', 'tabla_balance', celdas=dif.size):
+        dh = np.sort(dif[~np.isnan(dif)])
+        acum = np.zeros(dh.size + 1)
+        np.cumsum(dh, out=acum[1:])
+    return {'dh': dh, 'acum': acum, 'area_celda': float(area_celda)}
+
+
+def volumenes_desplazamiento(tabla, desplazamientos):
+    """
+    Volúmenes (corte, relleno) con el diseño desplazado verticalmente cada
+    valor de 'desplazamientos' (escalar o arreglo, m; positivo = diseño más
+    alto, es decir, más relleno). O(log n) por desplazamiento.
+    """
+    dh, acum = tabla['dh'], tabla['acum']
+    t = np.asarray(desplazamientos, dtype=np.float64)
+    m = np.searchsorted(dh, t, side='right')
+    n = dh.size
+    relleno = (m * t - acum[m]) * tabla['area_celda']
+    corte = (acum[n] - acum[m] - (n - m) * t) * tabla['area_celda']
+    # residuos de redondeo en los extremos
+    return np.maximum(corte, 0.0), np.maximum(relleno, 0.0)
+
+
+def _desplazamiento_equilibrio(tabla, factor):
+    """
+    Desplazamiento t con corte(t) = factor * relleno(t). La diferencia
+    g(t) = corte - factor*relleno es lineal por tramos y decreciente, así que
+    se ubica por bisección el tramo entre dos delta h consecutivos donde
+    cambia de signo y ahí se despeja t en forma cerrada.
+    """
+    dh, acum = tabla['dh'], tabla['acum']
+    n = dh.size
+    if n == 0:
+        raise ValueError("No hay celdas con dato para balancear.")
+
+    def g(t):
+        corte, relleno = volumenes_desplazamiento(tabla, t)
+        return corte - factor * relleno
+
+    # mayor j con g(dh[j]) >= 0 (g(dh[0]) >= 0 siempre)
+    lo, hi = 0, n - 1
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if g(dh[mid]) >= 0:
+            lo = mid
+        else:
+            hi = mid - 1
+    # m = j + 1 valores quedan bajo la rasante; en ese tramo g es lineal
+    m = lo + 1
+    t = (acum[n] - acum[m] + factor * acum[m]) / ((n - m) + factor * m)
+    return float(min(max(t, dh[lo]), dh[min(m, n - 1)]))
+
+
+def curva_corte_relleno(tabla, desplazamientos=None, puntos=PUNTOS_CURVA):
+    """
+    Curva de volúmenes en función del desplazamiento del diseño. Sin
+    'desplazamientos' se recorre el rango completo de delta h.
+    Devuelve dict con 'desplazamiento', 'corte' y 'relleno' (arreglos).
+    """
+    if desplazamientos is None:
+        dh = tabla['dh']
+        desplazamientos = np.linspace(dh[0], dh[-1], puntos) if dh.size else np.zeros(0)
+    t = np.asarray(desplazamientos, dtype=np.float64)
+    corte, relleno = volumenes_desplazamiento(tabla, t)
+    return {'desplazamiento': t, 'corte': corte, 'relleno': relleno}
+
+
+def _validar_factor(factor):
+    if not isinstance(factor, (int, float)) or not factor > 0:
+        raise ValueError("factor debe ser un número positivo.")
+
+
+def desplazamiento_balance(actual, diseno, area_celda=25.0, factor=1.0,
+                           desplazamientos=None, puntos=PUNTOS_CURVA):
+    """
+    Desplazamiento vertical del diseño (m, positivo = subir la rasante) que
+    balancea el movimiento de tierras: corte = factor * relleno.
+      - factor: volumen de corte necesario por unidad de relleno compactado
+        (p. ej. 1.15 si el material se contrae un 15 % al compactarse;
+        < 1 si se abunda)
+    Delta h se calcula y ordena una sola vez (construir_tabla_balance); las
+    celdas sin dato se ignoran.
+    Devuelve dict con 'desplazamiento', 'vol_corte', 'vol_relleno' (con el
+    diseño desplazado) y 'curva' (ver curva_corte_relleno).
+    """
+    _validar_factor(factor)
+    tabla = construir_tabla_balance(diferencias_arreglo(a_arreglo(actual), a_arreglo(diseno)),
+                                    area_celda)
+    t = _desplazamiento_equilibrio(tabla, factor)
+    corte, relleno = volumenes_desplazamiento(tabla, t)
+    return {
+        'desplazamiento': t,
+        'vol_corte': float(corte),
+        'vol_relleno': float(relleno),
+        'curva': curva_corte_relleno(tabla, desplazamientos, puntos),
+    }
+
+
+def _ajuste_pendientes(z, x, y, limites):
+    """
+    Pendientes (px, py) del plano z ~ c + px*x + py*y de mínimos cuadrados
+    con |px| <= limites[0] y |py| <= limites[1] (x, y centrados). Con dos
+    incógnitas el óptimo restringido está en el interior, en un borde o en
+    una esquina de la caja: se evalúan esos candidatos.
+    """
+    sxx, syy, sxy = x @ x, y @ y, x @ y
+    sxz, syz = x @ z, y @ z
+    lx, ly = limites
+
+    def costo(px, py):
+        # suma de cuadrados sin la constante (z es fija)
+        return px*px*sxx + py*py*syy + 2*px*py*sxy - 2*px*sxz - 2*py*syz
+
+    candidatos = [(0.0, 0.0),
+                  (sxz / sxx if sxx > 0 else 0.0, 0.0),
+                  (0.0, syz / syy if syy > 0 else 0.0)]
+    det = sxx * syy - sxy * sxy
+    if det > 0:
+        candidatos.append(((sxz * syy - syz * sxy) / det, (syz * sxx - sxz * sxy) / det))
+    if np.isfinite(lx):
+        for px in (-lx, lx):
+            candidatos.append((px, (syz - px * sxy) / syy if syy > 0 else 0.0))
+    if np.isfinite(ly):
+        for py in (-ly, ly):
+            candidatos.append(((sxz - py * sxy) / sxx if sxx > 0 else 0.0, py))
+    if np.isfinite(lx) and np.isfinite(ly):
+        candidatos += [(px, py) for px in (-lx, lx) for py in (-ly, ly)]
+    factibles = [(float(np.clip(px, -lx, lx)), float(np.clip(py, -ly, ly))) for px, py in candidatos]
+    return min(factibles, key=lambda p: costo(*p))
+
+
+def plano_balance(actual, area_celda=25.0, factor=1.0, pendiente_max=None,
+                  desplazamientos=None, puntos=PUNTOS_CURVA):
+    """
+    Plano de diseño z = cota_centro + pendiente_x*x + pendiente_y*y (x hacia
+    las columnas, y hacia el norte = filas hacia arriba, ambos medidos desde
+    el centro de la rejilla) que:
+      1) sigue al terreno actual por mínimos cuadrados con las pendientes
+         limitadas a pendiente_max (m/m; escalar o (max_x, max_y); None =
+         sin límite)
+      2) se desplaza verticalmente hasta balancear corte = factor * relleno
+    El tamaño de celda se toma de la RejillaElevaciones o de sqrt(area_celda).
+    Devuelve dict con 'cota_centro', 'pendiente_x', 'pendiente_y', 'diseno'
+    (arreglo del plano), 'vol_corte', 'vol_relleno' y 'curva' (volúmenes al
+    desplazar el plano desde la cota balanceada).
+    """
+    validar_area(area_celda)
+    _validar_factor(factor)
+    tam = actual.tam_celda if isinstance(actual, RejillaElevaciones) else math.sqrt(area_celda)
+    z = np.asarray(a_arreglo(actual), dtype=np.float64)
+    filas, cols = z.shape
+    if pendiente_max is None:
+        limites = (np.inf, np.inf)
+    else:
+        limites = np.broadcast_to(np.asarray(pendiente_max, dtype=np.float64), (2,))
+        if np.any(limites < 0):
+            raise ValueError("pendiente_max no puede ser negativa.")
+
+    with etapa('terreno', 'ajuste_plano', celdas=z.size):
+        xs = (np.arange(cols) - (cols - 1) / 2.0) * tam
+        ys = ((filas - 1) / 2.0 - np.arange(filas)) * tam
+        valido = ~np.isnan(z)
+        fi, ci = np.nonzero(valido)
+        zv = z[valido]
+        if zv.size == 0:
+            raise ValueError("No hay celdas con dato para balancear.")
+        x, y = xs[ci], ys[fi]
+        x = x - x.mean()
+        y = y - y.mean()
+        px, py = _ajuste_pendientes(zv - zv.mean(), x, y, tuple(limites))
+        # plano con cota 0 en el centro de la rejilla
+        plano = ys[:, None] * py + xs[None, :] * px
+
+    tabla = construir_tabla_balance(z - plano, area_celda)
+    # con el diseño = plano + c, delta h = (z - plano) - c
+    c = _desplazamiento_equilibrio(tabla, factor)
+    corte, relleno = volumenes_desplazamiento(tabla, c)
+    curva = curva_corte_relleno(tabla, None if desplazamientos is None
+                                else c + np.asarray(desplazamientos, dtype=np.float64), puntos)
+    curva['desplazamiento'] = curva['desplazamiento'] - c
+    return {
+        'cota_centro': c,
+        'pendiente_x': px,
+        'pendiente_y': py,
+        'diseno': plano + c,
+        'vol_corte': float(corte),
+        'vol_relleno': float(relleno),
+        'curva': curva,
+    }
+
+
+if __name__ == "__main__":
+    from cargar_datos import cargar_datos
+    from generar_terreno import generar_par_terreno
+
+    a, d = cargar_datos()
+    res = desplazamiento_balance(a, d, 25.0, factor=1.0)
+    print(f"Desplazamiento = {res['desplazamiento']:.4f} m -> "
+          f"corte {res['vol_corte']:.3f}, relleno {res['vol_relleno']:.3f}")
+
+    import time
+    actual, diseno = generar_par_terreno(2000, 2000, semilla=3)
+    t0 = time.perf_counter()
+    res = desplazamiento_balance(actual, diseno, 25.0, factor=1.15)
+    print(f"4e6 celdas, factor 1.15: desplazamiento = {res['desplazamiento']:.4f} m, "
+          f"corte {res['vol_corte']:.0f}, relleno {res['vol_relleno']:.0f} "
+          f"({time.perf_counter() - t0:.2f} s)")
+    pl = plano_balance(actual, 25.0, factor=1.15, pendiente_max=0.01)
+    print(f"Plano: cota centro {pl['cota_centro']:.3f} m, pendientes "
+          f"({pl['pendiente_x']:.4f}, {pl['pendiente_y']:.4f}), "
+          f"corte {pl['vol_corte']:.0f}, relleno {pl['vol_relleno']:.0f}")
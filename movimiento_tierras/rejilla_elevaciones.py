@@ -0,0 +1,204 @@
+# Clase: RejillaElevaciones / crear_rejilla_elevaciones
+import numpy as np
+
+import ruta_compartido
+ruta_compartido.agregar()
+from rejillas_io import leer_rejilla
+
+_TIPOS = (np.float32, np.float64)
+
+
+class RejillaElevaciones:
+    """
+    Rejilla de elevaciones compacta: un solo arreglo contiguo float32 o
+    float64 (4 u 8 bytes por celda, contra ~32 bytes por float en una lista
+    de listas) más la geometría del terreno:
+      - tam_celda: lado de la celda (m)
+      - origen: (xll, yll), esquina inferior izquierda, como en rejillas_io
+    Las celdas sin dato (NODATA) se guardan como NaN; 'mascara' las marca
+    con True. Todas las reducciones de corte/relleno ignoran esas celdas
+    (quedan como neutras en la clasificación).
+    fila() y ventana() devuelven vistas, sin copiar datos. Las funciones de
+    movimiento_tierras aceptan la rejilla donde antes recibían una matriz.
+    """
+
+    __slots__ = ('valores', 'tam_celda', 'origen')
+
+    def __init__(self, valores, tam_celda=1.0, origen=(0.0, 0.0), nodata=None,
+                 mascara=None, dtype=np.float32):
+        if np.dtype(dtype) not in _TIPOS:
+            raise ValueError("dtype debe ser float32 o float64.")
+        if not isinstance(tam_celda, (int, float)) or tam_celda <= 0:
+            raise ValueError("tam_celda debe ser un número positivo.")
+        if isinstance(valores, RejillaElevaciones):
+            valores = valores.valores
+        # sin NODATA que marcar no se copia (salvo para cambiar el tipo); al
+        # marcarlas se copia para no modificar el arreglo de entrada
+        copiar = nodata is not None or mascara is not None
+        arr = np.array(valores, dtype=dtype, order='C', copy=True) if copiar \
+            else np.ascontiguousarray(valores, dtype=dtype)
+        if arr.size == 0 and arr.ndim < 2:
+            arr = arr.reshape(0, 0)
+        if arr.ndim != 2:
+            raise ValueError("La matriz debe ser bidimensional.")
+        if nodata is not None:
+            arr[arr == nodata] = np.nan
+        if mascara is not None:
+            mascara = np.asarray(mascara, dtype=bool)
+            if mascara.shape != arr.shape:
+                raise ValueError("La máscara debe tener las dimensiones de la rejilla.")
+            arr[mascara] = np.nan
+        self.valores = arr
+        self.tam_celda = float(tam_celda)
+        self.origen = (float(origen[0]), float(origen[1]))
+
+    @classmethod
+    def _vista(cls, valores, tam_celda, origen):
+        # envoltura sin copia ni validación (ventanas y resultados internos)
+        rej = cls.__new__(cls)
+        rej.valores = valores
+        rej.tam_celda = tam_celda
+        rej.origen = origen
+        return rej
+
+    @classmethod
+    def desde_archivo(cls, ruta, dtype=np.float32):
+        """
+        Lee una rejilla (.asc, .xyz, .npy) con rejillas_io conservando el
+        tamaño de celda y el origen.
+        """
+        arr, info = leer_rejilla(ruta)
+        return cls(arr, info['tam_celda'], (info['xll'], info['yll']), dtype=dtype)
+
+    # -- dimensiones y memoria
+    @property
+    def shape(self):
+        return self.valores.shape
+
+    @property
+    def filas(self):
+        return self.valores.shape[0]
+
+    @property
+    def columnas(self):
+        return self.valores.shape[1]
+
+    @property
+    def size(self):
+        return self.valores.size
+
+    @property
+    def dtype(self):
+        return self.valores.dtype
+
+    @property
+    def nbytes(self):
+        return self.valores.nbytes
+
+    @property
+    def area_celda(self):
+        return self.tam_celda * self.tam_celda
+
+    @property
+    def mascara(self):
+        """
+        True en las celdas sin dato.
+        """
+        return np.isnan(self.valores)
+
+    @property
+    def celdas_validas(self):
+        return int(self.valores.size - np.count_nonzero(self.mascara))
+
+    # -- acceso sin copia
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None or np.dtype(dtype) == self.valores.dtype:
+            return self.valores.copy() if copy else self.valores
+        return self.valores.astype(dtype)
+
+    def __len__(self):
+        return self.valores.shape[0]
+
+    def __iter__(self):
+        return iter(self.valores)
+
+    def __getitem__(self, indice):
+        return self.valores[indice]
+
+    def fila(self, i):
+        """
+        Vista de la fila i (arreglo 1D).
+        """
+        return self.valores[i]
+
+    def ventana(self, fila_ini, col_ini, fila_fin, col_fin):
+        """
+        Subrejilla (fin exclusivo) que comparte los datos con esta rejilla;
+        el origen se desplaza a la esquina inferior izquierda de la ventana.
+        """
+        filas, cols = self.valores.shape
+        if not (0 <= fila_ini <= fila_fin <= filas and 0 <= col_ini <= col_fin <= cols):
+            raise ValueError("Ventana fuera de la matriz o con inicio mayor que fin.")
+        xll, yll = self.origen
+        origen = (xll + col_ini * self.tam_celda, yll + (filas - fila_fin) * self.tam_celda)
+        return RejillaElevaciones._vista(self.valores[fila_ini:fila_fin, col_ini:col_fin],
+                                         self.tam_celda, origen)
+
+    def misma_geometria(self, otra):
+        return (self.shape == otra.shape and self.tam_celda == otra.tam_celda
+                and self.origen == otra.origen)
+
+    def con_valores(self, valores):
+        """
+        Rejilla con la misma geometría y otros valores (p. ej. delta h).
+        """
+        return RejillaElevaciones._vista(np.ascontiguousarray(valores), self.tam_celda, self.origen)
+
+    def a_lista(self):
+        # NODATA -> None, para el código que trabaja con listas de listas
+        return [[None if v != v else v for v in fila] for fila in self.valores.tolist()]
+
+    def __repr__(self):
+        return (f"RejillaElevaciones({self.filas}x{self.columnas}, {self.dtype}, "
+                f"tam_celda={self.tam_celda}, origen={self.origen}, "
+                f"sin_dato={self.size - self.celdas_validas})")
+
+
+def crear_rejilla_elevaciones(filas, columnas, valor_inicial=0.0, tam_celda=1.0,
+                              origen=(0.0, 0.0), dtype=np.float32):
+    """
+    Equivalente compacto de crear_matriz_elevaciones: rejilla filas x columnas
+    con todas las celdas en valor_inicial.
+    """
+    if not isinstance(filas, int) or not isinstance(columnas, int):
+        raise TypeError("filas y columnas deben ser enteros.")
+    if filas <= 0 or columnas <= 0:
+        raise ValueError("filas y columnas deben ser > 0.")
+    return RejillaElevaciones(np.full((filas, columnas), valor_inicial, dtype=dtype),
+                              tam_celda, origen, dtype=dtype)
+
+
+def validar_geometria(actual, diseno):
+    """
+    Si ambas superficies son rejillas, deben coincidir en forma, tamaño de
+    celda y origen.
+    """
+    if isinstance(actual, RejillaElevaciones) and isinstance(diseno, RejillaElevaciones):
+        if not actual.misma_geometria(diseno):
+            raise ValueError("Las rejillas actual y diseno deben tener la misma geometría "
+                             "(dimensiones, tamaño de celda y origen).")
+
+
+if __name__ == "__main__":
+    sin_dato = -9999.0
+    r = RejillaElevaciones([[12.5, 12.6, sin_dato], [12.2, 12.4, 12.7]],
+                           tam_celda=5.0, origen=(1000.0, 2000.0), nodata=sin_dato)
+    print(r)
+    print(r.mascara)
+    v = r.ventana(0, 1, 2, 3)
+    v.valores[1, 0] = 13.0  # la ventana comparte los datos
+    print(v, r.fila(1))
+    n = 1000 * 1000
+    # lista de listas: puntero de 8 bytes + objeto float de 24 bytes por celda
+    print(f"{crear_rejilla_elevaciones(1000, 1000, 12.5).nbytes / 2**20:.1f} MiB (float32) vs "
+          f"~{32 * n / 2**20:.1f} MiB (listas)")
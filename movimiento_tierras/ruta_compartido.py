@@ -0,0 +1,15 @@
+# Función: agregar
+# Único lugar donde se agrega compartido/ (rejillas_io, exportacion,
+# instrumentacion) a sys.path; los módulos que lo usan llaman a agregar()
+# antes de importar de ahí, sin depender del orden de importación.
+import os
+import sys
+
+RUTA = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'compartido'))
+
+
+def agregar():
+    # idempotente: la ruta se inserta una sola vez
+    if RUTA not in sys.path:
+        sys.path.insert(0, RUTA)
+    return RUTA
@@ -0,0 +1,130 @@
+# Función: etiquetar_zonas / zonas_corte_relleno
+# Requiere SciPy (scipy.ndimage, ver requirements.txt); ningún otro módulo de
+# movimiento_tierras lo importa al cargarse, así que el cálculo de volúmenes no depende de él.
+import numpy as np
+from scipy import ndimage
+
+from motor_corte_relleno import a_arreglo, clasificar_arreglo, validar_area, CODIGO_CORTE, CODIGO_RELLENO
+from rejilla_elevaciones import RejillaElevaciones
+from instrumentacion import etapa
+
+# Vecindad de 4 (lados) u 8 (lados y esquinas)
+_ESTRUCTURAS = {
+    4: ndimage.generate_binary_structure(2, 1),
+    8: ndimage.generate_binary_structure(2, 2),
+}
+
+
+def etiquetar_zonas(codigos, conectividad=4):
+    """
+    Agrupa las celdas contiguas con el mismo código (corte o relleno) en
+    zonas. Las celdas neutras (y sin dato) no pertenecen a ninguna zona.
+    Devuelve (etiquetas, tipos):
+      - etiquetas: arreglo int32 de la forma de 'codigos'; 0 = sin zona,
+        1..k = número de zona (primero las de corte, luego las de relleno)
+      - tipos: arreglo int8 de longitud k con el código de cada zona
+    """
+    if conectividad not in _ESTRUCTURAS:
+        raise ValueError("conectividad debe ser 4 u 8.")
+    codigos = np.asarray(codigos)
+    if codigos.ndim != 2:
+        raise ValueError("La matriz debe ser bidimensional.")
+    estructura = _ESTRUCTURAS[conectividad]
+    etiquetas, n_corte = ndimage.label(codigos == CODIGO_CORTE, structure=estructura,
+                                       output=np.int32)
+    rel, n_relleno = ndimage.label(codigos == CODIGO_RELLENO, structure=estructura,
+                                   output=np.int32)
+    # las zonas de relleno se numeran después de las de corte
+    np.add(etiquetas, rel + n_corte, out=etiquetas, where=rel > 0)
+    tipos = np.concatenate([np.full(n_corte, CODIGO_CORTE, dtype=np.int8),
+                            np.full(n_relleno, CODIGO_RELLENO, dtype=np.int8)])
+    return etiquetas, tipos
+
+
+def zonas_corte_relleno(diferencias, area_celda=25.0, tol=0.0, conectividad=4):
+    """
+    Zonas contiguas de corte y de relleno de una matriz de delta h (lista,
+    arreglo o RejillaElevaciones) y sus totales, calculados con una sola
+    pasada de np.bincount sobre las celdas etiquetadas:
+      - 'tipo': código de la zona (CODIGO_CORTE / CODIGO_RELLENO)
+      - 'celdas': número de celdas
+      - 'volumen': volumen de corte o de relleno (positivo)
+      - 'fila_min', 'fila_max', 'col_min', 'col_max': rectángulo envolvente
+        (índices inclusivos)
+      - 'centroide_fila', 'centroide_col': centroide ponderado por |delta h|
+        (centro de masa del material a mover)
+      - 'centroide_x', 'centroide_y': lo mismo en coordenadas, si
+        'diferencias' es una RejillaElevaciones (centro de celda, y al norte)
+    Devuelve (etiquetas, zonas), con 'zonas' un dict de arreglos de una
+    entrada por zona (la zona i corresponde a la etiqueta i + 1).
+    """
+    validar_area(area_celda)
+    dif = a_arreglo(diferencias)
+    with etapa('terreno', 'zonas', celdas=dif.size) as reg:
+        etiquetas, tipos = etiquetar_zonas(clasificar_arreglo(dif, tol), conectividad)
+        k = tipos.size
+        idx = np.flatnonzero(etiquetas)
+        lab = etiquetas.ravel()[idx]
+        filas, cols = np.divmod(idx, dif.shape[1])
+        peso = np.abs(dif.ravel()[idx], dtype=np.float64)
+
+        celdas = np.bincount(lab, minlength=k + 1)[1:]
+        suma = np.bincount(lab, weights=peso, minlength=k + 1)[1:]
+        suma_f = np.bincount(lab, weights=peso * filas, minlength=k + 1)[1:]
+        suma_c = np.bincount(lab, weights=peso * cols, minlength=k + 1)[1:]
+
+        # rectángulos envolventes (una pasada en C)
+        cajas = ndimage.find_objects(etiquetas, max_label=k)
+        lim = np.array([(s[0].start, s[0].stop - 1, s[1].start, s[1].stop - 1) for s in cajas],
+                       dtype=np.int64).reshape(k, 4)
+        reg['zonas'] = k
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cf = suma_f / suma
+        cc = suma_c / suma
+    zonas = {
+        'tipo': tipos,
+        'celdas': celdas,
+        'volumen': suma * area_celda,
+        'fila_min': lim[:, 0], 'fila_max': lim[:, 1],
+        'col_min': lim[:, 2], 'col_max': lim[:, 3],
+        'centroide_fila': cf,
+        'centroide_col': cc,
+    }
+    if isinstance(diferencias, RejillaElevaciones):
+        xll, yll = diferencias.origen
+        tam = diferencias.tam_celda
+        zonas['centroide_x'] = xll + (cc + 0.5) * tam
+        zonas['centroide_y'] = yll + (dif.shape[0] - cf - 0.5) * tam
+    return etiquetas, zonas
+
+
+def zonas_mayores(zonas, n=10, tipo=None):
+    """
+    Índices de las 'n' zonas de mayor volumen (opcionalmente solo de un
+    tipo), de mayor a menor.
+    """
+    orden = np.argsort(zonas['volumen'])[::-1]
+    if tipo is not None:
+        orden = orden[zonas['tipo'][orden] == tipo]
+    return orden[:n]
+
+
+if __name__ == "__main__":
+    import time
+    from generar_terreno import generar_par_terreno
+    from mostrar_resultados import mostrar_zonas
+
+    dif = [[0.2, 0.1, -0.1, -0.2],
+           [0.3, 0.0, -0.1, 0.0],
+           [0.0, 0.0, 0.2, 0.1]]
+    etiquetas, zonas = zonas_corte_relleno(dif, 25.0)
+    print(etiquetas)
+    mostrar_zonas(zonas)
+
+    actual, diseno = generar_par_terreno(3000, 3000, semilla=5)
+    rejilla = RejillaElevaciones(actual - diseno, tam_celda=5.0)
+    t0 = time.perf_counter()
+    etiquetas, zonas = zonas_corte_relleno(rejilla, 25.0, tol=0.05)
+    print(f"\n9e6 celdas: {zonas['tipo'].size} zonas en {time.perf_counter() - t0:.2f} s")
+    mostrar_zonas(zonas, n=5)